@@ -0,0 +1,208 @@
+# ==========================================================
+# SCRIPT: Feed de alterações do extrato (para sistemas externos)
+# Cada execução que muda o "Extrato OFX" — importação, lançamento
+# manual, desfazer execução, compactação — grava um arquivo delta só
+# com as linhas que entraram ou saíram, numa pasta ao lado da planilha:
+#   extrato_ofx_alteracoes/00000001_exec0001.jsonl      (importação/manual)
+#   extrato_ofx_alteracoes/00000002_desfeita0001.jsonl  (desfazer execução)
+#   extrato_ofx_alteracoes/00000003_compactacao.jsonl   (duplicatas removidas)
+# O número de sequência cresce de 1 em 1 (o último fica em
+# sequencia.json), então o consumidor guarda o último que leu e busca
+# só os seguintes, sem reler a planilha inteira.
+# Cada linha do delta traz "sequencia", "execucao", "operacao"
+# ("inserida"/"removida"), "importacao" (identificador único da
+# importação que a gerou; vazio nas outras operações) e as colunas da planilha
+# pelo nome do cabeçalho. Formatos: jsonl (padrão), csv (";", utf-8-sig) e parquet
+# (precisa de pandas + pyarrow; sem eles, cai para jsonl).
+# O delta é gravado depois do save da planilha. Na importação o diário
+# só é apagado depois do delta: se o processo cair entre o save e o
+# delta, a próxima importação emite o delta que faltou a partir do
+# diário. O que diz se o delta já saiu é a "importacao" do diário, não o
+# número da execução (que volta a ser usado depois de um desfazer). Linhas movidas pelo arquivamento mensal não são alterações
+# do extrato e não entram no feed.
+#
+# Uso (listar o que mudou depois da sequência N):
+#   python alteracoes.py [caminho/extrato_ofx.xlsx] [--desde N]
+# ==========================================================
+
+import argparse
+import csv
+import glob
+import json
+import logging
+import os
+import re
+
+FORMATO = "jsonl"  # "jsonl", "csv" ou "parquet"
+ATIVO = True
+
+COLUNAS = (
+    "Data", "Tipo (Entrada/Saída)", "Descrição", "Valor (R$)", "Saldo acumulado (R$)",
+    "Banco ID", "Processado em", "Execução", "TRNTYPE", "Nr. Documento", "MEMO", "FITID", "Conta",
+    "Impressão Digital", "Categoria",
+)
+CAMPOS = ("sequencia", "execucao", "operacao", "importacao")
+PADRAO_ARQUIVO = re.compile(r"^(\d{8})_([a-z]+\d*)\.(jsonl|csv|parquet)$")
+
+
+def caminho_alteracoes(saida):
+    return os.path.splitext(saida)[0] + "_alteracoes"
+
+
+def _caminho_sequencia(pasta):
+    return os.path.join(pasta, "sequencia.json")
+
+
+def ultima_sequencia(saida):
+    """Última sequência emitida (0 se ainda não há feed)"""
+    pasta = caminho_alteracoes(saida)
+    if not os.path.isdir(pasta):
+        return 0
+    try:
+        with open(_caminho_sequencia(pasta), encoding="utf-8") as f:
+            contador = json.load(f)["sequencia"]
+    except FileNotFoundError:
+        contador = 0
+    # O contador pode ter ficado para trás (queda logo depois do delta) ou sumido: vale o maior dos dois
+    numeros = [int(m.group(1)) for m in map(PADRAO_ARQUIVO.match, os.listdir(pasta)) if m]
+    return max(numeros + [contador])
+
+
+def _registros(sequencia, execucao, operacao, linhas, importacao=None):
+    for linha in linhas:
+        linha = tuple(linha)[:len(COLUNAS)]
+        registro = {"sequencia": sequencia, "execucao": execucao, "operacao": operacao,
+                    "importacao": importacao}
+        registro.update(zip(COLUNAS, linha + (None,) * (len(COLUNAS) - len(linha))))
+        yield registro
+
+
+def _gravar(temporario, formato, registros):
+    if formato == "parquet":
+        import pandas as pd  # ImportError tratado em emitir
+
+        pd.DataFrame(registros, columns=[*CAMPOS, *COLUNAS]).to_parquet(
+            temporario, index=False)
+        return
+    with open(temporario, "w", newline="", encoding="utf-8-sig" if formato == "csv" else "utf-8") as f:
+        if formato == "csv":
+            escritor = csv.DictWriter(f, fieldnames=[*CAMPOS, *COLUNAS], delimiter=";")
+            escritor.writeheader()
+            escritor.writerows(registros)
+        else:
+            for registro in registros:
+                f.write(json.dumps(registro, ensure_ascii=False, default=str) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def execucoes_emitidas(saida, importacao, desde=0):
+    """Execuções da importação `importacao` que já têm delta depois da sequência `desde`"""
+    emitidas = set()
+    for _, caminho in deltas(saida, desde):
+        registros = ler_delta(caminho)
+        if registros and registros[0].get("importacao") == importacao:
+            emitidas.add(int(registros[0]["execucao"]))
+    return emitidas
+
+
+def emitir(saida, execucao, inseridas=(), removidas=(), rotulo=None, formato=None, importacao=None):
+    """
+    Grava o delta de uma execução e devolve o caminho (None se não houve
+    alteração ou o feed está desligado). `inseridas`/`removidas` são linhas
+    do extrato (valores na ordem das colunas); `rotulo` vai no nome do
+    arquivo (padrão "exec0003"); `importacao` identifica a importação (ver execucoes_emitidas).
+    """
+    if not ATIVO or not (inseridas or removidas):
+        return None
+    formato = formato or FORMATO
+    if formato == "parquet":
+        try:
+            import pandas  # noqa: F401
+            import pyarrow  # noqa: F401
+        except ImportError:
+            logging.warning("Feed de alterações: parquet precisa de pandas e pyarrow; gravando jsonl")
+            formato = "jsonl"
+
+    pasta = caminho_alteracoes(saida)
+    os.makedirs(pasta, exist_ok=True)
+    sequencia = ultima_sequencia(saida) + 1
+    registros = list(_registros(sequencia, execucao, "removida", removidas, importacao))
+    registros += _registros(sequencia, execucao, "inserida", inseridas, importacao)
+
+    rotulo = rotulo or f"exec{execucao:04d}"
+    destino = os.path.join(pasta, f"{sequencia:08d}_{rotulo}.{formato}")
+    temporario = destino + ".tmp"
+    try:
+        _gravar(temporario, formato, registros)
+        os.replace(temporario, destino)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+    # O contador só avança depois que o delta está completo no lugar
+    contador = _caminho_sequencia(pasta)
+    with open(contador + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({"sequencia": sequencia, "execucao": execucao}, f)
+    os.replace(contador + ".tmp", contador)
+    logging.info(f"Feed de alterações: sequência {sequencia} (execução {execucao}, "
+                 f"{len(inseridas)} inseridas, {len(removidas)} removidas) em {destino}")
+    return destino
+
+
+def emitir_com_seguranca(saida, execucao, inseridas=(), removidas=(), rotulo=None, importacao=None):
+    """emitir sem derrubar quem chamou: a planilha já foi salva, falha no feed só vai para o log"""
+    try:
+        return emitir(saida, execucao, inseridas, removidas, rotulo, importacao=importacao)
+    except Exception:
+        logging.exception(f"Feed de alterações: falha ao gravar o delta da execução {execucao}")
+        return None
+
+
+# ==========================================================
+# Leitura (lado do consumidor)
+# ==========================================================
+def deltas(saida, desde=0):
+    """[(sequencia, caminho)] dos deltas com sequência maior que `desde`, em ordem"""
+    pasta = caminho_alteracoes(saida)
+    if not os.path.isdir(pasta):
+        return []
+    encontrados = []
+    for caminho in glob.glob(os.path.join(pasta, "*_*.*")):
+        m = PADRAO_ARQUIVO.match(os.path.basename(caminho))
+        if m and int(m.group(1)) > desde:
+            encontrados.append((int(m.group(1)), caminho))
+    return sorted(encontrados)
+
+
+def ler_delta(caminho):
+    """Registros (dicts) de um delta, qualquer que seja o formato"""
+    if caminho.endswith(".parquet"):
+        import pandas as pd
+
+        return pd.read_parquet(caminho).to_dict("records")
+    if caminho.endswith(".csv"):
+        with open(caminho, newline="", encoding="utf-8-sig") as f:
+            return list(csv.DictReader(f, delimiter=";"))
+    with open(caminho, encoding="utf-8") as f:
+        return [json.loads(linha) for linha in f if linha.strip()]
+
+
+def alteracoes_desde(saida, desde=0):
+    """Todos os registros das sequências posteriores a `desde`, em ordem"""
+    for _, caminho in deltas(saida, desde):
+        yield from ler_delta(caminho)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Lista as alterações do extrato depois de uma sequência")
+    parser.add_argument("saida", nargs="?", default=os.path.join(os.getcwd(), "extrato_ofx.xlsx"))
+    parser.add_argument("--desde", type=int, default=0, help="última sequência já consumida")
+    args = parser.parse_args()
+    encontrados = deltas(args.saida, args.desde)
+    for sequencia, caminho in encontrados:
+        registros = ler_delta(caminho)
+        inseridas = sum(1 for r in registros if r["operacao"] == "inserida")
+        print(f"{sequencia:>8}  {os.path.basename(caminho):<32} {inseridas:>6} inseridas "
+              f"{len(registros) - inseridas:>6} removidas")
+    print(f"— última sequência: {ultima_sequencia(args.saida)}")
@@ -0,0 +1,345 @@
+# ==========================================================
+# SCRIPT: Arquivamento do extrato por mês
+# O extrato_ofx.xlsx (planilha "quente") guarda só os meses recentes —
+# o atual e o anterior, por padrão. Lançamentos mais antigos vão para
+# uma planilha por ano (extrato_ofx_2024.xlsx, ...), que não precisa
+# ser aberta no dia a dia.
+# Só saem execuções processadas há mais de DIAS_DESFAZER dias (coluna
+# "Processado em"), inteiras: a que acabou de ser importada, ainda que
+# seja de meses antigos, fica na planilha quente e pode ser desfeita.
+# O que a importação precisa desses meses fica num índice pequeno
+# (extrato_ofx.xlsx.arquivo.json), sem abrir os arquivos anuais:
+#   - impressões digitais dos lançamentos arquivados (deduplicação)
+#   - saldo de fim de dia por conta (conferência com o saldo do banco)
+#   - totais por conta × mês e por descrição (abas de resumo, resumos.py)
+# O saldo de abertura de cada conta (aba SALDOS_INICIAIS) passa a
+# incluir o que foi arquivado, então os saldos acumulados não mudam; o
+# saldo de fim de dia dos meses arquivados é refeito a partir do saldo
+# anterior a tudo o que está no arquivo (arquivar um mês mais antigo
+# depois de um mais novo não desloca os saldos).
+# Desfazer execução só alcança as linhas que ainda estão na planilha quente.
+#
+# Uso:
+#   python arquivamento.py [caminho/extrato_ofx.xlsx] [--meses 2] [--dias 30]
+# Também roda sozinho depois de cada importação (main.ARQUIVAR_AUTOMATICAMENTE).
+# ==========================================================
+
+import argparse
+import json
+import logging
+import os
+import time
+from datetime import date, datetime, timedelta
+
+import openpyxl
+
+from conciliacao import Conciliador
+from leitura_xlsx import abrir_leitura, carregar_editavel
+from resumos import acumular
+from saldos import Razao
+from transacao import data_br
+
+MESES_QUENTES = 2  # meses (contando o atual) que ficam na planilha quente
+DIAS_DESFAZER = 30  # execuções mais novas que isso não são arquivadas (continuam podendo ser desfeitas)
+
+
+def caminho_indice(saida):
+    return saida + ".arquivo.json"
+
+
+def caminho_ano(saida, ano):
+    base, extensao = os.path.splitext(saida)
+    return f"{base}_{ano}{extensao}"
+
+
+def corte_quente(hoje=None, meses=MESES_QUENTES):
+    """Primeiro dia do mês mais antigo que fica na planilha quente"""
+    hoje = hoje or date.today()
+    mes = hoje.year * 12 + hoje.month - 1 - (max(1, meses) - 1)
+    return date(mes // 12, mes % 12 + 1, 1)
+
+
+# ==========================================================
+# Índice do arquivo
+# ==========================================================
+def ler_indice(saida):
+    """
+    {"corte", "ultima_execucao", "anos": {ano: {"arquivo", "linhas"}},
+    "contas": [{"banco", "conta", "saldo_antes", "dias": [[ordinal, saldo], ...]}],
+    "impressoes": [...], "resumo": {"mensal", "contrapartes"}, "proximo"}
+    ou None se nada foi arquivado ainda.
+    """
+    try:
+        with open(caminho_indice(saida), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def gravar_indice(saida, indice):
+    destino = caminho_indice(saida)
+    temporario = destino + ".tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(indice, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporario, destino)
+
+
+def proximo_arquivamento(indice):
+    """A partir de quando o último arquivamento deixa sair alguma execução retida (datetime) ou None"""
+    proximo = indice.get("proximo") if indice else None
+    return datetime.fromisoformat(proximo) if proximo else None
+
+
+def aplicar_indice(razao, indice):
+    """Liga o saldo de fim de dia dos meses arquivados aos livros do razão"""
+    for conta in indice["contas"]:
+        dias = conta["dias"]
+        razao.livro(conta["banco"], conta["conta"]).definir_historico(
+            [d for d, _ in dias], [s for _, s in dias], conta["saldo_antes"])
+
+
+def precisa_arquivar(razao, corte):
+    """Há lançamento anterior ao corte na planilha quente? (o razão já está ordenado por data)"""
+    limite = corte.toordinal()
+    return any(livro.chaves and livro.chaves[0][0] < limite for livro in razao.livros.values())
+
+
+def _processado_em(valor):
+    """Coluna "Processado em" -> datetime (None se vazia ou em outro formato)"""
+    if isinstance(valor, datetime):
+        return valor
+    try:
+        return datetime.strptime(str(valor), "%d/%m/%Y %H:%M:%S")
+    except ValueError:
+        return None
+
+
+def _execucao(valor):
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+def _movimentos(conta):
+    """Conta do índice -> {ordinal: movimento do dia} (diferença entre saldos de fim de dia)"""
+    anterior = conta["saldo_antes"]
+    movimentos = {}
+    for ordinal, saldo in conta["dias"]:
+        movimentos[ordinal] = round(saldo - anterior, 2)
+        anterior = saldo
+    return movimentos
+
+
+# ==========================================================
+# Arquivamento
+# ==========================================================
+def arquivar(saida, meses=MESES_QUENTES, hoje=None, dias=DIAS_DESFAZER, preservar=None):
+    """
+    Move para as planilhas anuais os lançamentos anteriores ao corte das
+    execuções processadas há mais de `dias` dias (nunca os da execução
+    `preservar` em diante) e devolve o resumo: {"movidas", "mantidas",
+    "corte", "arquivos", "proximo", "segundos"}; "proximo" é quando alguma
+    execução retida passa a poder sair (ISO), ou None.
+    Pode ser repetido após uma queda: linhas que já estão no índice ou na
+    planilha anual não são gravadas de novo.
+    """
+    from main import (atualizar_aba_bancos, caminho_diario, impressao_linha, ler_saldos_iniciais,
+                      regravar_planilha, salvar_atomico)
+
+    if os.path.exists(caminho_diario(saida)):
+        raise RuntimeError("Há uma importação pendente no diário; conclua-a antes de arquivar.")
+
+    inicio = time.perf_counter()
+    corte = corte_quente(hoje, meses)
+    origem = abrir_leitura(saida)
+    ws_origem = origem.worksheets[0]
+
+    linhas_origem = ws_origem.iter_rows(values_only=True)
+    cabecalho = list(next(linhas_origem))
+    cabecalho += [None] * (15 - len(cabecalho))
+    cabecalho[12], cabecalho[13], cabecalho[14] = "Conta", "Impressão Digital", "Categoria"
+
+    # Contas pela chave do livro (a mesma conta vinda de outra fonte fica no livro da primeira, como no razão)
+    contas = Razao(ler_saldos_iniciais(origem), agrupar=Conciliador().grupo)
+
+    # ---- Passada única: lançamentos e quando cada execução foi processada ----
+    lancamentos, ocorrencias = [], {}
+    processadas = {}  # execução -> "Processado em" mais recente das suas linhas
+    for row in linhas_origem:
+        if not row or all(v is None for v in row):
+            continue
+        row = list(row) + [None] * (14 - len(row))
+        if row[0] is None or not isinstance(row[3], (int, float)):
+            lancamentos.append((None, row))
+            continue
+        row[13] = row[13] or impressao_linha(row, ocorrencias)
+        row[12] = row[12] or "N/A"
+        contas.chave(row[5], row[12])
+        data = data_br(row[0]) if isinstance(row[0], str) else None
+        execucao, processado = _execucao(row[7]), _processado_em(row[6])
+        if processado is not None and (execucao not in processadas or processadas[execucao] < processado):
+            processadas[execucao] = processado
+        lancamentos.append((data, row))
+
+    # ---- Separa o que fica e o que vai para cada ano ----
+    limite = (datetime.combine(hoje, datetime.min.time()) if hoje else datetime.now()) - timedelta(days=dias)
+    retidas = set()  # execuções com lançamento antes do corte que ainda não podem sair
+    mantidas, movidas = [], {}  # movidas: ano -> linhas
+    for data, row in lancamentos:
+        if data is None or data >= corte:
+            mantidas.append(row)
+            continue
+        execucao = _execucao(row[7])
+        processado = processadas.get(execucao)
+        recente = processado is not None and processado > limite
+        if recente or (preservar is not None and execucao is not None and execucao >= preservar):
+            retidas.add(execucao)
+            mantidas.append(row)
+        else:
+            movidas.setdefault(data.year, []).append((data, row))
+    # Com execução retida, nada muda antes de ela completar `dias`. Fica no índice: qualquer
+    # processo (sessão nova da interface, servidor, monitor) sabe até quando não adianta tentar.
+    proximo = min((processadas[e] + timedelta(days=dias) for e in retidas if e in processadas), default=None)
+    proximo = proximo.isoformat() if proximo else None
+
+    indice = ler_indice(saida) or {"corte": None, "ultima_execucao": 0, "anos": {}, "contas": [], "impressoes": []}
+    total_movidas = sum(len(linhas) for linhas in movidas.values())
+    if not total_movidas:
+        origem.close()
+        if indice.get("proximo") != proximo:
+            indice["proximo"] = proximo
+            gravar_indice(saida, indice)
+        return {"movidas": 0, "mantidas": len(mantidas), "corte": corte.isoformat(), "arquivos": [],
+                "proximo": proximo, "segundos": round(time.perf_counter() - inicio, 2)}
+
+    ja_arquivadas = set(indice["impressoes"])
+    if "resumo" not in indice:
+        # Índice anterior às abas de resumo: soma uma vez o que já está nas planilhas anuais
+        indice["resumo"] = None
+        for ano in sorted(indice["anos"]):
+            if os.path.exists(caminho_ano(saida, ano)):
+                wb_ano = abrir_leitura(caminho_ano(saida, ano))
+                indice["resumo"] = acumular(indice["resumo"], wb_ano.worksheets[0].iter_rows(
+                    min_row=2, max_col=13, values_only=True))
+                wb_ano.close()
+
+    # ---- Saldo de fim de dia dos meses arquivados + novo saldo de abertura ----
+    # Movimento de cada dia (o já arquivado e o que sai agora), refeito em ordem de data a partir do
+    # saldo anterior a tudo o que está no arquivo: abertura atual menos o que já foi arquivado
+    arquivado, movimentos = {}, {}
+    for conta in indice["contas"]:
+        chave = contas.chave(conta["banco"], conta["conta"])
+        dias_conta = movimentos.setdefault(chave, {})
+        for ordinal, movimento in _movimentos(conta).items():
+            dias_conta[ordinal] = round(dias_conta.get(ordinal, 0) + movimento, 2)
+            arquivado[chave] = round(arquivado.get(chave, 0) + movimento, 2)
+    for ano in sorted(movidas):
+        for data, row in movidas[ano]:
+            chave = contas.chave(row[5], row[12])
+            if row[13] in ja_arquivadas:
+                # Queda depois do índice e antes da planilha quente: já está nos dias, ainda não na abertura
+                arquivado[chave] = round(arquivado.get(chave, 0) - row[3], 2)
+                continue
+            dias_conta = movimentos.setdefault(chave, {})
+            dias_conta[data.toordinal()] = round(dias_conta.get(data.toordinal(), 0) + row[3], 2)
+    contas_indice = []
+    saldos_iniciais = contas.saldos_iniciais()
+    for chave, dias_conta in movimentos.items():
+        saldo = saldo_antes = round((saldos_iniciais.get(chave) or 0) - arquivado.get(chave, 0), 2)
+        saldos_dias = []
+        for ordinal in sorted(dias_conta):
+            saldo = round(saldo + dias_conta[ordinal], 2)
+            saldos_dias.append([ordinal, saldo])
+        contas_indice.append({"banco": chave[0], "conta": chave[1], "saldo_antes": saldo_antes, "dias": saldos_dias})
+        saldos_iniciais[chave] = saldo
+
+    # ---- Planilhas anuais ----
+    arquivos = []
+    arquivadas_agora = []
+    for ano in sorted(movidas):
+        destino_ano = caminho_ano(saida, ano)
+        if os.path.exists(destino_ano):
+            wb_ano = carregar_editavel(destino_ano)
+            ws_ano = wb_ano.active
+            # Queda entre o save do ano e o do índice: essas linhas já estão aqui
+            ja_arquivadas.update(row[13] for row in ws_ano.iter_rows(min_row=2, values_only=True)
+                                 if len(row) > 13 and row[13])
+        else:
+            wb_ano = openpyxl.Workbook()
+            ws_ano = wb_ano.active
+            ws_ano.title = "Extrato OFX"
+            ws_ano.append(cabecalho)
+        novas = 0
+        for _, row in movidas[ano]:
+            if row[13] in ja_arquivadas:  # arquivamento anterior interrompido no meio
+                continue
+            ws_ano.append(row)
+            arquivadas_agora.append(row)
+            ja_arquivadas.add(row[13])
+            novas += 1
+        salvar_atomico(wb_ano, destino_ano)
+        registro_ano = indice["anos"].setdefault(str(ano), {"arquivo": os.path.basename(destino_ano), "linhas": 0})
+        registro_ano["linhas"] += novas
+        arquivos.append(destino_ano)
+
+    indice["corte"] = corte.isoformat()
+    # A numeração das execuções continua mesmo que nenhuma linha delas fique na planilha quente
+    for linhas in movidas.values():
+        for _, row in linhas:
+            if isinstance(row[7], int) and row[7] > indice["ultima_execucao"]:
+                indice["ultima_execucao"] = row[7]
+    indice["contas"] = contas_indice
+    indice["impressoes"] = sorted(ja_arquivadas)
+    indice["resumo"] = acumular(indice["resumo"], arquivadas_agora)
+    indice["proximo"] = proximo
+    gravar_indice(saida, indice)  # antes da planilha quente: numa queda, nada fica sem dono
+
+    # ---- Planilha quente só com os meses recentes ----
+    razao = Razao(saldos_iniciais, agrupar=Conciliador().grupo)
+    for num_linha, row in enumerate(mantidas, start=2):
+        if row[0] is None or not isinstance(row[3], (int, float)):
+            continue
+        data = data_br(row[0]) if isinstance(row[0], str) else None
+        razao.livro(row[5], row[12]).inserir(data, row[3], num_linha)
+    for livro in razao.livros.values():
+        for num_linha, saldo in livro.alteracoes():
+            mantidas[num_linha - 2][4] = saldo
+
+    nomes = ", ".join(os.path.basename(a) for a in arquivos)
+    destino, ws_destino = regravar_planilha(origem, cabecalho, mantidas, [
+        datetime.now().strftime("%d/%m/%Y %H:%M:%S"), f"ARQUIVAMENTO (antes de {corte:%d/%m/%Y})",
+        "", "", "", 0, 0, "", "", "", "", f"OK ({total_movidas} linhas para {nomes})"])
+
+    # recria BANCOS, SALDOS_INICIAIS e os resumos (meses arquivados vêm do índice)
+    atualizar_aba_bancos(destino, ws_destino, razao, linhas=mantidas, arquivado=indice["resumo"])
+    origem.close()
+    salvar_atomico(destino, saida)
+
+    resumo = {
+        "movidas": total_movidas, "mantidas": len(mantidas), "corte": corte.isoformat(), "arquivos": arquivos,
+        "proximo": proximo, "segundos": round(time.perf_counter() - inicio, 2),
+    }
+    logging.info(f"Arquivamento de {saida}: {resumo}")
+    return resumo
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move os meses antigos do extrato para planilhas anuais")
+    parser.add_argument("saida", nargs="?", default=os.path.join(os.getcwd(), "extrato_ofx.xlsx"))
+    parser.add_argument("--meses", type=int, default=MESES_QUENTES,
+                        help="meses (contando o atual) que ficam na planilha principal")
+    parser.add_argument("--dias", type=int, default=DIAS_DESFAZER,
+                        help="só arquiva execuções processadas há mais desses dias")
+    args = parser.parse_args()
+    resumo = arquivar(args.saida, args.meses, dias=args.dias)
+    if not resumo["movidas"]:
+        print(f"Nada a arquivar (corte em {resumo['corte']}"
+              + (f"; execuções recentes retidas até {resumo['proximo'][:16]}" if resumo["proximo"] else "") + ").")
+    else:
+        print(f"✅ {resumo['movidas']} linhas arquivadas em {resumo['segundos']} s; "
+              f"{resumo['mantidas']} ficaram na planilha principal")
+        for arquivo in resumo["arquivos"]:
+            print(f"   📦 {arquivo}")
@@ -0,0 +1,58 @@
+# ==========================================================
+# BENCHMARK: leitura de PDF com e sem o cache de extração (cache_pdf.py)
+# Para cada PDF (padrão: bases/cef.pdf), mede ler_pdf:
+#   - sem cache (pdfplumber a cada vez)
+#   - cache frio (extrai e grava o cache)
+#   - cache quente (só as regras da CEF sobre o que está no cache)
+# e confere se os lançamentos saem iguais. O cache vai para uma pasta
+# temporária, sem mexer no cache de verdade.
+#
+# Uso:
+#   python benchmarks/bench_cache_pdf.py [extrato.pdf ...] [--repeticoes 5]
+# ==========================================================
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from cache_pdf import VARIAVEL_CACHE  # noqa: E402
+from leitores import ler_pdf  # noqa: E402
+
+
+def medir(nome, funcao, repeticoes):
+    melhor, resultado = None, None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        segundos = time.perf_counter() - inicio
+        melhor = segundos if melhor is None else min(melhor, segundos)
+    print(f"{nome:<40} {melhor * 1000:>9.1f} ms")
+    return melhor, resultado
+
+
+def resumo(resultado):
+    conta, transacoes = resultado
+    return conta, [repr(t) for t in transacoes]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("pdfs", nargs="*", default=[os.path.join(RAIZ, "bases", "cef.pdf")])
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        for pdf in args.pdfs:
+            print(f"{os.path.basename(pdf)} ({os.path.getsize(pdf) / 1024:.0f} KB)")
+            os.environ[VARIAVEL_CACHE] = "0"
+            sem_cache, esperado = medir("  sem cache", lambda: ler_pdf(pdf), args.repeticoes)
+            os.environ[VARIAVEL_CACHE] = pasta
+            _, frio = medir("  cache frio (extrai e grava)", lambda: ler_pdf(pdf), 1)
+            quente, resultado = medir("  cache quente", lambda: ler_pdf(pdf), args.repeticoes)
+            print(f"{'':<40} {sem_cache / quente:>8.0f}x mais rápido; mesmos lançamentos: "
+                  f"{resumo(esperado) == resumo(frio) == resumo(resultado)}")
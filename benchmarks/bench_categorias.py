@@ -0,0 +1,89 @@
+# ==========================================================
+# BENCHMARK: categorização (categorias.py) com centenas de regras
+# Compara o autômato de Aho-Corasick (com e sem cache) com o laço
+# de regex por linha (uma expressão por palavra-chave), que é o que
+# o pós-processamento fazia.
+#
+# Uso:
+#   python benchmarks/bench_categorias.py [n_descricoes] [n_regras]
+# ==========================================================
+
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from categorias import SEM_CATEGORIA, Categorizador  # noqa: E402
+from transacao import normalizar_descricao  # noqa: E402
+
+HISTORICOS = ["ENVIO PIX", "CRED PIX", "COMPRA CARTAO", "PAG BOLETO", "DEB AUT", "TED RECEBIDA"]
+SILABAS = ["MER", "CA", "DO", "LO", "JA", "FAR", "MA", "CIA", "POS", "TO", "PA", "DA", "RIA", "SU", "PER"]
+
+
+def palavra(aleatorio, silabas=3):
+    return "".join(aleatorio.choice(SILABAS) for _ in range(silabas))
+
+
+def regras_sinteticas(n, aleatorio):
+    regras = {}
+    for i in range(n):
+        regras.setdefault(f"Categoria {i % 40}", []).append(palavra(aleatorio, aleatorio.randint(2, 4)))
+    return regras
+
+
+def descricoes_sinteticas(n, aleatorio, distintas):
+    favorecidos = [f"{palavra(aleatorio)} {palavra(aleatorio, 2)} LTDA" for _ in range(distintas)]
+    return [f"{aleatorio.choice(HISTORICOS)} {aleatorio.choice(favorecidos)}" for _ in range(n)]
+
+
+def regex_por_linha(regras, descricoes):
+    """Uma regex por palavra inteira, testadas em ordem para cada linha (mais longa vence, como no autômato)"""
+    compiladas = sorted(((len(p), -i, re.compile(rf"(?<![^\W_]){re.escape(normalizar_descricao(p))}(?![^\W_])"),
+                          categoria)
+                         for i, (categoria, p) in enumerate((c, p) for c, ps in regras.items() for p in ps)),
+                        reverse=True)
+    resultado = []
+    for descricao in descricoes:
+        texto = normalizar_descricao(descricao)
+        for _, _, expressao, categoria in compiladas:
+            if expressao.search(texto):
+                resultado.append(categoria)
+                break
+        else:
+            resultado.append(SEM_CATEGORIA)
+    return resultado
+
+
+def medir(nome, funcao, n):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    segundos = time.perf_counter() - inicio
+    print(f"{nome:<45} {segundos:>7.2f} s  {n / segundos * 60 / 1e6:>7.2f} M descrições/min")
+    return resultado
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    n_regras = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    aleatorio = random.Random(42)
+    regras = regras_sinteticas(n_regras, aleatorio)
+
+    inicio = time.perf_counter()
+    categorizador = Categorizador(regras)
+    print(f"{n_regras} regras -> {len(categorizador.transicoes)} estados em "
+          f"{(time.perf_counter() - inicio) * 1000:.1f} ms")
+
+    repetidas = descricoes_sinteticas(n, aleatorio, distintas=20_000)
+    unicas = [f"{d} {i}" for i, d in enumerate(descricoes_sinteticas(n, aleatorio, distintas=n))]
+
+    medir("autômato, extrato real (20 mil distintas)", lambda: categorizador.classificar(repetidas), n)
+    categorizador.cache.clear()
+    esperado = medir("autômato, todas distintas (sem cache)", lambda: categorizador.classificar(unicas), n)
+
+    amostra = min(n, 20_000)
+    obtido = medir(f"regex por linha ({amostra} distintas)", lambda: regex_por_linha(regras, unicas[:amostra]),
+                   amostra)
+    print("mesmo resultado:", obtido == esperado[:amostra])
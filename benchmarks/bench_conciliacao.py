@@ -0,0 +1,72 @@
+# ==========================================================
+# BENCHMARK: conciliação entre fontes (conciliacao.py)
+# Gera o mesmo extrato pelo "OFX" e pelo "PDF" (descrições e contas
+# escritas de forma diferente) e mede a conciliação por hash join em
+# tamanhos crescentes — o tempo por lançamento deve ficar constante.
+# Para comparação, o laço aninhado (cada lançamento contra todos os
+# da outra fonte) numa amostra pequena.
+#
+# Uso:
+#   python benchmarks/bench_conciliacao.py [n_maximo]
+# ==========================================================
+
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from conciliacao import Conciliador, radicais, semelhanca  # noqa: E402
+
+DESCRICOES = [("ENVIO PIX", "PIX ENVIADO"), ("CRED PIX", "PIX RECEBIDO"), ("COMPRA", "COMPRA CARTAO"),
+              ("PAG BOLETO", "PAGAMENTO BOLETO"), ("TARIFA", "TARIFA PACOTE")]
+
+
+def lancamentos(n, aleatorio):
+    inicio = date(2020, 1, 1)
+    return [(inicio + timedelta(days=aleatorio.randrange(2000)), round(aleatorio.uniform(-500, 500), 2) or 1.0,
+             aleatorio.choice(DESCRICOES)) for _ in range(n)]
+
+
+def hash_join(base):
+    conciliador = Conciliador()
+    for data, valor, (descricao, _) in base:
+        conciliador.registrar("CEF", "03088/1288/000752785312-4", data, valor, "PDF", descricao)
+    for data, valor, (_, descricao) in base:
+        conciliador.procurar("0104", "7527853124", data, valor, "OFX", descricao)
+    return conciliador.conciliados
+
+
+def laco_aninhado(base):
+    usados = set()
+    for data, valor, (_, descricao) in base:
+        proprios = radicais(descricao)
+        for i, (outra_data, outro_valor, (outra, _)) in enumerate(base):
+            if i not in usados and outra_data == data and outro_valor == valor \
+                    and semelhanca(proprios, radicais(outra)) >= 0.5:
+                usados.add(i)
+                break
+    return len(usados)
+
+
+def medir(nome, funcao, n):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    segundos = time.perf_counter() - inicio
+    print(f"{nome:<35} {n:>9} lanç. {segundos:>7.2f} s  {segundos / n * 1e6:>6.1f} µs/lanç.  "
+          f"{resultado} conciliados")
+
+
+if __name__ == "__main__":
+    n_maximo = int(sys.argv[1]) if len(sys.argv) > 1 else 400_000
+    aleatorio = random.Random(42)
+    n = 25_000
+    while n <= n_maximo:
+        base = lancamentos(n, aleatorio)
+        medir("hash join", lambda: hash_join(base), n)
+        n *= 2
+    amostra = 2_000
+    base = lancamentos(amostra, aleatorio)
+    medir("laço aninhado", lambda: laco_aninhado(base), amostra)
@@ -0,0 +1,72 @@
+# ==========================================================
+# BENCHMARK: consultas indexadas (consulta.py) em milhões de lançamentos
+# Preenche o banco de consulta com lançamentos sintéticos (direto no
+# SQLite: gerar uma planilha desse tamanho levaria minutos) e mede as
+# consultas típicas: período de uma conta, débitos de um mês,
+# uma execução e totais por conta/mês.
+#
+# Uso:
+#   python benchmarks/bench_consulta.py [n_lancamentos]
+# ==========================================================
+
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from consulta import COLUNAS, Consulta  # noqa: E402
+
+CONTAS = [("CEF", f"0308/{i:06d}") for i in range(20)] + [("077", f"{i:08d}") for i in range(20)]
+HISTORICOS = ["ENVIO PIX", "CRED PIX", "COMPRA", "DEVREC PIX", "PAG BOLETO"]
+INICIO = date(2020, 1, 1)
+
+
+def lancamentos_sinteticos(n):
+    aleatorio = random.Random(42)
+    for i in range(n):
+        banco, conta = CONTAS[i % len(CONTAS)]
+        data = INICIO + timedelta(days=aleatorio.randrange(6 * 365))
+        valor = round(aleatorio.uniform(-900, 900), 2)
+        yield ("sintetico", i + 2, data.isoformat(), "Entrada" if valor > 0 else "Saída",
+               HISTORICOS[i % len(HISTORICOS)], valor, None, banco, "", i // 5000 + 1,
+               "CREDIT" if valor > 0 else "DEBIT", "", "", f"F{i}", conta, f"{i:020x}")
+
+
+def medir(nome, funcao, repeticoes=5):
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    print(f"{nome:<45} {melhor * 1000:>9.2f} ms  ({len(resultado)} linha(s))")
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    with tempfile.TemporaryDirectory() as pasta:
+        saida = os.path.join(pasta, "extrato_ofx.xlsx")  # não existe: só o banco sintético é consultado
+        with Consulta(saida) as consulta:
+            inicio = time.perf_counter()
+            with consulta.conexao:
+                consulta.conexao.executemany(
+                    f"INSERT INTO lancamentos (fonte, linha, {', '.join(COLUNAS)}) "
+                    f"VALUES ({', '.join('?' * (len(COLUNAS) + 2))})",
+                    lancamentos_sinteticos(n))
+            print(f"{n} lançamentos carregados em {time.perf_counter() - inicio:.1f} s")
+
+            medir("CEF 0308/000003, março/2023",
+                  lambda: consulta.lancamentos(banco="CEF", conta="0308/000003", de="01/03/2023", ate="31/03/2023"))
+            medir("débitos CEF 0308/000003, 2023",
+                  lambda: consulta.lancamentos(banco="CEF", conta="0308/000003", de="2023-01-01",
+                                               ate="2023-12-31", tipo="Saída"))
+            medir("execução 57", lambda: consulta.lancamentos(execucao=57))
+            medir("todas as contas, 1 semana",
+                  lambda: consulta.lancamentos(de="2024-06-01", ate="2024-06-07"))
+            medir("totais por conta/mês de uma conta",
+                  lambda: consulta.totais(("banco", "conta", "mes"), banco="077", conta="00000007"))
+            medir("totais por conta, 1 trimestre",
+                  lambda: consulta.totais(("banco", "conta"), de="2024-01-01", ate="2024-03-31"), repeticoes=3)
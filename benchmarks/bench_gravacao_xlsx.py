@@ -0,0 +1,79 @@
+# ==========================================================
+# BENCHMARK: gravação do extrato (gravacao_xlsx.py) x wb.save()
+# Monta em memória um extrato sintético com as abas de sempre
+# ("Extrato OFX", LOG_PROCESSAMENTO, BANCOS) e grava com o wb.save()
+# do openpyxl e com gravar_xlsx em sequência e com 1..N processos.
+# Confere se a planilha gravada relida tem os mesmos valores.
+#
+# Uso:
+#   python benchmarks/bench_gravacao_xlsx.py [n_linhas] [max_processos]
+# ==========================================================
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import openpyxl  # noqa: E402
+
+from gravacao_xlsx import gravar_xlsx, pode_gravar  # noqa: E402
+
+HISTORICOS = ["ENVIO PIX", "CRED PIX", "COMPRA", "DEVREC PIX", "PAG BOLETO"]
+
+
+def extrato_sintetico(n):
+    aleatorio = random.Random(42)
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "Extrato OFX"
+    ws.append(["Data", "Tipo (Entrada/Saída)", "Descrição", "Valor (R$)", "Saldo acumulado (R$)", "Banco ID",
+               "Processado em", "Execução", "TRNTYPE", "Nr. Documento", "MEMO", "FITID", "Conta",
+               "Impressão Digital", "Categoria"])
+    saldo = 0.0
+    for i in range(n):
+        valor = round(aleatorio.uniform(-900, 900), 2)
+        saldo = round(saldo + valor, 2)
+        historico = HISTORICOS[i % len(HISTORICOS)]
+        ws.append([f"{aleatorio.randint(1, 28):02d}/{aleatorio.randint(1, 12):02d}/2025",
+                   "Entrada" if valor > 0 else "Saída", historico, valor, saldo, "CEF",
+                   "19/10/2026 10:00:00", i // 5000 + 1, "CREDIT" if valor > 0 else "DEBIT", f"{i % 999999:06d}",
+                   historico, f"PDF-{i:020x}", "03088/1288/000752785312-4", f"{i:020x}", "Transferências"])
+    log = wb.create_sheet("LOG_PROCESSAMENTO")
+    for i in range(n // 50):
+        log.append(["19/10/2026 10:00:00", f"extrato_{i}.pdf", "CEF", "0308", i + 1, 50, 0, "", "", saldo, "", "OK"])
+    bancos = wb.create_sheet("BANCOS")
+    for i in range(200):
+        bancos.append([f"{i:03d}", f"{i:08d}", round(aleatorio.uniform(-1e5, 1e5), 2)])
+    return wb
+
+
+def medir(nome, funcao):
+    inicio = time.perf_counter()
+    funcao()
+    segundos = time.perf_counter() - inicio
+    print(f"{nome:<40} {segundos:>7.2f} s")
+    return segundos
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    max_processos = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+    wb = extrato_sintetico(n)
+    print(f"{n} linhas, {os.cpu_count()} CPU(s), só valores: {pode_gravar(wb)}")
+    with tempfile.TemporaryDirectory() as pasta:
+        referencia = os.path.join(pasta, "openpyxl.xlsx")
+        base = medir("wb.save (openpyxl)", lambda: wb.save(referencia))
+        for processos in range(0, max_processos + 1):
+            destino = os.path.join(pasta, f"paralelo_{processos}.xlsx")
+            segundos = medir(f"gravar_xlsx, {processos} processo(s)" if processos else "gravar_xlsx, sequencial",
+                             lambda: gravar_xlsx(wb, destino, processos=processos))
+            print(f"{'':<40} {base / segundos:>6.1f}x mais rápido")
+
+        relida = openpyxl.load_workbook(destino, read_only=True)
+        original = openpyxl.load_workbook(referencia, read_only=True)
+        iguais = all(list(relida[nome].iter_rows(values_only=True)) == list(original[nome].iter_rows(values_only=True))
+                     for nome in original.sheetnames)
+        print("mesmos valores que o wb.save:", iguais)
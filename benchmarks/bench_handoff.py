@@ -0,0 +1,164 @@
+# ==========================================================
+# BENCHMARK: volta do lote lido pelo processo trabalhador
+# Gera um extrato PDF grande (centenas de páginas no layout de texto da
+# CEF) e um OFX grande, lê cada um uma vez e mede quanto custa trazer
+# o lote para o processo principal:
+#   - pickle dos objetos Transacao (como era)
+#   - pickle em colunas (LoteTransacoes, o que ler_arquivo devolve)
+#   - colunas passadas por SharedMemory (só o transporte muda)
+# e a ida e volta real por um ProcessPoolExecutor (leitura do PDF já
+# no cache_pdf, caso em que a volta pesa mais). Confere se os lançamentos
+# chegam iguais.
+#
+# Uso:
+#   python benchmarks/bench_handoff.py [paginas_pdf] [transacoes_ofx]
+# ==========================================================
+
+import os
+import pickle
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from multiprocessing import shared_memory
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from cache_pdf import VARIAVEL_CACHE  # noqa: E402
+from leitores import ler_arquivo  # noqa: E402
+from transacao import Transacao, desempacotar, empacotar  # noqa: E402
+
+LINHAS_POR_PAGINA = 60
+
+
+def valor_br(valor):
+    return f"{valor:,.2f}".replace(",", "#").replace(".", ",").replace("#", ".")
+
+
+def gerar_pdf(caminho, paginas):
+    """PDF mínimo escrito à mão: só texto, no layout que ler_pdf reconhece sem tabela"""
+    aleatorio = random.Random(1)
+    saldo = 1000.0
+    objetos = [b"<< /Type /Catalog /Pages 2 0 R >>",
+               f"<< /Type /Pages /Kids [{' '.join(f'{4 + 2 * p} 0 R' for p in range(paginas))}] "
+               f"/Count {paginas} >>".encode(),
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    for p in range(paginas):
+        linhas = ["Conta: 03088 / 1288 / 000752785312 - 4"] if p == 0 else []
+        for _ in range(LINHAS_POR_PAGINA):
+            valor = round(aleatorio.uniform(1, 900), 2)
+            credito = aleatorio.random() < 0.5
+            saldo += valor if credito else -valor
+            linhas.append(f"{aleatorio.randint(1, 28):02d}/09/2025 {aleatorio.randint(0, 999999):06d} "
+                          f"{'CRED PIX' if credito else 'ENVIO PIX'} {valor_br(valor)} {'C' if credito else 'D'} "
+                          f"{valor_br(abs(saldo))} {'C' if saldo >= 0 else 'D'}")
+        conteudo = "BT /F1 8 Tf 11 TL 30 810 Td " + " ".join(f"({linha}) Tj T*" for linha in linhas) + " ET"
+        objetos.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * p} 0 R >>".encode())
+        objetos.append(f"<< /Length {len(conteudo)} >>\nstream\n{conteudo}\nendstream".encode())
+    saida = bytearray(b"%PDF-1.4\n")
+    posicoes = []
+    for numero, objeto in enumerate(objetos, start=1):
+        posicoes.append(len(saida))
+        saida += f"{numero} 0 obj\n".encode() + objeto + b"\nendobj\n"
+    xref = len(saida)
+    saida += f"xref\n0 {len(objetos) + 1}\n0000000000 65535 f \n".encode()
+    saida += b"".join(f"{posicao:010d} 00000 n \n".encode() for posicao in posicoes)
+    saida += f"trailer\n<< /Size {len(objetos) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    with open(caminho, "wb") as f:
+        f.write(saida)
+
+
+def gerar_ofx(caminho, n):
+    inicio = date(2025, 1, 1)
+    transacoes = "".join(
+        f"<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>{inicio + timedelta(days=i % 365):%Y%m%d}<TRNAMT>-{i % 900 + 1}.{i % 100:02d}"
+        f"<FITID>G{i}<NAME>COMPRA {i % 50}<MEMO>loja {i % 7}</STMTTRN>\n" for i in range(n))
+    with open(caminho, "w", encoding="ascii") as f:
+        f.write("OFXHEADER:100\nDATA:OFXSGML\nVERSION:102\nSECURITY:NONE\nENCODING:USASCII\nCHARSET:1252\n"
+                "COMPRESSION:NONE\nOLDFILEUID:NONE\nNEWFILEUID:NONE\n\n<OFX>\n"
+                "<SIGNONMSGSRSV1><SONRS><STATUS><CODE>0<SEVERITY>INFO</STATUS>"
+                "<DTSERVER>20251231120000<LANGUAGE>POR</SONRS></SIGNONMSGSRSV1>\n"
+                "<BANKMSGSRSV1><STMTTRNRS><TRNUID>1<STATUS><CODE>0<SEVERITY>INFO</STATUS>\n"
+                "<STMTRS><CURDEF>BRL<BANKACCTFROM><BANKID>077<ACCTID>1<ACCTTYPE>CHECKING</BANKACCTFROM>\n"
+                f"<BANKTRANLIST><DTSTART>20250101<DTEND>20251231\n{transacoes}</BANKTRANLIST>"
+                "<LEDGERBAL><BALAMT>0.00<DTASOF>20251231</LEDGERBAL></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>\n")
+
+
+def campos(transacoes):
+    return [tuple(getattr(t, campo) for campo in Transacao.__slots__) for t in transacoes]
+
+
+def medir(nome, funcao, repeticoes=3):
+    melhor, resultado = None, None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        segundos = time.perf_counter() - inicio
+        melhor = segundos if melhor is None else min(melhor, segundos)
+    print(f"  {nome:<44} {melhor * 1000:>8.1f} ms")
+    return resultado
+
+
+def por_shared_memory(transacoes):
+    """Colunas gravadas em um bloco de SharedMemory e lidas de volta pelo nome"""
+    dados = pickle.dumps(empacotar(transacoes), protocol=pickle.HIGHEST_PROTOCOL)
+    bloco = shared_memory.SharedMemory(create=True, size=len(dados))
+    try:
+        bloco.buf[:len(dados)] = dados
+        outro = shared_memory.SharedMemory(name=bloco.name)
+        try:
+            return desempacotar(*pickle.loads(outro.buf[:len(dados)]))
+        finally:
+            outro.close()
+    finally:
+        bloco.unlink()
+        bloco.close()
+
+
+def ler_como_lista(caminho):
+    """Como ler_arquivo, mas devolvendo list comum (pickle objeto a objeto)"""
+    lote = ler_arquivo(caminho)
+    lote["transacoes"] = list(lote["transacoes"])
+    return lote
+
+
+if __name__ == "__main__":
+    paginas = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    n_ofx = int(sys.argv[2]) if len(sys.argv) > 2 else 50_000
+    with tempfile.TemporaryDirectory() as pasta:
+        os.environ[VARIAVEL_CACHE] = os.path.join(pasta, "cache")
+        pdf, ofx = os.path.join(pasta, "grande.pdf"), os.path.join(pasta, "grande.ofx")
+        gerar_pdf(pdf, paginas)
+        gerar_ofx(ofx, n_ofx)
+
+        for caminho in (pdf, ofx):
+            inicio = time.perf_counter()
+            transacoes = ler_arquivo(caminho)["transacoes"]
+            print(f"{os.path.basename(caminho)}: {len(transacoes)} lançamentos, "
+                  f"leitura {time.perf_counter() - inicio:.1f} s")
+            objetos = pickle.dumps(list(transacoes), protocol=pickle.HIGHEST_PROTOCOL)
+            colunas = pickle.dumps(transacoes, protocol=pickle.HIGHEST_PROTOCOL)
+            print(f"  tamanho: objetos {len(objetos) / 2**20:.2f} MB, colunas {len(colunas) / 2**20:.2f} MB")
+            esperado = campos(transacoes)
+            resultados = [
+                medir("pickle dos objetos (dumps + loads)",
+                      lambda: pickle.loads(pickle.dumps(list(transacoes), protocol=pickle.HIGHEST_PROTOCOL))),
+                medir("pickle em colunas (dumps + loads)",
+                      lambda: pickle.loads(pickle.dumps(transacoes, protocol=pickle.HIGHEST_PROTOCOL))),
+                medir("colunas por SharedMemory", lambda: por_shared_memory(transacoes)),
+            ]
+            medir("  só o loads, objetos (processo principal)", lambda: pickle.loads(objetos))
+            medir("  só o loads, colunas (processo principal)", lambda: pickle.loads(colunas))
+            print("  mesmos lançamentos:", all(campos(r) == esperado for r in resultados))
+
+        # Ida e volta de verdade: a volta é tudo o que o trabalhador faz além de ler o cache
+        print(f"ProcessPoolExecutor, {os.path.basename(pdf)} (extração já no cache_pdf):")
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            executor.submit(ler_arquivo, ofx).result()  # sobe o processo
+            lista = medir("objetos", lambda: executor.submit(ler_como_lista, pdf).result()["transacoes"])
+            lote = medir("colunas (LoteTransacoes)", lambda: executor.submit(ler_arquivo, pdf).result()["transacoes"])
+        print("  mesmos lançamentos:", campos(lista) == campos(lote))
@@ -0,0 +1,122 @@
+# ==========================================================
+# BENCHMARK: motores de leitura do extrato (leitura_xlsx.py)
+# Gera um extrato sintético e, para cada motor instalado (openpyxl e,
+# se houver, python-calamine), mede em um processo separado:
+#   - leitura: abrir_leitura + percorrer todas as linhas
+#   - edição: carregar_editavel (o que carregar_planilha usa)
+# com o tempo e o pico de memória do processo (ru_maxrss, que inclui
+# o que o calamine aloca fora do Python). Confere também se os motores
+# devolvem as mesmas linhas, inclusive numa aba cujos dados não começam
+# em A1 (linhas e colunas vazias antes da área usada).
+#
+# Uso:
+#   python benchmarks/bench_leitura_xlsx.py [n_linhas]
+# ==========================================================
+
+import hashlib
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import openpyxl  # noqa: E402
+
+from leitura_xlsx import MOTORES, abrir_leitura, carregar_editavel  # noqa: E402
+
+HISTORICOS = ["ENVIO PIX", "CRED PIX", "COMPRA", "DEVREC PIX", "PAG BOLETO"]
+
+
+def gerar_extrato(caminho, n):
+    aleatorio = random.Random(42)
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("Extrato OFX")
+    ws.append(["Data", "Tipo (Entrada/Saída)", "Descrição", "Valor (R$)", "Saldo acumulado (R$)", "Banco ID",
+               "Processado em", "Execução", "TRNTYPE", "Nr. Documento", "MEMO", "FITID", "Conta",
+               "Impressão Digital", "Categoria"])
+    saldo = 0.0
+    for i in range(n):
+        valor = round(aleatorio.uniform(-900, 900), 2)
+        saldo = round(saldo + valor, 2)
+        historico = HISTORICOS[i % len(HISTORICOS)]
+        ws.append([f"{aleatorio.randint(1, 28):02d}/{aleatorio.randint(1, 12):02d}/2025",
+                   "Entrada" if valor > 0 else "Saída", historico, valor, saldo, "CEF",
+                   "19/10/2026 10:00:00", i // 5000 + 1, "CREDIT" if valor > 0 else "DEBIT", f"{i % 999999:06d}",
+                   historico, f"PDF-{i:020x}", "03088/1288/000752785312-4", f"{i:020x}", "Transferências"])
+    log = wb.create_sheet("LOG_PROCESSAMENTO")
+    for i in range(n // 5000 + 1):
+        log.append(["19/10/2026 10:00:00", f"extrato_{i}.pdf", "CEF", "0308", i + 1, 5000, 0, "", "", saldo, "", "OK"])
+    wb.save(caminho)
+
+
+def conferir_deslocamento(pasta, motores):
+    """Aba com dados a partir de C3: todo motor devolve as linhas/colunas vazias como o openpyxl"""
+    caminho = os.path.join(pasta, "deslocada.xlsx")
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws["C3"], ws["E4"], ws["D6"] = 1, "x", 2.5
+    wb.save(caminho)
+    esperado = None
+    for motor in motores:
+        planilha = abrir_leitura(caminho, motor)
+        aba = planilha.worksheets[0]
+        linhas = (list(aba.iter_rows(values_only=True)), list(aba.iter_rows(min_row=2, max_col=3, values_only=True)),
+                  list(aba.iter_rows(min_row=5, values_only=True)))
+        planilha.close()
+        if esperado is None:
+            esperado = linhas
+        elif linhas != esperado:
+            return False
+    return True
+
+
+def medir(motor, modo, caminho):
+    """Roda no processo filho: devolve segundos, pico de memória (MB) e o hash das linhas"""
+    inicio = time.perf_counter()
+    resumo = hashlib.sha1()
+    if modo == "leitura":
+        planilha = abrir_leitura(caminho, motor)
+        for nome in planilha.sheetnames:
+            for row in planilha[nome].iter_rows(values_only=True):
+                resumo.update(repr(row).encode())
+        planilha.close()
+    else:
+        wb = carregar_editavel(caminho, motor)
+        for ws in wb.worksheets:
+            for row in ws.iter_rows(values_only=True):
+                resumo.update(repr(row).encode())
+    segundos = time.perf_counter() - inicio
+    return {"segundos": segundos, "pico_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            "hash": resumo.hexdigest()}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--medir":
+        print(json.dumps(medir(*sys.argv[2:5])))
+        sys.exit(0)
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    motores = [nome for nome, motor in MOTORES.items() if motor.disponivel()]
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, "extrato_ofx.xlsx")
+        inicio = time.perf_counter()
+        gerar_extrato(caminho, n)
+        print(f"extrato com {n} linhas ({os.path.getsize(caminho) / 2**20:.1f} MB) gerado em "
+              f"{time.perf_counter() - inicio:.1f} s; motores: {', '.join(motores)}")
+
+        hashes = {}
+        for modo in ("leitura", "edição"):
+            for motor in motores:
+                saida = subprocess.run([sys.executable, os.path.abspath(__file__), "--medir", motor, modo, caminho],
+                                       capture_output=True, text=True, check=True).stdout
+                resultado = json.loads(saida)
+                hashes.setdefault(modo, set()).add(resultado["hash"])
+                print(f"{modo:<8} {motor:<9} {resultado['segundos']:>7.2f} s  pico {resultado['pico_mb']:>7.0f} MB")
+        print("mesmas linhas em todos os motores:", all(len(h) == 1 for h in hashes.values()))
+        if len(motores) > 1:
+            print("aba com dados fora de A1, mesmas linhas:", conferir_deslocamento(pasta, motores))
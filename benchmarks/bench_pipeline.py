@@ -0,0 +1,90 @@
+# ==========================================================
+# BENCHMARK: importação sequencial x pipeline (leitura || gravação)
+# Gera um lote misto de OFX sintéticos + cópias de bases/cef.pdf
+# e mede importar_arquivos() com e sem leitura paralela.
+#
+# Uso:
+#   python benchmarks/bench_pipeline.py [n_ofx] [n_pdf] [transacoes_por_ofx]
+# ==========================================================
+
+import os
+import sys
+import shutil
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import main  # noqa: E402
+
+CABECALHO_OFX = """OFXHEADER:100
+DATA:OFXSGML
+VERSION:102
+SECURITY:NONE
+ENCODING:USASCII
+CHARSET:1252
+COMPRESSION:NONE
+OLDFILEUID:NONE
+NEWFILEUID:NONE
+
+<OFX>
+<SIGNONMSGSRSV1><SONRS><STATUS><CODE>0<SEVERITY>INFO</STATUS><DTSERVER>20250930120000<LANGUAGE>POR</SONRS></SIGNONMSGSRSV1>
+<BANKMSGSRSV1><STMTTRNRS><TRNUID>1<STATUS><CODE>0<SEVERITY>INFO</STATUS>
+<STMTRS><CURDEF>BRL<BANKACCTFROM><BANKID>077<ACCTID>{conta}<ACCTTYPE>CHECKING</BANKACCTFROM>
+<BANKTRANLIST><DTSTART>20250901<DTEND>20250930
+"""
+
+RODAPE_OFX = """</BANKTRANLIST><LEDGERBAL><BALAMT>0.00<DTASOF>20250930</LEDGERBAL></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+
+def gerar_ofx(caminho, conta, n):
+    with open(caminho, "w", encoding="ascii") as f:
+        f.write(CABECALHO_OFX.format(conta=conta))
+        for i in range(n):
+            valor = (i % 97) * 1.5 - 60
+            f.write(f"<STMTTRN><TRNTYPE>{'CREDIT' if valor > 0 else 'DEBIT'}"
+                    f"<DTPOSTED>202509{(i % 28) + 1:02d}<TRNAMT>{valor:.2f}"
+                    f"<FITID>{conta}-{i}<NAME>LANCAMENTO {i % 50}<MEMO>memo {i}</STMTTRN>\n")
+        f.write(RODAPE_OFX)
+
+
+def preparar(pasta, n_ofx, n_pdf, por_ofx):
+    arquivos = []
+    pdf_origem = os.path.join(RAIZ, "bases", "cef.pdf")
+    for i in range(max(n_ofx, n_pdf)):
+        if i < n_ofx:
+            caminho = os.path.join(pasta, f"inter_{i:03d}.ofx")
+            gerar_ofx(caminho, f"C{i:03d}", por_ofx)
+            arquivos.append(caminho)
+        if i < n_pdf:
+            caminho = os.path.join(pasta, f"cef_{i:03d}.pdf")
+            shutil.copy(pdf_origem, caminho)
+            arquivos.append(caminho)
+    return arquivos
+
+
+def medir(arquivos, pasta, trabalhadores, profundidade):
+    saida = os.path.join(pasta, f"extrato_{trabalhadores}_{profundidade}.xlsx")
+    inicio = time.perf_counter()
+    resumo = main.importar_arquivos(arquivos, saida, trabalhadores=trabalhadores, profundidade=profundidade)
+    return time.perf_counter() - inicio, resumo["adicionados"]
+
+
+if __name__ == "__main__":
+    n_ofx = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    n_pdf = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    por_ofx = int(sys.argv[3]) if len(sys.argv) > 3 else 2000
+
+    with tempfile.TemporaryDirectory() as pasta:
+        arquivos = preparar(pasta, n_ofx, n_pdf, por_ofx)
+        print(f"Lote: {n_ofx} OFX x {por_ofx} transações + {n_pdf} PDF CEF")
+        print(f"{'modo':<28}{'tempo (s)':>10}{'linhas':>10}{'ganho':>8}")
+
+        base, linhas = medir(arquivos, pasta, 0, 1)
+        print(f"{'sequencial':<28}{base:>10.2f}{linhas:>10}{'1.00x':>8}")
+        for trabalhadores, profundidade in [(1, 2), (2, 4), (main.TRABALHADORES_LEITURA, main.PROFUNDIDADE_FILA)]:
+            tempo, linhas = medir(arquivos, pasta, trabalhadores, profundidade)
+            modo = f"pipeline t={trabalhadores} fila={profundidade}"
+            print(f"{modo:<28}{tempo:>10.2f}{linhas:>10}{base / tempo:>7.2f}x")
@@ -0,0 +1,72 @@
+# ==========================================================
+# BENCHMARK: abas de resumo (resumos.py) sobre o extrato inteiro
+# Mede separadamente:
+#   - a agregação vetorizada (linhas já em memória, como no arquivamento
+#     e na compactação), em n lançamentos
+#   - a leitura das colunas de uma aba openpyxl em memória (o caminho da
+#     importação), numa amostra menor — 1M de células openpyxl não cabe
+#     com folga na memória desta máquina de teste
+#   - a gravação das abas
+#
+# Uso:
+#   python benchmarks/bench_resumos.py [n_lancamentos] [n_linhas_planilha]
+# ==========================================================
+
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import openpyxl  # noqa: E402
+
+from resumos import agregar, colunas_linhas, colunas_planilha, gravar_resumos  # noqa: E402
+
+CONTAS = [("CEF", f"0308/{i:06d}") for i in range(20)] + [("077", f"{i:08d}") for i in range(20)]
+HISTORICOS = ["ENVIO PIX", "CRED PIX", "COMPRA", "DEVREC PIX", "PAG BOLETO"]
+INICIO = date(2020, 1, 1)
+
+
+def linhas_sinteticas(n):
+    aleatorio = random.Random(42)
+    datas = [(INICIO + timedelta(days=d)).strftime("%d/%m/%Y") for d in range(6 * 365)]
+    nomes = [f"FAVORECIDO {i}" for i in range(5000)]
+    linhas = []
+    for i in range(n):
+        banco, conta = CONTAS[i % len(CONTAS)]
+        valor = round(aleatorio.uniform(-900, 900), 2)
+        descricao = f"{HISTORICOS[i % len(HISTORICOS)]} {nomes[aleatorio.randrange(len(nomes))]}"
+        linhas.append((datas[aleatorio.randrange(len(datas))], "Entrada" if valor > 0 else "Saída", descricao,
+                       valor, None, banco, "", i // 5000 + 1, "", "", "", f"F{i}", conta))
+    return linhas
+
+
+def medir(nome, funcao):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    print(f"{nome:<50} {(time.perf_counter() - inicio) * 1000:>9.1f} ms")
+    return resultado
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    n_planilha = int(sys.argv[2]) if len(sys.argv) > 2 else 200_000
+
+    linhas = medir(f"gerar {n} linhas sintéticas", lambda: linhas_sinteticas(n))
+    colunas = medir("separar colunas (linhas em memória)", lambda: colunas_linhas(linhas))
+    mensal, contrapartes = medir(f"agregar {n} linhas", lambda: agregar(colunas))
+    print(f"   {len(mensal)} linhas conta × mês, {len(contrapartes)} descrições distintas")
+    medir("agregar + gravar abas", lambda: gravar_resumos(openpyxl.Workbook(), colunas))
+
+    del colunas
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(["cabeçalho"])
+    for linha in linhas[:n_planilha]:
+        ws.append(linha)
+    del linhas
+    colunas = medir(f"colunas da aba openpyxl em memória ({n_planilha} linhas)", lambda: colunas_planilha(ws))
+    medir(f"ws.iter_rows, para comparar ({n_planilha} linhas)",
+          lambda: list(ws.iter_rows(min_row=2, max_col=13, values_only=True)))
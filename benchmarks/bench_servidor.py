@@ -0,0 +1,109 @@
+# ==========================================================
+# BENCHMARK: importação do dia a frio x servidor residente
+# Gera um extrato com n linhas (do mês corrente, para não arquivar) e
+# alguns OFX pequenos "do dia", e mede o tempo de parede, visto do
+# terminal, de importar cada um:
+#   - a frio: python novo rodando main.importar_arquivos (importa as
+#     bibliotecas e abre a planilha a cada vez)
+#   - quente: python cliente_importacao.py importar, com o servidor
+#     (servidor_importacao.py) já no ar
+# A partida do servidor (paga uma vez) é mostrada à parte.
+#
+# Uso:
+#   python benchmarks/bench_servidor.py [n_linhas] [repeticoes]
+# ==========================================================
+
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import openpyxl  # noqa: E402
+
+from cliente_importacao import PORTA_PADRAO, iniciar_servidor  # noqa: E402
+
+HISTORICOS = ["ENVIO PIX", "CRED PIX", "COMPRA", "DEVREC PIX", "PAG BOLETO"]
+PORTA = PORTA_PADRAO + 10  # não atrapalha um servidor de verdade no ar
+
+
+def gerar_extrato(caminho, n):
+    aleatorio = random.Random(42)
+    hoje = datetime.now()
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("Extrato OFX")
+    ws.append(["Data", "Tipo (Entrada/Saída)", "Descrição", "Valor (R$)", "Saldo acumulado (R$)", "Banco ID",
+               "Processado em", "Execução", "TRNTYPE", "Nr. Documento", "MEMO", "FITID", "Conta",
+               "Impressão Digital", "Categoria"])
+    saldo = 0.0
+    for i in range(n):
+        valor = round(aleatorio.uniform(-900, 900), 2)
+        saldo = round(saldo + valor, 2)
+        historico = HISTORICOS[i % len(HISTORICOS)]
+        ws.append([f"{aleatorio.randint(1, hoje.day):02d}/{hoje:%m/%Y}", "Entrada" if valor > 0 else "Saída",
+                   historico, valor, saldo, "999", f"{hoje:%d/%m/%Y} 10:00:00", 1,
+                   "CREDIT" if valor > 0 else "DEBIT", f"{i % 999999:06d}", historico, f"B{i}", "999:1",
+                   f"{i:020x}", ""])
+    wb.save(caminho)
+
+
+def gerar_ofx(caminho, rotulo, n=5):
+    hoje = datetime.now()
+    transacoes = "".join(
+        f"<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>{hoje:%Y%m%d}<TRNAMT>-{i + 1}.00<FITID>{rotulo}-{i}"
+        f"<NAME>COMPRA<MEMO>{rotulo}</STMTTRN>\n" for i in range(n))
+    with open(caminho, "w", encoding="ascii") as f:
+        f.write("OFXHEADER:100\nDATA:OFXSGML\nVERSION:102\nSECURITY:NONE\nENCODING:USASCII\nCHARSET:1252\n"
+                "COMPRESSION:NONE\nOLDFILEUID:NONE\nNEWFILEUID:NONE\n\n<OFX>\n"
+                "<SIGNONMSGSRSV1><SONRS><STATUS><CODE>0<SEVERITY>INFO</STATUS>"
+                f"<DTSERVER>{hoje:%Y%m%d}120000<LANGUAGE>POR</SONRS></SIGNONMSGSRSV1>\n"
+                "<BANKMSGSRSV1><STMTTRNRS><TRNUID>1<STATUS><CODE>0<SEVERITY>INFO</STATUS>\n"
+                "<STMTRS><CURDEF>BRL<BANKACCTFROM><BANKID>999<ACCTID>1<ACCTTYPE>CHECKING</BANKACCTFROM>\n"
+                f"<BANKTRANLIST><DTSTART>{hoje:%Y%m%d}<DTEND>{hoje:%Y%m%d}\n{transacoes}"
+                "</BANKTRANLIST>"
+                f"<LEDGERBAL><BALAMT>0.00<DTASOF>{hoje:%Y%m%d}</LEDGERBAL></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>\n")
+
+
+def medir(nome, comando, pasta):
+    inicio = time.perf_counter()
+    subprocess.run(comando, cwd=pasta, check=True, capture_output=True)
+    segundos = time.perf_counter() - inicio
+    print(f"{nome:<40} {segundos:>7.2f} s")
+    return segundos
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    repeticoes = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    with tempfile.TemporaryDirectory() as pasta:
+        saida = os.path.join(pasta, "extrato_ofx.xlsx")
+        gerar_extrato(saida, n)
+        print(f"extrato com {n} linhas; OFX do dia com 5 lançamentos")
+
+        frio = []
+        for i in range(repeticoes):
+            ofx = os.path.join(pasta, f"frio_{i}.ofx")
+            gerar_ofx(ofx, f"FRIO{i}")
+            codigo = f"import sys; sys.path.insert(0, {RAIZ!r}); import main; main.importar_arquivos([{ofx!r}], {saida!r})"
+            frio.append(medir(f"a frio #{i + 1}", [sys.executable, "-c", codigo], pasta))
+
+        inicio = time.perf_counter()
+        iniciar_servidor(saida, PORTA)
+        print(f"{'partida do servidor (uma vez)':<40} {time.perf_counter() - inicio:>7.2f} s")
+        quente = []
+        try:
+            for i in range(repeticoes):
+                ofx = os.path.join(pasta, f"quente_{i}.ofx")
+                gerar_ofx(ofx, f"QUENTE{i}")
+                quente.append(medir(f"servidor quente #{i + 1}",
+                                    [sys.executable, os.path.join(RAIZ, "cliente_importacao.py"), "importar", ofx,
+                                     "--saida", saida, "--porta", str(PORTA)], pasta))
+        finally:
+            subprocess.run([sys.executable, os.path.join(RAIZ, "cliente_importacao.py"), "parar",
+                            "--saida", saida, "--porta", str(PORTA)], capture_output=True)
+        print(f"{'':<40} {min(frio) / min(quente):>6.1f}x mais rápido (melhor de cada)")
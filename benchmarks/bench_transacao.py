@@ -0,0 +1,73 @@
+# ==========================================================
+# BENCHMARK: memória e custo de construção por lançamento
+# Compara as representações antigas (lista de 5 campos do parse_pdf,
+# lista de 12 colunas da planilha, dict) com transacao.Transacao.
+#
+# Os campos vêm de pools compartilhados, então a medida é o custo do
+# "recipiente" de cada lançamento (o que muda entre as representações).
+#
+# Uso:
+#   python benchmarks/bench_transacao.py [n_lancamentos]
+# ==========================================================
+
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transacao import Transacao  # noqa: E402
+
+DATAS = [date(2025, 1, 1 + i % 28) for i in range(28)]
+DATAS_STR = [d.strftime("%d/%m/%Y") for d in DATAS]
+VALORES = [round((i % 977) * 1.37 - 500, 2) for i in range(977)]
+HISTORICOS = ["ENVIO PIX", "CRED PIX", "COMPRA", "SALDO DIA", "DEVREC PIX", "PAG BOLETO"]
+DOCS = [f"{i:06d}" for i in range(1000)]
+
+
+def lista_pdf(i):
+    return [DATAS_STR[i % 28], DOCS[i % 1000], HISTORICOS[i % 6], VALORES[i % 977], VALORES[(i + 1) % 977]]
+
+
+def lista_planilha(i):
+    valor = VALORES[i % 977]
+    return [DATAS_STR[i % 28], "Entrada" if valor > 0 else "Saída", HISTORICOS[i % 6], valor,
+            VALORES[(i + 1) % 977], "CEF", "01/01/2025 10:00:00", 1,
+            "CREDIT" if valor > 0 else "DEBIT", DOCS[i % 1000], HISTORICOS[i % 6], None]
+
+
+def como_dict(i):
+    valor = VALORES[i % 977]
+    return {"data": DATAS[i % 28], "valor": valor, "descricao": HISTORICOS[i % 6],
+            "trntype": "CREDIT" if valor > 0 else "DEBIT", "nr_doc": DOCS[i % 1000],
+            "memo": HISTORICOS[i % 6], "fitid": None, "saldo_extrato": VALORES[(i + 1) % 977]}
+
+
+def como_transacao(i):
+    return Transacao(DATAS[i % 28], VALORES[i % 977], HISTORICOS[i % 6], None, DOCS[i % 1000],
+                     HISTORICOS[i % 6], None, VALORES[(i + 1) % 977])
+
+
+def medir(fabrica, n):
+    gc.collect()
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    registros = [fabrica(i) for i in range(n)]
+    tempo = time.perf_counter() - inicio
+    memoria, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del registros
+    return memoria, tempo
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(f"{n:,} lançamentos")
+    print(f"{'representação':<24}{'MB total':>10}{'bytes/reg':>11}{'ns/reg':>9}")
+    for nome, fabrica in [("lista parse_pdf (5)", lista_pdf), ("lista planilha (12)", lista_planilha),
+                          ("dict", como_dict), ("Transacao (__slots__)", como_transacao)]:
+        memoria, tempo = medir(fabrica, n)
+        print(f"{nome:<24}{memoria / 2**20:>10.1f}{memoria / n:>11.0f}{tempo / n * 1e9:>9.0f}")
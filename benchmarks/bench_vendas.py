@@ -0,0 +1,94 @@
+# ==========================================================
+# BENCHMARK: agregações do relatório de vendas (vendas.py)
+# Gera vendas sintéticas no formato dos CSVs de bases/ e compara
+# vendas.agregar (category + np.bincount) com um groupby por dimensão
+# e com um groupby único sobre todas as dimensões juntas.
+# Também grava um CSV sintético e compara a leitura com os dtypes
+# padrão e com o esquema (vendas.ler_vendas): tempo e memória.
+#
+# Uso:
+#   python benchmarks/bench_vendas.py [n_vendas] [n_vendas_csv]
+# ==========================================================
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vendas import COLUNA_VALOR, DIMENSOES, agregar, ler_vendas, relatorio_memoria  # noqa: E402
+
+
+def vendas_sinteticas(n):
+    aleatorio = np.random.default_rng(42)
+    produtos = np.array([f"Produto {i}" for i in range(300)], dtype=object)
+    pagamentos = np.array(["Cartão de Crédito", "Boleto", "Pix", "Cartão de Débito"], dtype=object)
+    status = np.array(["Aprovado", "Cancelado", "Reembolsado"], dtype=object)
+    paises = np.array(["Brasil", "Portugal", "Angola", "Áustria", "Moçambique", "Chile"], dtype=object)
+    return pd.DataFrame({
+        "Nome do Produto": produtos[aleatorio.integers(0, len(produtos), n)],
+        "Sistema": "Sistema Hash",
+        "Documento": 2233333308,
+        "Transação": aleatorio.integers(1_000_000, 9_999_999, n),
+        "Meio de Pagamento": "Online",
+        "Moeda": np.array(["BRL", "EUR", "USD"], dtype=object)[aleatorio.integers(0, 3, n)],
+        "Número da Parcela": aleatorio.integers(1, 13, n),
+        "Cliente": np.array([f"Cliente {i}" for i in range(5000)], dtype=object)[aleatorio.integers(0, 5000, n)],
+        "Tipo de Pagamento": pagamentos[aleatorio.integers(0, len(pagamentos), n)],
+        "Status": status[aleatorio.integers(0, len(status), n)],
+        "País": paises[aleatorio.integers(0, len(paises), n)],
+        "Data de Venda": pd.Timestamp("2022-01-01") + pd.to_timedelta(aleatorio.integers(0, 1000, n), unit="D"),
+        COLUNA_VALOR: aleatorio.integers(10, 1000, n),
+    })
+
+
+def medir(nome, funcao):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    print(f"{nome:<50} {time.perf_counter() - inicio:>7.2f} s")
+    return resultado
+
+
+def comparar_leitura(n):
+    tabela = vendas_sinteticas(n)
+    tabela["Data de Venda"] = (tabela["Data de Venda"] - pd.Timestamp("1899-12-30")).dt.days  # como no CSV
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, "vendas.csv")
+        tabela.to_csv(caminho, index=False)
+        del tabela
+        padrao = medir(f"read_csv padrão ({n} vendas)", lambda: pd.read_csv(caminho))
+        mb_padrao = padrao.memory_usage(deep=True).sum() / 2**20
+        del padrao
+        com_esquema = medir(f"ler_vendas com esquema ({n} vendas)", lambda: ler_vendas(caminho))
+    relatorio = relatorio_memoria(com_esquema)
+    print(relatorio.to_string(index=False))
+    mb_esquema = com_esquema.memory_usage(deep=True).sum() / 2**20
+    print(f"memória: {mb_padrao:.0f} MB padrão (medida), {relatorio['Padrão (MB)'].sum():.0f} MB padrão "
+          f"(estimada), {mb_esquema:.0f} MB com esquema ({mb_esquema / mb_padrao:.0%})\n")
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    n_csv = int(sys.argv[2]) if len(sys.argv) > 2 else 2_000_000
+    comparar_leitura(n_csv)
+
+    tabela = medir(f"gerar {n} vendas", lambda: vendas_sinteticas(n))
+    tabela = tabela[list(DIMENSOES.values()) + [COLUNA_VALOR]]
+    colunas = list(DIMENSOES.values())
+
+    medir("groupby por dimensão (colunas de texto)",
+          lambda: [tabela.groupby(c)[COLUNA_VALOR].agg(["size", "sum"]) for c in colunas])
+    copia = tabela.copy()
+    resultado = medir("vendas.agregar (inclui conversão para category)", lambda: agregar(copia))
+    medir("vendas.agregar (colunas já em category)", lambda: agregar(copia))
+    medir("groupby único sobre todas as dimensões",
+          lambda: copia.groupby(colunas, observed=True, sort=False)[COLUNA_VALOR].agg(["size", "sum"]))
+
+    memoria = tabela[colunas].memory_usage(deep=True).sum() / 2**20
+    memoria_categorias = copia[colunas].memory_usage(deep=True).sum() / 2**20
+    print(f"memória das dimensões: {memoria:.0f} MB em texto, {memoria_categorias:.0f} MB em category")
+    print({aba: len(parcial) for aba, parcial in resultado.items()})
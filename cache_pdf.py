@@ -0,0 +1,269 @@
+# ==========================================================
+# Cache em disco da extração do pdfplumber
+# O caro de ler um extrato em PDF é o pdfplumber montar os caracteres
+# da página e, a partir deles, o texto e a tabela; as regras que vêm
+# depois (regex da CEF em ler_pdf, montagem das Transacao) custam quase
+# nada. Ao ajustar essas regras, ou ao rodar de novo o cefPdfToXlsx.py
+# sobre os mesmos PDFs, a extração era refeita a cada vez.
+#
+# abrir_pdf() devolve um objeto com a interface que o código usa do
+# pdfplumber (pdf.pages, pagina.extract_text/extract_table/
+# extract_tables/extract_words); o resultado de cada extração fica
+# guardado por:
+#   - hash (SHA-256) do conteúdo do PDF — renomear/mover não invalida,
+#     alterar o arquivo sim
+#   - número da página
+#   - método e parâmetros da extração (e a versão do pdfplumber)
+# O PDF só é aberto de fato quando falta alguma extração no cache.
+# Arquivo em disco é mapeado em memória (mmap) uma vez: o hash e o
+# pdfplumber leem do mesmo mapeamento, sem ler o arquivo duas vezes.
+#
+# ATENÇÃO: o cache guarda em texto puro (JSON) o conteúdo dos extratos
+# — descrições, valores, nomes de quem pagou/recebeu. Fica em:
+#   ~/.cache/extrato_pdf (Windows: %LOCALAPPDATA%\extrato_pdf),
+# pasta criada só para o usuário (0700 no Linux/macOS). Variável
+# EXTRATO_CACHE_PDF: outra pasta, ou "0" para desligar.
+# Entrada sem uso há mais de DIAS_CACHE dias sai na próxima gravação, e
+# o cache passando de LIMITE_CACHE_MB perde as menos usadas primeiro.
+#
+# Uso:
+#   python cache_pdf.py          (pasta e tamanho do cache)
+#   python cache_pdf.py limpar   (apaga tudo)
+# ==========================================================
+
+import hashlib
+import json
+import logging
+import mmap
+import os
+import sys
+import tempfile
+import time
+
+import pdfplumber
+
+VARIAVEL_CACHE = "EXTRATO_CACHE_PDF"
+VERSAO_CACHE = 1  # mudar quando o formato do arquivo de cache mudar
+METODOS = ("extract_text", "extract_table", "extract_tables", "extract_words")
+DIAS_CACHE = 30  # entrada sem uso há mais que isso é apagada
+LIMITE_CACHE_MB = 200  # acima disso, saem as entradas usadas há mais tempo
+
+
+def pasta_cache():
+    """Pasta do cache, ou None se desligado"""
+    pasta = os.environ.get(VARIAVEL_CACHE)
+    if pasta == "0":
+        return None
+    if pasta:
+        return pasta
+    base = os.environ.get("LOCALAPPDATA") if os.name == "nt" else os.environ.get("XDG_CACHE_HOME")
+    return os.path.join(base or os.path.join(os.path.expanduser("~"), ".cache"), "extrato_pdf")
+
+
+def hash_conteudo(origem):
+    """SHA-256 de um caminho, de um arquivo em memória (BytesIO) ou de um mmap"""
+    resumo = hashlib.sha256()
+    if isinstance(origem, mmap.mmap):
+        resumo.update(origem)
+        return resumo.hexdigest()
+    if hasattr(origem, "getbuffer"):
+        resumo.update(origem.getbuffer())
+        return resumo.hexdigest()
+    with open(origem, "rb") as f:
+        for bloco in iter(lambda: f.read(1 << 20), b""):
+            resumo.update(bloco)
+    return resumo.hexdigest()
+
+
+def _chave(metodo, opcoes):
+    """Chave da extração dentro da página: método + parâmetros"""
+    return metodo + json.dumps(opcoes, sort_keys=True, default=str) if opcoes else metodo
+
+
+class PaginaCache:
+    """Página com as extrações do pdfplumber, servidas do cache quando possível"""
+
+    def __init__(self, pdf, numero):
+        self.pdf = pdf
+        self.page_number = numero + 1
+        self.numero = numero
+
+    def _extrair(self, metodo, opcoes):
+        return self.pdf.extrair(self.numero, metodo, opcoes)
+
+    def extract_text(self, **opcoes):
+        return self._extrair("extract_text", opcoes)
+
+    def extract_table(self, table_settings=None):
+        return self._extrair("extract_table", {"table_settings": table_settings} if table_settings else {})
+
+    def extract_tables(self, table_settings=None):
+        return self._extrair("extract_tables", {"table_settings": table_settings} if table_settings else {})
+
+    def extract_words(self, **opcoes):
+        return self._extrair("extract_words", opcoes)
+
+
+class PdfCache:
+    """
+    PDF cujas extrações ficam em um JSON por arquivo (hash + versão do
+    pdfplumber), com uma entrada por página e por extração. Gravado ao
+    fechar, só se algo novo foi extraído.
+    """
+
+    def __init__(self, origem, pasta):
+        self._mapa = None
+        self._pdf = None
+        self.alterado = False
+        if isinstance(origem, (str, os.PathLike)):
+            with open(origem, "rb") as f:
+                if os.fstat(f.fileno()).st_size:  # mmap não aceita arquivo vazio
+                    self._mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            if self._mapa is not None:
+                origem = self._mapa  # o mapeamento continua válido com o arquivo fechado
+        self.origem = origem
+        try:
+            self._abrir(pasta)
+        except Exception:
+            self.close()
+            raise
+
+    def _abrir(self, pasta):
+        self.arquivo = os.path.join(pasta, f"{hash_conteudo(self.origem)}_{pdfplumber.__version__}.json")
+        self.paginas_extraidas = []
+        try:
+            with open(self.arquivo, encoding="utf-8") as f:
+                conteudo = json.load(f)
+            if conteudo.get("versao") == VERSAO_CACHE:
+                self.paginas_extraidas = conteudo["paginas"]
+                os.utime(self.arquivo)  # a data de modificação marca o último uso (ver podar_cache)
+        except (OSError, ValueError, KeyError):
+            pass  # sem cache (ou cache corrompido): extrai de novo
+        if not self.paginas_extraidas:
+            self.paginas_extraidas = [{} for _ in self.plumber().pages]
+            self.alterado = True
+        self.pages = [PaginaCache(self, numero) for numero in range(len(self.paginas_extraidas))]
+
+    def plumber(self):
+        """O PDF aberto pelo pdfplumber, só quando falta alguma extração"""
+        if self._pdf is None:
+            if hasattr(self.origem, "seek"):
+                self.origem.seek(0)
+            self._pdf = pdfplumber.open(self.origem)
+        return self._pdf
+
+    def extrair(self, numero, metodo, opcoes):
+        extraidas = self.paginas_extraidas[numero]
+        chave = _chave(metodo, opcoes)
+        if chave not in extraidas:
+            extraidas[chave] = getattr(self.plumber().pages[numero], metodo)(**opcoes)
+            self.alterado = True
+        return extraidas[chave]
+
+    def gravar(self):
+        pasta = os.path.dirname(self.arquivo)
+        temporario = None
+        try:
+            os.makedirs(pasta, mode=0o700, exist_ok=True)  # conteúdo dos extratos: só o usuário lê
+            descritor, temporario = tempfile.mkstemp(dir=pasta, suffix=".tmp")
+            with os.fdopen(descritor, "w", encoding="utf-8") as f:
+                json.dump({"versao": VERSAO_CACHE, "paginas": self.paginas_extraidas}, f, ensure_ascii=False)
+            os.replace(temporario, self.arquivo)  # leitores em paralelo nunca veem o JSON pela metade
+        except (OSError, TypeError) as e:
+            logging.warning(f"Cache de PDF não gravado ({self.arquivo}): {e}")
+            if temporario and os.path.exists(temporario):
+                os.remove(temporario)
+            return
+        podar_cache(pasta)
+
+    def close(self):
+        if self.alterado:
+            self.gravar()
+            self.alterado = False
+        if self._pdf is not None:
+            self._pdf.close()
+            self._pdf = None
+        if self._mapa is not None:
+            self._mapa.close()
+            self._mapa = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *erro):
+        self.close()
+
+
+def abrir_pdf(origem):
+    """
+    Como pdfplumber.open, para as extrações de METODOS, mas com cache em
+    disco; com o cache desligado é o próprio pdfplumber.open.
+    """
+    pasta = pasta_cache()
+    if pasta is None:
+        return pdfplumber.open(origem)
+    return PdfCache(origem, pasta)
+
+
+def _entradas(pasta):
+    """[(mtime, tamanho, caminho)] dos arquivos do cache, do uso mais antigo para o mais recente"""
+    entradas = []
+    for entrada in os.scandir(pasta):
+        if entrada.name.endswith((".json", ".tmp")):
+            try:
+                info = entrada.stat()
+            except FileNotFoundError:  # outro processo podou antes
+                continue
+            entradas.append((info.st_mtime, info.st_size, entrada.path))
+    return sorted(entradas)
+
+
+def podar_cache(pasta=None, dias=DIAS_CACHE, limite_mb=LIMITE_CACHE_MB):
+    """Apaga as entradas sem uso há mais de `dias` dias e, passando de `limite_mb`, as menos usadas; devolve quantas"""
+    pasta = pasta or pasta_cache()
+    if not pasta or not os.path.isdir(pasta):
+        return 0
+    entradas = _entradas(pasta)
+    vencimento = time.time() - dias * 86400
+    total = sum(tamanho for _, tamanho, _ in entradas)
+    removidas = 0
+    for mtime, tamanho, caminho in entradas:
+        if mtime >= vencimento and total <= limite_mb * 2**20:
+            break
+        if mtime >= vencimento and caminho.endswith(".tmp"):
+            continue  # gravação de outro processo em andamento
+        try:
+            os.remove(caminho)
+            removidas += 1
+        except FileNotFoundError:
+            pass
+        total -= tamanho
+    return removidas
+
+
+def limpar_cache():
+    """Apaga os arquivos do cache; devolve quantos"""
+    pasta = pasta_cache()
+    if not pasta or not os.path.isdir(pasta):
+        return 0
+    arquivos = [os.path.join(pasta, nome) for nome in os.listdir(pasta) if nome.endswith((".json", ".tmp"))]
+    for caminho in arquivos:
+        os.remove(caminho)
+    return len(arquivos)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["limpar"]:
+        print(f"✅ {limpar_cache()} PDF(s) removido(s) do cache")
+        sys.exit(0)
+    pasta = pasta_cache()
+    if pasta is None:
+        print(f"Cache de PDF desligado ({VARIAVEL_CACHE}=0)")
+    elif not os.path.isdir(pasta):
+        print(f"Cache de PDF vazio ({pasta})")
+    else:
+        entradas = _entradas(pasta)
+        tamanho = sum(t for _, t, _ in entradas)
+        print(f"Cache de PDF: {len(entradas)} PDF(s), {tamanho / 2**20:.1f} MB em {pasta} "
+              f"(sem uso há {DIAS_CACHE} dias ou além de {LIMITE_CACHE_MB} MB sai sozinho; "
+              f"apagar tudo: python cache_pdf.py limpar)")
@@ -0,0 +1,209 @@
+# ==========================================================
+# SCRIPT: Categorização dos lançamentos (coluna "Categoria")
+# As regras são palavras-chave por categoria, num arquivo
+# categorias.json ao lado da planilha:
+#   {"Alimentação": ["IFOOD", "SUPERMERCADO"], "Tarifas": ["TARIFA", "CESTA"]}
+# Todas as palavras viram um único autômato de Aho-Corasick: cada
+# descrição (Descrição + MEMO, normalizada) é percorrida uma vez,
+# qualquer que seja o número de regras. A palavra só vale inteira
+# ("TED" não casa com "FRUTEDO"); terminada em "*" vale como início
+# de palavra ("TRANSF*" casa com "TRANSFERENCIA"). Havendo mais de
+# uma palavra na descrição, vale a mais longa (a mais específica);
+# empate, a que vem primeiro no arquivo.
+# O resultado fica em cache pelo texto original: a mesma descrição
+# ("ENVIO PIX", "TARIFA PACOTE") não é percorrida de novo.
+# A importação categoriza cada lote antes de gravá-lo (main.py).
+#
+# Uso (recategorizar a planilha inteira, ex.: depois de mudar as regras):
+#   python categorias.py [caminho/extrato_ofx.xlsx] [--regras categorias.json]
+# ==========================================================
+
+import argparse
+import json
+import logging
+import os
+import time
+from collections import Counter, deque
+
+from leitura_xlsx import carregar_editavel
+from transacao import normalizar_descricao
+
+COL_CATEGORIA = 15  # coluna "Categoria" (1-based, para ws.cell)
+SEM_CATEGORIA = "Sem categoria"
+LIMITE_CACHE = 200_000
+
+# Usadas quando não há categorias.json ao lado da planilha
+REGRAS_PADRAO = {
+    "Transferências": ["PIX", "TED", "DOC", "TRANSF*"],
+    "Tarifas": ["TARIFA*", "CESTA", "PACOTE SERV*", "ANUIDADE"],
+    "Impostos": ["DARF", "SIMPLES NAC*", "IPTU", "IPVA", "IOF"],
+    "Boletos": ["PAG BOLETO", "PAGTO BOLETO", "PAGAMENTO BOLETO", "BOLETO*"],
+    "Compras": ["COMPRA*", "DEBITO VISA", "DEBITO ELO", "MAESTRO"],
+    "Saques": ["SAQUE*"],
+    # Sem "JUROS" solto: "JUROS CHEQUE ESPECIAL" é débito, não rendimento
+    "Rendimentos": ["RENDIMENTO*", "REND PAGO", "CRED JUROS", "JUROS POUPANCA"],
+    "Devoluções": ["DEVREC", "DEVOLUCAO", "ESTORNO*"],
+}
+
+
+def caminho_regras(saida):
+    return os.path.join(os.path.dirname(os.path.abspath(saida)), "categorias.json")
+
+
+class Categorizador:
+    """Autômato de Aho-Corasick sobre as palavras-chave das regras"""
+
+    def __init__(self, regras):
+        # Estado 0 é a raiz; cada estado tem transições (dict), falha e as regras que terminam nele
+        self.transicoes = [{}]
+        self.falha = [0]
+        self.regras = [[]]  # [(comprimento, -prioridade, categoria, prefixo)], da melhor para a pior
+        prioridade = 0
+        for categoria, palavras in regras.items():
+            for palavra in palavras:
+                chave = normalizar_descricao(palavra)
+                prefixo = chave.endswith("*")
+                chave = chave.rstrip("*").rstrip()
+                if chave:
+                    self._inserir(chave, (len(chave), -prioridade, categoria, prefixo))
+                    prioridade += 1
+        self._ligar_falhas()
+        self.cache = {}
+
+    def _inserir(self, chave, regra):
+        estado = 0
+        for c in chave:
+            proximo = self.transicoes[estado].get(c)
+            if proximo is None:
+                proximo = len(self.transicoes)
+                self.transicoes.append({})
+                self.falha.append(0)
+                self.regras.append([])
+                self.transicoes[estado][c] = proximo
+            estado = proximo
+        self.regras[estado].append(regra)
+
+    def _ligar_falhas(self):
+        """Busca em largura: falha de cada estado + regras herdadas pelos sufixos"""
+        fila = deque(self.transicoes[0].values())
+        for estado in fila:
+            self.regras[estado].sort(reverse=True)
+        while fila:
+            estado = fila.popleft()
+            for c, proximo in self.transicoes[estado].items():
+                f = self.falha[estado]
+                while f and c not in self.transicoes[f]:
+                    f = self.falha[f]
+                self.falha[proximo] = self.transicoes[f].get(c, 0)
+                # A falha é mais rasa, então já tem a lista completa e ordenada
+                self.regras[proximo] = sorted(self.regras[proximo] + self.regras[self.falha[proximo]],
+                                              reverse=True)
+                fila.append(proximo)
+
+    def _percorrer(self, texto):
+        transicoes, falha, regras = self.transicoes, self.falha, self.regras
+        estado, achada, fim = 0, None, len(texto) - 1
+        for i, c in enumerate(texto):
+            while estado and c not in transicoes[estado]:
+                estado = falha[estado]
+            estado = transicoes[estado].get(c, 0)
+            for regra in regras[estado]:
+                if achada is not None and regra <= achada:
+                    break
+                # Só palavra inteira: nem letra/dígito antes, nem depois (salvo regra "*")
+                inicio = i - regra[0]
+                if inicio >= 0 and texto[inicio].isalnum():
+                    continue
+                if not regra[3] and i < fim and texto[i + 1].isalnum():
+                    continue
+                achada = regra
+                break
+        return achada[2] if achada else SEM_CATEGORIA
+
+    def categoria(self, descricao, memo=None):
+        chave = (descricao, memo)
+        categoria = self.cache.get(chave)
+        if categoria is None:
+            if len(self.cache) >= LIMITE_CACHE:
+                self.cache.clear()
+            texto = normalizar_descricao(descricao)
+            if memo:
+                texto += " " + normalizar_descricao(memo)
+            categoria = self.cache[chave] = self._percorrer(texto)
+        return categoria
+
+    def classificar(self, descricoes, memos=None):
+        """Lote de descrições (e MEMOs) -> lista de categorias"""
+        memos = memos if memos is not None else [None] * len(descricoes)
+        return [self.categoria(d, m) for d, m in zip(descricoes, memos)]
+
+
+# ==========================================================
+# Regras em disco (recarregadas só quando o arquivo muda)
+# ==========================================================
+_carregados = {}
+
+
+def carregar_regras(caminho):
+    """Regras do categorias.json, ou REGRAS_PADRAO se o arquivo não existir"""
+    if not os.path.exists(caminho):
+        return REGRAS_PADRAO
+    with open(caminho, encoding="utf-8") as f:
+        regras = json.load(f)
+    if not isinstance(regras, dict) or not all(isinstance(p, list) for p in regras.values()):
+        raise ValueError(f"{caminho}: esperado {{\"categoria\": [\"palavra\", ...]}}")
+    return regras
+
+
+def categorizador_para(saida, caminho=None):
+    """Categorizador das regras da planilha `saida`, reaproveitado enquanto o arquivo de regras não mudar"""
+    caminho = caminho or caminho_regras(saida)
+    mtime = os.path.getmtime(caminho) if os.path.exists(caminho) else None
+    carregado = _carregados.get(caminho)
+    if carregado is None or carregado[0] != mtime:
+        carregado = _carregados[caminho] = (mtime, Categorizador(carregar_regras(caminho)))
+    return carregado[1]
+
+
+# ==========================================================
+# Recategorizar a planilha inteira
+# ==========================================================
+def recategorizar(saida, caminho=None):
+    """Reescreve a coluna Categoria de todas as linhas; devolve {"linhas", "por_categoria", "segundos"}"""
+    from main import caminho_diario, salvar_atomico
+
+    if os.path.exists(caminho_diario(saida)):
+        raise RuntimeError("Há uma importação pendente no diário; conclua-a antes de recategorizar.")
+    inicio = time.perf_counter()
+    categorizador = categorizador_para(saida, caminho)
+    wb = carregar_editavel(saida)
+    ws = wb.worksheets[0]
+    ws.cell(row=1, column=COL_CATEGORIA, value="Categoria")
+
+    linhas, descricoes, memos = [], [], []
+    for num_linha, row in enumerate(ws.iter_rows(min_row=2, max_col=11, values_only=True), start=2):
+        if not row or row[0] is None or not isinstance(row[3], (int, float)):
+            continue
+        linhas.append(num_linha)
+        descricoes.append(row[2])
+        memos.append(row[10])
+    categorias = categorizador.classificar(descricoes, memos)
+    for num_linha, categoria in zip(linhas, categorias):
+        ws.cell(row=num_linha, column=COL_CATEGORIA, value=categoria)
+    salvar_atomico(wb, saida)
+
+    resumo = {"linhas": len(linhas), "por_categoria": dict(Counter(categorias)),
+              "segundos": round(time.perf_counter() - inicio, 2)}
+    logging.info(f"Recategorização de {saida}: {resumo['linhas']} linhas em {resumo['segundos']} s")
+    return resumo
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Preenche a coluna Categoria do extrato a partir das regras")
+    parser.add_argument("saida", nargs="?", default=os.path.join(os.getcwd(), "extrato_ofx.xlsx"))
+    parser.add_argument("--regras", help="arquivo de regras (padrão: categorias.json ao lado da planilha)")
+    args = parser.parse_args()
+    resumo = recategorizar(args.saida, args.regras)
+    print(f"✅ {resumo['linhas']} lançamentos categorizados em {resumo['segundos']} s")
+    for categoria, quantidade in sorted(resumo["por_categoria"].items(), key=lambda item: -item[1]):
+        print(f"   {categoria:<30} {quantidade:>8}")
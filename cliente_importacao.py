@@ -0,0 +1,151 @@
+# ==========================================================
+# SCRIPT: Cliente leve do servidor de importação
+# Só biblioteca padrão: não importa openpyxl, pdfplumber nem ofxtools,
+# então abre em milissegundos. Quem lê os arquivos e grava a planilha é
+# o servidor residente (servidor_importacao.py), que já está com as
+# bibliotecas carregadas, a planilha, o razão e o índice de impressões
+# digitais em memória — a importação do dia não paga a partida do
+# Python nem a abertura da planilha.
+# Com --iniciar, sobe o servidor em segundo plano se ele não estiver no
+# ar (a primeira vez paga a partida; as seguintes já o encontram quente).
+#
+# Uso:
+#   python cliente_importacao.py importar extrato.ofx [mais.pdf ...] [--iniciar]
+#   python cliente_importacao.py lancar --data 01/10/2025 --tipo Saída --valor 100 --descricao ALUGUEL ...
+#   python cliente_importacao.py desfazer 12
+#   python cliente_importacao.py estado | parar
+#   (opções: --saida extrato_ofx.xlsx --porta 8765)
+# ==========================================================
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+HOST = "127.0.0.1"
+PORTA_PADRAO = 8765
+ESPERA_PARTIDA = 120  # segundos esperando o servidor recém-iniciado carregar a planilha
+
+
+class ClienteImportacao:
+    def __init__(self, porta=PORTA_PADRAO):
+        self.url = f"http://{HOST}:{porta}"
+
+    def estado(self):
+        """Estado do servidor, ou None se não houver servidor no ar"""
+        try:
+            with urllib.request.urlopen(self.url + "/estado", timeout=0.5) as resposta:
+                return json.loads(resposta.read())
+        except (OSError, ValueError):
+            return None
+
+    def atende(self, saida):
+        """True se há servidor no ar e ele é o dono da planilha `saida`"""
+        estado = self.estado()
+        return bool(estado) and os.path.normcase(estado["saida"]) == os.path.normcase(os.path.abspath(saida))
+
+    def enviar(self, tipo, **dados):
+        corpo = json.dumps({"tipo": tipo, **dados}, ensure_ascii=False).encode("utf-8")
+        pedido = urllib.request.Request(self.url + "/trabalho", data=corpo,
+                                        headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(pedido) as resposta:
+                resultado = json.loads(resposta.read())
+        except urllib.error.HTTPError as e:
+            # 503: o servidor está no ar mas não conseguiu abrir a planilha (o motivo vem no corpo)
+            with e:
+                resultado = json.loads(e.read())
+        if not resultado["ok"]:
+            raise RuntimeError(resultado["erro"])
+        return resultado["resultado"]
+
+    def importar(self, arquivos):
+        return self.enviar("importar", arquivos=[os.path.abspath(c) for c in arquivos])
+
+    def lancar(self, lancamentos):
+        return self.enviar("manual", lancamentos=lancamentos)
+
+    def desfazer(self, execucao):
+        return self.enviar("desfazer", execucao=execucao)
+
+    def parar(self):
+        """Encerra o servidor depois dos trabalhos que já estão na fila"""
+        return self.enviar("parar")
+
+
+def iniciar_servidor(saida, porta=PORTA_PADRAO, espera=ESPERA_PARTIDA):
+    """
+    Sobe servidor_importacao.py em segundo plano (desligado deste terminal)
+    e espera ele ficar pronto; devolve o cliente. Se já houver um servidor
+    da mesma planilha no ar, só devolve o cliente.
+    """
+    saida = os.path.abspath(saida)
+    cliente = ClienteImportacao(porta)
+    estado = cliente.estado()
+    if estado is None:
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "servidor_importacao.py")
+        opcoes = {}
+        if os.name == "nt":
+            opcoes["creationflags"] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+        else:
+            opcoes["start_new_session"] = True
+        # O log (processamento_ofx.log) fica ao lado da planilha, como quando o main.py roda ali
+        subprocess.Popen([sys.executable, script, "--saida", saida, "--porta", str(porta)],
+                         cwd=os.path.dirname(saida), stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                         stderr=subprocess.DEVNULL, **opcoes)
+    limite = time.monotonic() + espera
+    while not (estado and estado.get("pronto")):
+        if estado and estado.get("erro"):
+            raise RuntimeError(f"O servidor não abriu a planilha: {estado['erro']}")
+        if time.monotonic() > limite:
+            raise TimeoutError(f"O servidor não ficou pronto em {espera} s (veja processamento_ofx.log)")
+        time.sleep(0.2)
+        estado = cliente.estado()
+    if not cliente.atende(saida):
+        raise RuntimeError(f"A porta {porta} já tem um servidor para outra planilha: {estado['saida']}")
+    return cliente
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Envia trabalhos ao servidor de importação residente")
+    parser.add_argument("comando", choices=("importar", "lancar", "desfazer", "estado", "parar"))
+    parser.add_argument("argumentos", nargs="*", help="arquivos (importar) ou número da execução (desfazer)")
+    parser.add_argument("--saida", default=os.path.join(os.getcwd(), "extrato_ofx.xlsx"))
+    parser.add_argument("--porta", type=int, default=PORTA_PADRAO)
+    parser.add_argument("--iniciar", action="store_true", help="sobe o servidor se ele não estiver no ar")
+    for campo in ("data", "tipo", "valor", "descricao", "banco_id", "conta", "nr_doc", "memo"):
+        parser.add_argument(f"--{campo}", help="lançamento manual (lancar)")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    cliente = ClienteImportacao(args.porta)
+    if args.comando == "estado":
+        print(json.dumps(cliente.estado(), ensure_ascii=False, indent=2))
+        sys.exit(0)
+    if args.iniciar:
+        cliente = iniciar_servidor(args.saida, args.porta)
+    elif not cliente.atende(args.saida):
+        sys.exit(f"❌ Nenhum servidor no ar para {os.path.abspath(args.saida)} "
+                 f"(use --iniciar ou rode servidor_importacao.py)")
+
+    if args.comando == "importar":
+        resultado = cliente.importar(args.argumentos)
+        print(f"✅ Execução {resultado['execucao']}: {resultado['adicionados']} adicionados, "
+              f"{resultado['ignorados']} ignorados, {resultado['divergencias']} divergência(s) de saldo")
+    elif args.comando == "lancar":
+        lancamento = {campo: getattr(args, campo) for campo in
+                      ("data", "tipo", "valor", "descricao", "banco_id", "conta", "nr_doc", "memo")
+                      if getattr(args, campo) is not None}
+        resultado = cliente.lancar([lancamento])
+        print(f"✅ Lançamento gravado na execução {resultado['execucao']}")
+    elif args.comando == "desfazer":
+        removidas = cliente.desfazer(int(args.argumentos[0]))
+        print(f"✅ Execução {args.argumentos[0]} desfeita ({removidas} linhas)")
+    else:
+        cliente.parar()
+        print("✅ Servidor encerrado")
+    print(f"   {time.perf_counter() - inicio:.2f} s")
@@ -1,4 +1,4 @@
-# Script para consolidar arquivos CSV de vendas, gerar um Excel e enviar por e-mail via Gmail.
+# Script para consolidar arquivos CSV de vendas, gerar um Excel (com abas de totais) e enviar por e-mail via Gmail.
 # Requer: pandas, openpyxl, smtplib, email.message, arquivos .senha_email e .email_address na mesma pasta do script.
 
 import os  # Manipulação de caminhos e arquivos do sistema operacional
@@ -6,55 +6,64 @@ from datetime import datetime  # Para manipulação de datas
 import pandas as pd  # Para leitura e manipulação de dados tabulares
 import smtplib  # Para envio de e-mails via protocolo SMTP
 from email.message import EmailMessage  # Para criar mensagens de e-mail com anexos
+from vendas import COLUNA_VALOR, agregar, consolidar, ler_vendas, relatorio_memoria  # Esquema e totais (vendas.py)
+
+LIMITE_LINHAS_EXCEL = 1_048_576  # linhas por aba no Excel (cabeçalho incluso)
 
 # 1. Define o caminho absoluto para a pasta 'bases' onde estão os arquivos CSV
 caminho_bases = os.path.join(os.path.dirname(__file__), "bases")
 
-# 2. Lista todos os arquivos presentes na pasta 'bases'
-arquivos = os.listdir(caminho_bases)
+# 2. Lista os arquivos CSV presentes na pasta 'bases' (a pasta também guarda extratos e PDFs)
+arquivos = [nome for nome in os.listdir(caminho_bases) if nome.lower().endswith(".csv")]
 # print(arquivos)  # Exibe os arquivos encontrados para conferência
 
-# 3. Cria um DataFrame vazio para consolidar os dados de todos os arquivos CSV
-tabela_consolidada = pd.DataFrame()
-
-# 3a. Variável para soma geral
-soma_geral = 0
+# 3. Lista das tabelas lidas (concatenadas uma única vez no passo 5)
+tabelas = []
 
 # 4. Percorre cada arquivo CSV encontrado na pasta 'bases'
 for nome_arquivo in arquivos:
-    # 4.1 Lê o arquivo CSV em um DataFrame
-    tabela_vendas = pd.read_csv(os.path.join(caminho_bases, nome_arquivo))
-    # 4.2 Converte a coluna "Data de Venda" para o formato de data
-    tabela_vendas["Data de Venda"] = pd.to_datetime("01/01/1900") + pd.to_timedelta(
-        tabela_vendas["Data de Venda"], unit="d"
-    )
-    # 4.2a Exibe o DataFrame lido para conferência cada ciclo do loop
-    print(f"\nArquivo: {nome_arquivo}")
-    print(tabela_vendas)
-    # 4.2b Soma por data para o arquivo atual
-    if "Transação" in tabela_vendas.columns:
-        soma_por_data = tabela_vendas.groupby("Data de Venda")["Transação"].sum()
-        print("Soma da coluna Transação por data:")
-        print(soma_por_data)
-        # 4.2c Soma geral acumulada
-        soma_geral += tabela_vendas["Transação"].sum()
-    else:
-        print("Coluna 'Transação' não encontrada neste arquivo.")
+    # 4.1 Lê o arquivo CSV já com o esquema declarado (texto repetido em category, IDs compactos)
+    #     e a coluna "Data de Venda" convertida do número de série do Excel para data
+    tabela_vendas = ler_vendas(os.path.join(caminho_bases, nome_arquivo))
+    # 4.2 Exibe o tamanho do arquivo lido para conferência cada ciclo do loop
+    print(f"Arquivo: {nome_arquivo} ({len(tabela_vendas)} vendas)")
 
-    # 4.3 Adiciona os dados lidos ao DataFrame consolidado
-    tabela_consolidada = pd.concat([tabela_consolidada, tabela_vendas])
+    # 4.3 Guarda a tabela lida para a consolidação
+    tabelas.append(tabela_vendas)
 
-# 5. Ordena os dados consolidados pela coluna "Data de Venda"
-tabela_consolidada = tabela_consolidada.sort_values(by="Data de Venda")
+# 5. Consolida (mantendo as colunas category) e ordena os dados pela coluna "Data de Venda"
+tabela_consolidada = consolidar(tabelas).sort_values(by="Data de Venda")
+del tabelas  # libera as tabelas por arquivo
 
 # 6. Reseta o índice do DataFrame consolidado para manter a sequência correta
 tabela_consolidada = tabela_consolidada.reset_index(drop=True)
 
+# 6a. Memória por coluna: atual x estimada com os dtypes padrão do read_csv
+memoria = relatorio_memoria(tabela_consolidada)
+print("\nMemória por coluna:")
+print(memoria.to_string(index=False))
+print(f"Total: {memoria['Atual (MB)'].sum():.2f} MB (com dtypes padrão seriam {memoria['Padrão (MB)'].sum():.2f} MB)")
+
+# 6b. Totais de "Preço do Produto" por produto, tipo de pagamento, status, país e data (vendas.py)
+agregados = agregar(tabela_consolidada)
+soma_geral = tabela_consolidada[COLUNA_VALOR].sum()
+for aba, tabela_agregada in agregados.items():
+    print(f"\n{aba}:")
+    print(tabela_agregada.head(10).to_string(index=False))
+print(f"\nSoma geral de {COLUNA_VALOR}: {soma_geral}")
+
 # 7. Define o caminho para salvar o arquivo Excel consolidado
 caminho_saida = os.path.join(os.path.dirname(__file__), "Vendas.xlsx")
 
-# 8. Salva o DataFrame consolidado em um arquivo Excel (necessário ter openpyxl instalado)
-tabela_consolidada.to_excel(caminho_saida, index=False)
+# 8. Salva as vendas e cada agregado em sua própria aba (necessário ter openpyxl instalado)
+#    Uma aba do Excel comporta 1.048.576 linhas: acima disso só os agregados vão para o arquivo
+with pd.ExcelWriter(caminho_saida) as escritor:
+    if len(tabela_consolidada) < LIMITE_LINHAS_EXCEL:
+        tabela_consolidada.to_excel(escritor, sheet_name="Vendas", index=False)
+    else:
+        print(f"{len(tabela_consolidada)} vendas: aba 'Vendas' omitida (limite do Excel)")
+    for aba, tabela_agregada in agregados.items():
+        tabela_agregada.to_excel(escritor, sheet_name=aba, index=False)
 
 # 9. Lê a senha do Gmail a partir do arquivo oculto .senha_email (deve conter apenas a senha de app)
 with open(os.path.join(os.path.dirname(__file__), ".senha_email"), "r") as f:
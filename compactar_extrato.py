@@ -0,0 +1,128 @@
+# ==========================================================
+# SCRIPT: Compactar extrato_ofx.xlsx (remover lançamentos duplicados)
+# Lê a aba "Extrato OFX" em modo streaming, detecta duplicatas pela
+# impressão digital do lançamento (índice em hash), grava a planilha
+# compactada de uma vez (write-only), recalcula os saldos acumulados
+# por conta e a aba BANCOS, e gera um CSV com as linhas removidas.
+# Também remove o lançamento que entrou por duas fontes (OFX e PDF da
+# mesma conta), mantendo o importado primeiro (conciliacao.py).
+#
+# Uso:
+#   python compactar_extrato.py [caminho/extrato_ofx.xlsx]
+# Também disponível no menu do main.py ("Compactar Extrato").
+# ==========================================================
+
+import csv
+import logging
+import os
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+
+from alteracoes import emitir_com_seguranca
+from arquivamento import ler_indice
+from conciliacao import Conciliador
+from leitura_xlsx import abrir_leitura
+from main import (atualizar_aba_bancos, caminho_diario, impressao_linha, ler_saldos_iniciais, regravar_planilha,
+                  salvar_atomico)
+from saldos import Razao
+from transacao import data_br
+
+
+def compactar(saida):
+    """
+    Remove as duplicatas de `saida` e devolve o resumo:
+    {"lidas", "mantidas", "removidas", "conciliadas", "por_execucao", "relatorio", "segundos"}.
+    """
+    if os.path.exists(caminho_diario(saida)):
+        raise RuntimeError("Há uma importação pendente no diário; conclua-a antes de compactar.")
+
+    inicio = time.perf_counter()
+    origem = abrir_leitura(saida)
+    ws_origem = origem.worksheets[0]
+
+    razao = Razao(ler_saldos_iniciais(origem), agrupar=Conciliador().grupo)
+
+    # ---- Passada única: índice de impressões + linhas mantidas ----
+    linhas_origem = ws_origem.iter_rows(values_only=True)
+    cabecalho = list(next(linhas_origem))
+    cabecalho += [None] * (15 - len(cabecalho))
+    cabecalho[12], cabecalho[13], cabecalho[14] = "Conta", "Impressão Digital", "Categoria"
+
+    vistas = set()
+    ocorrencias = {}
+    conciliador = Conciliador()
+    mantidas, removidas = [], []
+    datas = {}
+    for row in linhas_origem:
+        if not row or all(v is None for v in row):
+            continue
+        row = list(row) + [None] * (14 - len(row))
+        if row[0] is None or not isinstance(row[3], (int, float)):
+            mantidas.append(row)  # linha sem lançamento (total, anotação): preservada como está
+            continue
+        impressao = row[13] or impressao_linha(row, ocorrencias)
+        if impressao in vistas:
+            removidas.append(row)
+            continue
+        vistas.add(impressao)
+        row[13] = impressao
+        row[12] = row[12] or "N/A"
+        if conciliador.indexar_linha(row, row[11]) is not None:
+            removidas.append(row)  # mesmo lançamento já mantido, vindo de outra fonte
+            continue
+        if row[0] not in datas:
+            datas[row[0]] = data_br(row[0]) if isinstance(row[0], str) else None
+        num_linha = len(mantidas) + 2
+        razao.livro(row[5], row[12]).inserir(datas[row[0]], row[3], num_linha)
+        mantidas.append(row)
+
+    # ---- Saldos acumulados recalculados por conta, em ordem de data ----
+    for livro in razao.livros.values():
+        for num_linha, saldo in livro.alteracoes():
+            mantidas[num_linha - 2][4] = saldo
+
+    # ---- Planilha compactada (write-only: grava em streaming) ----
+    destino, ws_destino = regravar_planilha(origem, cabecalho, mantidas, [
+        datetime.now().strftime("%d/%m/%Y %H:%M:%S"), "COMPACTACAO", "", "", "", 0, len(removidas),
+        "", "", "", "", "OK"])
+
+    # recria BANCOS, SALDOS_INICIAIS e os resumos
+    indice = ler_indice(saida)
+    atualizar_aba_bancos(destino, ws_destino, razao, linhas=mantidas,
+                         arquivado=indice.get("resumo") if indice else None)
+    origem.close()
+
+    # ---- Relatório do que saiu ----
+    relatorio = None
+    if removidas:
+        relatorio = os.path.splitext(saida)[0] + f"_removidos_{datetime.now():%Y%m%d_%H%M%S}.csv"
+        with open(relatorio, "w", newline="", encoding="utf-8-sig") as f:
+            escritor = csv.writer(f, delimiter=";")
+            escritor.writerow(cabecalho)
+            escritor.writerows(removidas)
+
+    salvar_atomico(destino, saida)
+    emitir_com_seguranca(saida, None, removidas=removidas, rotulo="compactacao")
+
+    por_execucao = Counter(row[7] for row in removidas)
+    resumo = {
+        "lidas": len(mantidas) + len(removidas), "mantidas": len(mantidas), "removidas": len(removidas),
+        "conciliadas": conciliador.conciliados,
+        "por_execucao": dict(por_execucao), "relatorio": relatorio,
+        "segundos": round(time.perf_counter() - inicio, 2),
+    }
+    logging.info(f"Compactação de {saida}: {resumo}")
+    return resumo
+
+
+if __name__ == "__main__":
+    caminho = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.getcwd(), "extrato_ofx.xlsx")
+    resumo = compactar(caminho)
+    print(f"✅ {resumo['lidas']} linhas lidas, {resumo['removidas']} duplicadas removidas "
+          f"({resumo['conciliadas']} entre fontes) em {resumo['segundos']} s")
+    for execucao, quantidade in sorted(resumo["por_execucao"].items(), key=lambda x: str(x[0])):
+        print(f"   Execução {execucao}: {quantidade} linha(s)")
+    if resumo["relatorio"]:
+        print(f"📄 Linhas removidas em: {resumo['relatorio']}")
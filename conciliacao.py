@@ -0,0 +1,188 @@
+# ==========================================================
+# SCRIPT: Conciliação entre fontes (OFX x PDF x CSV da mesma conta)
+# A mesma conta da CEF chega pelo OFX (banco "0104", conta no formato
+# do OFX) e pelo PDF (banco "CEF", "03088/1288/000752785312-4"), com
+# descrições e nr. de documento diferentes: as impressões digitais não
+# batem e o lançamento entrava duas vezes.
+# A conciliação:
+#   1. junta as contas equivalentes num grupo (banco normalizado e os
+#      dígitos de uma conta terminando com os da outra)
+#   2. indexa os lançamentos por (grupo, data, valor em centavos) —
+#      hash join: cada lançamento novo só olha os candidatos do seu bloco
+#   3. entre candidatos de OUTRA fonte ainda não usados, aceita o de
+#      mesmo nr. de documento ou o de descrição parecida (radicais de
+#      4 letras em comum: "ENVIO PIX" ~ "PIX ENVIADO"); lançamento de
+#      valor zero ("SALDO DIA") só pela data e pela descrição
+# Na importação (main.py) o lançamento conciliado não é gravado: conta
+# como ignorado e o par (FITID de cada lado) vai para o log. Para limpar
+# duplicatas que já estão na planilha: compactar_extrato.py (usa o
+# mesmo índice e mantém a linha importada primeiro).
+#
+# Uso (relatório, sem alterar a planilha):
+#   python conciliacao.py [caminho/extrato_ofx.xlsx]
+# ==========================================================
+
+import os
+import re
+import sys
+import time
+
+from leitura_xlsx import abrir_leitura
+from transacao import data_br, normalizar_descricao
+
+# Códigos de banco que são o mesmo banco ("0104" no OFX, "CEF" no PDF)
+APELIDOS_BANCO = {"104": "CEF", "CAIXA": "CEF", "77": "077", "INTER": "077"}
+DIGITOS_MINIMOS = 6   # conta com menos dígitos não é comparada por sufixo
+SEMELHANCA_MINIMA = 0.5
+ORIGENS_FITID = ("PDF", "CSV", "MANUAL")  # prefixos dos FITID gerados (main.py); o resto veio de OFX
+
+
+def banco_canonico(banco_id):
+    texto = str(banco_id or "").strip().upper()
+    if texto.isdigit():
+        texto = texto.lstrip("0") or "0"
+    return APELIDOS_BANCO.get(texto, texto)
+
+
+def origem_fitid(fitid):
+    """Fonte de uma linha da planilha pelo FITID ("PDF-...", "CSV-...", "MANUAL-..." ou do banco)"""
+    prefixo = str(fitid or "").split("-", 1)[0]
+    return prefixo if prefixo in ORIGENS_FITID else "OFX"
+
+
+def radicais(*textos):
+    """Radicais de 4 letras das palavras da descrição (tolerante a "ENVIO"/"ENVIADO", acentos, espaços)"""
+    return frozenset(p[:4] for texto in textos for p in normalizar_descricao(texto).split() if len(p) > 1)
+
+
+def semelhanca(a, b):
+    """Fração dos radicais da descrição menor presentes na outra (1.0 se uma delas estiver vazia)"""
+    if not a or not b:
+        return 1.0
+    return len(a & b) / min(len(a), len(b))
+
+
+class Conciliador:
+    def __init__(self):
+        self.grupos = {}    # (banco, conta) -> grupo
+        self.contas = {}    # banco canônico -> [(dígitos, grupo)]
+        self.indice = {}    # (grupo, ordinal, centavos) -> [candidato, ...]
+        self.conciliados = 0
+
+    def grupo(self, banco_id, conta):
+        """Grupo de contas equivalentes (mesmo banco e uma conta é sufixo da outra)"""
+        chave = (banco_id, conta or "N/A")
+        grupo = self.grupos.get(chave)
+        if grupo is not None:
+            return grupo
+        banco = banco_canonico(banco_id)
+        digitos = re.sub(r"\D", "", str(conta or "")).lstrip("0")
+        if len(digitos) < DIGITOS_MINIMOS:
+            # Conta curta fica como veio: só os dígitos juntariam "A1" com "B1", "Caixa 1" com "Poupança 1"
+            grupo = f"{banco}/{' '.join(str(conta or 'N/A').upper().split())}"
+        else:
+            grupo = f"{banco}/{digitos}"
+            for outros, existente in self.contas.get(banco, []):
+                curto, longo = sorted((digitos, outros), key=len)
+                # O dígito verificador pode vir só num dos lados ("785312-4" x "785312")
+                if longo.endswith(curto) or longo[:-1].endswith(curto):
+                    grupo = existente
+                    break
+            else:
+                self.contas.setdefault(banco, []).append((digitos, grupo))
+        self.grupos[chave] = grupo
+        return grupo
+
+    def _bloco(self, banco_id, conta, data, valor):
+        return (self.grupo(banco_id, conta), data.toordinal(), round(valor * 100))
+
+    def registrar(self, banco_id, conta, data, valor, origem, descricao="", memo="", nr_doc="", referencia=None):
+        """Acrescenta um lançamento (da planilha ou recém-gravado) ao índice"""
+        if data is None or valor is None or origem == "MANUAL":
+            return
+        self.indice.setdefault(self._bloco(banco_id, conta, data, valor), []).append(
+            [origem, radicais(descricao, memo), str(nr_doc or "").strip().lstrip("0"), referencia, False])
+
+    def procurar(self, banco_id, conta, data, valor, origem, descricao="", memo="", nr_doc=""):
+        """
+        Lançamento de outra fonte que é o mesmo que este; marca o par como
+        usado (cada lançamento concilia com no máximo um) e devolve a
+        referência dele, ou None.
+        """
+        if data is None or valor is None:
+            return None
+        candidatos = self.indice.get(self._bloco(banco_id, conta, data, valor))
+        if not candidatos:
+            return None
+        nr_doc = str(nr_doc or "").strip().lstrip("0")
+        proprios = radicais(descricao, memo)
+        sem_valor = not round(valor * 100)  # "SALDO DIA" e afins: só a descrição distingue os do mesmo dia
+        melhor, melhor_nota = None, SEMELHANCA_MINIMA
+        for candidato in candidatos:
+            outra_origem, outros, outro_doc, _, usado = candidato
+            if usado or outra_origem == origem or (sem_valor and not (proprios and outros)):
+                continue
+            if nr_doc and nr_doc == outro_doc and not sem_valor:
+                melhor = candidato
+                break
+            nota = semelhanca(proprios, outros)
+            if nota >= melhor_nota:
+                melhor, melhor_nota = candidato, nota
+        if melhor is None:
+            return None
+        melhor[4] = True
+        self.conciliados += 1
+        return melhor[3]
+
+    @staticmethod
+    def _campos(row):
+        """Linha do "Extrato OFX" -> argumentos de registrar/procurar"""
+        row = tuple(row) + (None,) * (13 - len(row))
+        data = data_br(row[0]) if isinstance(row[0], str) else None
+        return (row[5], row[12], data, row[3], origem_fitid(row[11]), row[2], row[10], row[9])
+
+    def registrar_linha(self, row, referencia):
+        self.registrar(*self._campos(row), referencia=referencia)
+
+    def indexar_linha(self, row, referencia):
+        """
+        Linha do "Extrato OFX" (values_only) -> índice. Devolve a referência
+        da linha de outra fonte de que ela é duplicata (e aí ela não entra
+        no índice), ou None.
+        """
+        campos = self._campos(row)
+        if campos[4] != "MANUAL":
+            par = self.procurar(*campos)
+            if par is not None:
+                return par
+        self.registrar(*campos, referencia=referencia)
+        return None
+
+
+def relatorio(saida):
+    """Pares de lançamentos de fontes diferentes que já estão na planilha: [((linha, row) mantida, (linha, row) duplicada)]"""
+    wb = abrir_leitura(saida)
+    conciliador = Conciliador()
+    pares = []
+    try:
+        for num_linha, row in enumerate(wb.worksheets[0].iter_rows(min_row=2, values_only=True), start=2):
+            if not row or row[0] is None or not isinstance(row[3], (int, float)):
+                continue
+            row = tuple(row) + (None,) * (13 - len(row))
+            par = conciliador.indexar_linha(row, (num_linha, row))
+            if par is not None:
+                pares.append((par, (num_linha, row)))
+    finally:
+        wb.close()
+    return pares
+
+
+if __name__ == "__main__":
+    caminho = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.getcwd(), "extrato_ofx.xlsx")
+    inicio = time.perf_counter()
+    pares = relatorio(caminho)
+    for (linha_a, a), (linha_b, b) in pares:
+        print(f"{a[0]}  {a[3]:>12.2f}  linha {linha_a:>6} {origem_fitid(a[11]):<4} {str(a[2])[:30]:<30}"
+              f"  =  linha {linha_b:>6} {origem_fitid(b[11]):<4} {str(b[2])[:30]}")
+    print(f"— {len(pares)} lançamento(s) duplicado(s) entre fontes em {time.perf_counter() - inicio:.2f} s"
+          + ("; rode compactar_extrato.py para removê-los" if pares else ""))
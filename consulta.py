@@ -0,0 +1,223 @@
+# ==========================================================
+# SCRIPT: Consultas ao extrato (período, conta, execução)
+# Mantém uma cópia do extrato em SQLite (extrato_ofx.xlsx.consulta.db)
+# com datas nativas (ISO) e valores numéricos, indexada por
+# (banco, conta, data), por data e por execução. As consultas rodam
+# no banco, sem abrir a planilha; ela só é relida quando muda em disco
+# (planilha principal e planilhas anuais do arquivamento, cada uma
+# sincronizada separadamente).
+#
+# Uso:
+#   python consulta.py --banco CEF --tipo saida --de 01/03/2025 --ate 31/03/2025
+#   python consulta.py --totais banco,conta,mes --de 2025-01-01
+#   python consulta.py --execucao 12
+# Em Python:
+#   with Consulta("extrato_ofx.xlsx") as c:
+#       c.lancamentos(banco="CEF", de=date(2025, 3, 1), ate=date(2025, 3, 31), tipo="Saída")
+#       c.totais(("banco", "conta", "mes"))
+# ==========================================================
+
+import argparse
+import os
+import sqlite3
+import time
+from datetime import date
+
+from arquivamento import caminho_ano, ler_indice
+from leitura_xlsx import abrir_leitura
+from transacao import data_br
+
+COLUNAS = ("data", "tipo", "descricao", "valor", "saldo", "banco", "processado_em", "execucao",
+           "trntype", "nr_doc", "memo", "fitid", "conta", "impressao")
+
+# valor entra nos índices de data para os totais serem respondidos só pelo índice
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS fontes (arquivo TEXT PRIMARY KEY, mtime REAL, tamanho INTEGER);
+CREATE TABLE IF NOT EXISTS lancamentos (
+    fonte TEXT, linha INTEGER,
+    data TEXT, tipo TEXT, descricao TEXT, valor REAL, saldo REAL, banco TEXT, processado_em TEXT,
+    execucao INTEGER, trntype TEXT, nr_doc TEXT, memo TEXT, fitid TEXT, conta TEXT, impressao TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_conta_data ON lancamentos (banco, conta, data, valor);
+CREATE INDEX IF NOT EXISTS ix_data ON lancamentos (data, valor);
+CREATE INDEX IF NOT EXISTS ix_execucao ON lancamentos (execucao);
+CREATE INDEX IF NOT EXISTS ix_fonte ON lancamentos (fonte);
+"""
+
+# Agrupamentos aceitos em totais() -> expressão SQL
+AGRUPAMENTOS = {
+    "banco": "banco", "conta": "conta", "execucao": "execucao", "tipo": "tipo",
+    "dia": "data", "mes": "substr(data, 1, 7)", "ano": "substr(data, 1, 4)",
+}
+
+
+def caminho_banco(saida):
+    return saida + ".consulta.db"
+
+
+def _data_iso(valor):
+    """date, "dd/mm/aaaa" ou "aaaa-mm-dd" -> "aaaa-mm-dd" (None passa)"""
+    if valor is None or isinstance(valor, date):
+        return valor.isoformat() if valor else None
+    if "/" in valor:
+        convertida = data_br(valor)
+        if convertida is None:
+            raise ValueError(f"Data inválida: {valor}")
+        return convertida.isoformat()
+    return date.fromisoformat(valor).isoformat()
+
+
+class Consulta:
+    def __init__(self, saida):
+        self.saida = os.path.abspath(saida)
+        self.conexao = sqlite3.connect(caminho_banco(self.saida))
+        self.conexao.row_factory = sqlite3.Row
+        self.conexao.executescript(ESQUEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *erro):
+        self.fechar()
+
+    def fechar(self):
+        self.conexao.close()
+
+    # ---- Sincronização com as planilhas ----
+    def fontes(self):
+        """Planilha principal + planilhas anuais listadas no índice do arquivamento"""
+        fontes = [self.saida]
+        indice = ler_indice(self.saida)
+        if indice:
+            fontes += [caminho_ano(self.saida, ano) for ano in sorted(indice["anos"])]
+        return [f for f in fontes if os.path.exists(f)]
+
+    def sincronizar(self):
+        """Relê só as planilhas que mudaram desde a última consulta; devolve quantas foram relidas"""
+        atuais = {f: os.stat(f) for f in self.fontes()}
+        registradas = {r["arquivo"]: (r["mtime"], r["tamanho"])
+                       for r in self.conexao.execute("SELECT arquivo, mtime, tamanho FROM fontes")}
+        relidas = 0
+        with self.conexao:
+            for arquivo in registradas.keys() - atuais.keys():
+                self.conexao.execute("DELETE FROM lancamentos WHERE fonte = ?", (arquivo,))
+                self.conexao.execute("DELETE FROM fontes WHERE arquivo = ?", (arquivo,))
+            for arquivo, info in atuais.items():
+                if registradas.get(arquivo) == (info.st_mtime, info.st_size):
+                    continue
+                self.conexao.execute("DELETE FROM lancamentos WHERE fonte = ?", (arquivo,))
+                self.conexao.executemany(
+                    f"INSERT INTO lancamentos (fonte, linha, {', '.join(COLUNAS)}) "
+                    f"VALUES ({', '.join('?' * (len(COLUNAS) + 2))})",
+                    self._linhas(arquivo))
+                self.conexao.execute("INSERT OR REPLACE INTO fontes VALUES (?, ?, ?)",
+                                     (arquivo, info.st_mtime, info.st_size))
+                relidas += 1
+        return relidas
+
+    @staticmethod
+    def _linhas(arquivo):
+        wb = abrir_leitura(arquivo)
+        try:
+            datas = {}
+            for num_linha, row in enumerate(wb.worksheets[0].iter_rows(min_row=2, values_only=True), start=2):
+                if not row or row[0] is None or not isinstance(row[3], (int, float)):
+                    continue
+                row = list(row[:14]) + [None] * (14 - len(row))
+                if row[0] not in datas:
+                    data = data_br(row[0]) if isinstance(row[0], str) else None
+                    datas[row[0]] = data.isoformat() if data else None
+                row[0] = datas[row[0]]
+                row[5] = None if row[5] is None else str(row[5])
+                row[12] = str(row[12]) if row[12] is not None else "N/A"
+                row[7] = row[7] if isinstance(row[7], int) else None
+                yield (arquivo, num_linha, *row)
+        finally:
+            wb.close()
+
+    # ---- Consultas ----
+    @staticmethod
+    def _filtros(banco=None, conta=None, de=None, ate=None, execucao=None, tipo=None, descricao=None):
+        condicoes, parametros = [], []
+        for coluna, valor in (("banco", banco), ("conta", conta), ("execucao", execucao)):
+            if valor is not None:
+                condicoes.append(f"{coluna} = ?")
+                parametros.append(str(valor) if coluna != "execucao" else int(valor))
+        if de is not None:
+            condicoes.append("data >= ?")
+            parametros.append(_data_iso(de))
+        if ate is not None:
+            condicoes.append("data <= ?")
+            parametros.append(_data_iso(ate))
+        if tipo is not None:
+            condicoes.append("valor > 0" if tipo.lower().startswith("e") else "valor < 0")
+        if descricao:
+            condicoes.append("descricao LIKE ?")
+            parametros.append(f"%{descricao}%")
+        return (" WHERE " + " AND ".join(condicoes)) if condicoes else "", parametros
+
+    def lancamentos(self, limite=None, **filtros):
+        """
+        Lançamentos em ordem de (banco, conta, data). Filtros: banco, conta,
+        de, ate (date, "dd/mm/aaaa" ou "aaaa-mm-dd"), execucao, tipo
+        ("Entrada"/"Saída") e descricao (trecho).
+        """
+        self.sincronizar()
+        onde, parametros = self._filtros(**filtros)
+        sql = f"SELECT {', '.join(COLUNAS)} FROM lancamentos{onde} ORDER BY banco, conta, data, fonte, linha"
+        if limite:
+            sql += f" LIMIT {int(limite)}"
+        resultado = []
+        for row in self.conexao.execute(sql, parametros):
+            lancamento = dict(row)
+            lancamento["data"] = date.fromisoformat(row["data"]) if row["data"] else None
+            resultado.append(lancamento)
+        return resultado
+
+    def totais(self, agrupar=("banco", "conta"), **filtros):
+        """Quantidade, entradas, saídas e total por grupo (banco, conta, execucao, tipo, dia, mes, ano)"""
+        self.sincronizar()
+        expressoes = [AGRUPAMENTOS[campo] for campo in agrupar]
+        onde, parametros = self._filtros(**filtros)
+        selecao = ", ".join(f"{expressao} AS {campo}" for campo, expressao in zip(agrupar, expressoes))
+        sql = (f"SELECT {selecao + ', ' if selecao else ''}COUNT(*) AS quantidade, "
+               f"ROUND(TOTAL(CASE WHEN valor > 0 THEN valor END), 2) AS entradas, "
+               f"ROUND(TOTAL(CASE WHEN valor < 0 THEN valor END), 2) AS saidas, "
+               f"ROUND(TOTAL(valor), 2) AS total FROM lancamentos{onde}")
+        if expressoes:
+            sql += f" GROUP BY {', '.join(expressoes)} ORDER BY {', '.join(expressoes)}"
+        return [dict(row) for row in self.conexao.execute(sql, parametros)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Consulta lançamentos do extrato sem abrir a planilha")
+    parser.add_argument("--saida", default=os.path.join(os.getcwd(), "extrato_ofx.xlsx"))
+    parser.add_argument("--banco")
+    parser.add_argument("--conta")
+    parser.add_argument("--de", help="data inicial (dd/mm/aaaa ou aaaa-mm-dd)")
+    parser.add_argument("--ate", help="data final (dd/mm/aaaa ou aaaa-mm-dd)")
+    parser.add_argument("--execucao", type=int)
+    parser.add_argument("--tipo", choices=["entrada", "saida"])
+    parser.add_argument("--desc", help="trecho da descrição")
+    parser.add_argument("--totais", help="agrupar por: " + ", ".join(AGRUPAMENTOS) + " (separados por vírgula)")
+    parser.add_argument("--limite", type=int, default=200)
+    args = parser.parse_args()
+
+    filtros = {"banco": args.banco, "conta": args.conta, "de": args.de, "ate": args.ate,
+               "execucao": args.execucao, "tipo": args.tipo, "descricao": args.desc}
+    with Consulta(args.saida) as consulta:
+        inicio = time.perf_counter()
+        if args.totais is not None:
+            agrupar = tuple(c.strip() for c in args.totais.split(",") if c.strip())
+            linhas = consulta.totais(agrupar, **filtros)
+            for linha in linhas:
+                grupo = " | ".join(str(linha[c]) for c in agrupar)
+                print(f"{grupo:<40} {linha['quantidade']:>7}  {linha['entradas']:>14.2f}  "
+                      f"{linha['saidas']:>14.2f}  {linha['total']:>14.2f}")
+        else:
+            linhas = consulta.lancamentos(limite=args.limite, **filtros)
+            for linha in linhas:
+                data = linha["data"].strftime("%d/%m/%Y") if linha["data"] else "sem data"
+                print(f"{data:<10}  {linha['banco']:<5} {linha['conta']:<28} "
+                      f"{linha['valor']:>12.2f}  {linha['descricao']}")
+        print(f"— {len(linhas)} linha(s) em {(time.perf_counter() - inicio) * 1000:.1f} ms")
@@ -0,0 +1,395 @@
+# ==========================================================
+# Gravação do .xlsx em paralelo (usada por main.salvar_atomico)
+# O wb.save() do openpyxl serializa as abas uma depois da outra, numa
+# thread só. Aqui o XML de cada aba é gerado em trechos de linhas, à
+# medida que as linhas são lidas: cada trecho já volta comprimido
+# (deflate com flush completo, que pode ser emendado ao seguinte) junto
+# com o CRC e o tamanho, e o processo principal só guarda os trechos
+# comprimidos e monta o zip — emenda os trechos, combina os CRCs e
+# acrescenta as partes pequenas (workbook, estilos, relações).
+# Planilha grande (mais de LINHAS_PARALELO linhas) tem os trechos
+# gerados em processos separados, num pool que fica no ar entre um save
+# e outro (ou no executor da sessão); abaixo disso, subir processos
+# custa mais do que gerar tudo aqui. Textos vão inline (inlineStr),
+# sem tabela de strings compartilhadas para sincronizar entre os
+# processos.
+#
+# Só serve para planilhas de valores, como as que este sistema grava:
+# havendo formatação (fontes, cores, larguras, células mescladas,
+# gráficos, filtros...), salvar cai para o wb.save() normal, que
+# preserva tudo. Datas saem com formato de data padrão; fórmulas são
+# mantidas.
+# ==========================================================
+
+import os
+import struct
+import time
+import zlib
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, datetime, time as hora
+from xml.sax.saxutils import escape, quoteattr
+
+from openpyxl.styles.numbers import BUILTIN_FORMATS, is_date_format
+from openpyxl.utils import get_column_letter
+from openpyxl.utils.datetime import to_excel
+
+from leitura_xlsx import celulas_diretas
+
+PROCESSOS_GRAVACAO = max(0, min(4, (os.cpu_count() or 1) - 1))  # 0 = gera os trechos no próprio processo
+LINHAS_POR_TRECHO = 25_000
+LINHAS_PARALELO = 2 * LINHAS_POR_TRECHO  # até aqui os trechos são gerados no próprio processo
+NIVEL_COMPRESSAO = 6
+
+ESTILO_DATA_HORA, ESTILO_DATA, ESTILO_HORA = 1, 2, 3  # índices em cellXfs (ver ESTILOS)
+
+XML = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+NS_PLANILHA = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+NS_RELACOES = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+
+ESTILOS = (
+    XML + f'<styleSheet xmlns="{NS_PLANILHA}">'
+    '<numFmts count="3"><numFmt numFmtId="164" formatCode="yyyy-mm-dd h:mm:ss"/>'
+    '<numFmt numFmtId="165" formatCode="yyyy-mm-dd"/><numFmt numFmtId="166" formatCode="h:mm:ss"/></numFmts>'
+    '<fonts count="1"><font><sz val="11"/><name val="Calibri"/><family val="2"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="4"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="165" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="166" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+
+class Formula(str):
+    """Conteúdo de célula de fórmula ("=A1+B1"), para o trecho saber que não é texto"""
+    __slots__ = ()
+
+
+# ==========================================================
+# Quem pode ser gravado aqui
+# ==========================================================
+def pode_gravar(wb):
+    """Planilha só de valores (sem formatação que este gravador perderia)?"""
+    if wb.write_only or len(wb.defined_names):
+        return False
+    formatos = dict(BUILTIN_FORMATS)
+    formatos.update({164 + i: f for i, f in enumerate(wb._number_formats)})
+    for estilo in wb._cell_styles:
+        if (estilo.fontId or estilo.fillId or estilo.borderId or estilo.alignmentId or estilo.protectionId
+                or estilo.quotePrefix or estilo.pivotButton):
+            return False
+        if estilo.numFmtId and not is_date_format(formatos.get(estilo.numFmtId, "")):
+            return False
+    for ws in wb.worksheets:
+        if (ws.merged_cells.ranges or ws._charts or ws._images or ws.auto_filter.ref or ws.freeze_panes
+                or len(ws.conditional_formatting) or ws.data_validations.dataValidation or ws._hyperlinks
+                or any(d.customWidth for d in ws.column_dimensions.values())
+                or any(d.customHeight for d in ws.row_dimensions.values())):
+            return False
+    return len(wb.chartsheets) == 0
+
+
+def linhas_da_aba(ws):
+    """Valores da aba, linha a linha (gerador; fórmulas como Formula), lidos direto do dicionário de células"""
+    celulas = celulas_diretas(ws)
+    if celulas is None:
+        for row in ws.iter_rows():
+            linha = [Formula(celula.value) if celula.data_type == "f" else celula.value for celula in row]
+            while linha and linha[-1] is None:
+                linha.pop()
+            yield linha
+        return
+    if not celulas:
+        return
+    colunas = range(1, ws.max_column + 1)
+    for num_linha in range(1, ws.max_row + 1):
+        linha = []
+        for num_coluna in colunas:
+            celula = celulas.get((num_linha, num_coluna))
+            if celula is None:
+                linha.append(None)
+            elif celula.data_type == "f":
+                linha.append(Formula(celula._value))
+            else:
+                linha.append(celula._value)
+        while linha and linha[-1] is None:
+            linha.pop()
+        yield linha
+
+
+# ==========================================================
+# Trecho de uma aba (roda nos processos trabalhadores)
+# ==========================================================
+def _texto(valor):
+    texto = escape(valor)
+    if texto != texto.strip() or "\n" in texto:
+        return f'<is><t xml:space="preserve">{texto}</t></is>'
+    return f"<is><t>{texto}</t></is>"
+
+
+def _celula(ref, valor):
+    classe = valor.__class__
+    if classe is str:
+        return f'<c r="{ref}" t="inlineStr">{_texto(valor)}</c>'
+    if classe is float or classe is int:
+        if valor != valor or valor in (float("inf"), float("-inf")):
+            return f'<c r="{ref}" t="inlineStr">{_texto(str(valor))}</c>'
+        return f'<c r="{ref}" t="n"><v>{valor!r}</v></c>'
+    if classe is bool:
+        return f'<c r="{ref}" t="b"><v>{int(valor)}</v></c>'
+    if classe is Formula:
+        return f'<c r="{ref}"><f>{escape(valor[1:])}</f><v></v></c>'
+    if isinstance(valor, datetime):
+        return f'<c r="{ref}" s="{ESTILO_DATA_HORA}" t="n"><v>{to_excel(valor)!r}</v></c>'
+    if isinstance(valor, date):
+        return f'<c r="{ref}" s="{ESTILO_DATA}" t="n"><v>{to_excel(valor)!r}</v></c>'
+    if isinstance(valor, hora):
+        return f'<c r="{ref}" s="{ESTILO_HORA}" t="n"><v>{to_excel(valor)!r}</v></c>'
+    if isinstance(valor, (int, float)):  # numpy, Decimal...
+        return _celula(ref, float(valor))
+    return f'<c r="{ref}" t="inlineStr">{_texto(str(valor))}</c>'
+
+
+def gerar_trecho(linhas, primeira_linha, nivel=NIVEL_COMPRESSAO):
+    """
+    XML das linhas (<row>...</row>) comprimido em deflate bruto, terminado
+    com flush completo para ser emendado a outros trechos.
+    Devolve (bytes comprimidos, crc32, tamanho descomprimido).
+    """
+    compressor = zlib.compressobj(nivel, zlib.DEFLATED, -15)
+    letras = [get_column_letter(i) for i in range(1, max(map(len, linhas), default=0) + 1)]
+    partes, crc, tamanho = [], 0, 0
+    bloco = []
+    for num_linha, linha in enumerate(linhas, start=primeira_linha):
+        if not linha:
+            continue
+        bloco.append(f'<row r="{num_linha}">')
+        # Texto vazio fica sem célula, como no wb.save (relido como None)
+        bloco.extend(_celula(f"{letras[i]}{num_linha}", valor) for i, valor in enumerate(linha)
+                     if valor is not None and valor != "")
+        bloco.append("</row>")
+        if len(bloco) > 20_000:
+            dados = "".join(bloco).encode("utf-8")
+            crc, tamanho = zlib.crc32(dados, crc), tamanho + len(dados)
+            partes.append(compressor.compress(dados))
+            bloco = []
+    dados = "".join(bloco).encode("utf-8")
+    crc, tamanho = zlib.crc32(dados, crc), tamanho + len(dados)
+    partes.append(compressor.compress(dados))
+    partes.append(compressor.flush(zlib.Z_FULL_FLUSH))
+    return b"".join(partes), crc, tamanho
+
+
+# ==========================================================
+# CRC de trechos emendados (crc32_combine do zlib)
+# ==========================================================
+def _gf2_vezes(matriz, vetor):
+    soma, i = 0, 0
+    while vetor:
+        if vetor & 1:
+            soma ^= matriz[i]
+        vetor >>= 1
+        i += 1
+    return soma
+
+
+def _gf2_quadrado(matriz):
+    return [_gf2_vezes(matriz, matriz[n]) for n in range(32)]
+
+
+def crc32_combinar(crc1, crc2, tamanho2):
+    """CRC32 de A+B a partir de crc32(A), crc32(B) e len(B)"""
+    if tamanho2 <= 0:
+        return crc1
+    impar = [0xEDB88320] + [1 << n for n in range(31)]
+    par = _gf2_quadrado(impar)
+    impar = _gf2_quadrado(par)
+    while True:
+        par = _gf2_quadrado(impar)
+        if tamanho2 & 1:
+            crc1 = _gf2_vezes(par, crc1)
+        tamanho2 >>= 1
+        if not tamanho2:
+            break
+        impar = _gf2_quadrado(par)
+        if tamanho2 & 1:
+            crc1 = _gf2_vezes(impar, crc1)
+        tamanho2 >>= 1
+        if not tamanho2:
+            break
+    return crc1 ^ crc2
+
+
+# ==========================================================
+# Zip (membros já comprimidos)
+# ==========================================================
+class _Zip:
+    def __init__(self, caminho):
+        self.arquivo = open(caminho, "wb")
+        self.central = []
+        t = time.localtime()
+        self.hora = (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2)
+        self.data = ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+
+    def membro(self, nome, comprimido, crc, tamanho):
+        if len(comprimido) >= 0xFFFFFFFF or tamanho >= 0xFFFFFFFF:
+            raise ValueError(f"{nome}: parte maior que 4 GB (zip64 não suportado)")
+        nome = nome.encode("utf-8")
+        deslocamento = self.arquivo.tell()
+        self.arquivo.write(struct.pack("<IHHHHHIIIHH", 0x04034B50, 20, 0x800, 8, self.hora, self.data,
+                                       crc, len(comprimido), tamanho, len(nome), 0))
+        self.arquivo.write(nome)
+        self.arquivo.write(comprimido)
+        self.central.append(struct.pack("<IHHHHHHIIIHHHHHII", 0x02014B50, 20, 20, 0x800, 8, self.hora, self.data,
+                                        crc, len(comprimido), tamanho, len(nome), 0, 0, 0, 0, 0, deslocamento)
+                            + nome)
+
+    def texto(self, nome, conteudo, nivel=NIVEL_COMPRESSAO):
+        dados = conteudo.encode("utf-8")
+        compressor = zlib.compressobj(nivel, zlib.DEFLATED, -15)
+        self.membro(nome, compressor.compress(dados) + compressor.flush(), zlib.crc32(dados), len(dados))
+
+    def fechar(self):
+        inicio = self.arquivo.tell()
+        for entrada in self.central:
+            self.arquivo.write(entrada)
+        tamanho = self.arquivo.tell() - inicio
+        self.arquivo.write(struct.pack("<IHHHHIIH", 0x06054B50, 0, 0, len(self.central), len(self.central),
+                                       tamanho, inicio, 0))
+        self.arquivo.flush()
+        os.fsync(self.arquivo.fileno())
+        self.arquivo.close()
+
+
+# ==========================================================
+# Gravação
+# ==========================================================
+def _partes_fixas(nomes, ativa):
+    abas = "".join(f'<sheet name={quoteattr(nome)} sheetId="{i}" r:id="rId{i}"/>'
+                   for i, nome in enumerate(nomes, start=1))
+    relacoes = "".join(f'<Relationship Id="rId{i}" Target="worksheets/sheet{i}.xml" '
+                       f'Type="{NS_RELACOES}/worksheet"/>' for i in range(1, len(nomes) + 1))
+    sobreposicoes = "".join(f'<Override PartName="/xl/worksheets/sheet{i}.xml" ContentType="application/'
+                            f'vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+                            for i in range(1, len(nomes) + 1))
+    return {
+        "[Content_Types].xml": (
+            XML + '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" ContentType="application/'
+            'vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            '<Override PartName="/xl/styles.xml" ContentType="application/'
+            'vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>' + sobreposicoes + "</Types>"),
+        "_rels/.rels": (
+            XML + '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            f'<Relationship Id="rId1" Type="{NS_RELACOES}/officeDocument" Target="xl/workbook.xml"/>'
+            "</Relationships>"),
+        "xl/workbook.xml": (
+            XML + f'<workbook xmlns="{NS_PLANILHA}" xmlns:r="{NS_RELACOES}">'
+            f'<bookViews><workbookView activeTab="{ativa}"/></bookViews><sheets>{abas}</sheets></workbook>'),
+        "xl/_rels/workbook.xml.rels": (
+            XML + '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            + relacoes + f'<Relationship Id="rId{len(nomes) + 1}" Type="{NS_RELACOES}/styles" '
+            'Target="styles.xml"/></Relationships>'),
+        "xl/styles.xml": ESTILOS,
+    }
+
+
+_pool = None  # (processos, ProcessPoolExecutor) reaproveitado entre gravações
+
+
+def _executor_gravacao(processos):
+    """Pool de gravação do módulo: sobe no primeiro save grande e fica no ar para os seguintes"""
+    global _pool
+    if _pool is None or _pool[0] != processos:
+        if _pool is not None:
+            _pool[1].shutdown()
+        _pool = (processos, ProcessPoolExecutor(max_workers=processos))
+    return _pool[1]
+
+
+def gravar_xlsx(wb, destino, processos=PROCESSOS_GRAVACAO, linhas_por_trecho=LINHAS_POR_TRECHO, executor=None):
+    """
+    Grava `wb` (só valores, ver pode_gravar) em `destino`. Com mais de
+    LINHAS_PARALELO linhas e processos > 0, os trechos vão para `executor`
+    (ou para o pool de gravação do módulo) enquanto as linhas seguintes
+    são lidas; senão são gerados aqui mesmo, em sequência.
+    """
+    global _pool
+    paralelo = processos > 0 and sum(ws.max_row for ws in wb.worksheets) > LINHAS_PARALELO
+    proprio = paralelo and executor is None
+    if proprio:
+        executor = _executor_gravacao(processos)
+    resultados = []  # (comprimido, crc, tamanho) ou o futuro dele, na ordem dos trechos
+    em_andamento = deque()
+
+    def gerar(linhas, primeira):
+        if not paralelo:
+            resultados.append(gerar_trecho(linhas, primeira))
+            return len(resultados) - 1
+        futuro = executor.submit(gerar_trecho, linhas, primeira)
+        resultados.append(futuro)
+        em_andamento.append(futuro)
+        # Poucos trechos esperando: as linhas já lidas não se acumulam no processo principal
+        while len(em_andamento) > 2 * processos:
+            em_andamento.popleft().result()
+        return len(resultados) - 1
+
+    abas = []  # (nome, max_coluna, número de linhas, [índices em resultados])
+    try:
+        for ws in wb.worksheets:
+            trechos, bloco, primeira, n_linhas = [], [], 1, 0
+            for num_linha, linha in enumerate(linhas_da_aba(ws), start=1):
+                bloco.append(linha)
+                if linha:
+                    n_linhas = num_linha
+                if len(bloco) == linhas_por_trecho:
+                    trechos.append(gerar(bloco, primeira))
+                    primeira, bloco = primeira + len(bloco), []
+            if bloco:
+                trechos.append(gerar(bloco, primeira))
+            abas.append((ws.title, ws.max_column, n_linhas, trechos))
+        resultados = [r.result() if isinstance(r, Future) else r for r in resultados]
+    except BrokenProcessPool:
+        if proprio:
+            _pool = None  # um trabalhador morreu: o próximo save sobe outro pool
+        raise
+
+    saida = _Zip(destino)
+    try:
+        for nome, conteudo in _partes_fixas([a[0] for a in abas], wb.index(wb.active) if wb.active else 0).items():
+            saida.texto(nome, conteudo)
+        for i, (_, max_coluna, n_linhas, trechos) in enumerate(abas, start=1):
+            dimensao = f"A1:{get_column_letter(max_coluna)}{n_linhas}" if n_linhas else "A1"
+            cabeca = (XML + f'<worksheet xmlns="{NS_PLANILHA}" xmlns:r="{NS_RELACOES}">'
+                      f'<dimension ref="{dimensao}"/><sheetData>').encode("utf-8")
+            pe = b"</sheetData></worksheet>"
+            compressor = zlib.compressobj(NIVEL_COMPRESSAO, zlib.DEFLATED, -15)
+            partes = [compressor.compress(cabeca) + compressor.flush(zlib.Z_FULL_FLUSH)]
+            crc, tamanho = zlib.crc32(cabeca), len(cabeca)
+            for t in trechos:
+                comprimido, crc_trecho, tamanho_trecho = resultados[t]
+                partes.append(comprimido)
+                crc = crc32_combinar(crc, crc_trecho, tamanho_trecho)
+                tamanho += tamanho_trecho
+            compressor = zlib.compressobj(NIVEL_COMPRESSAO, zlib.DEFLATED, -15)
+            partes.append(compressor.compress(pe) + compressor.flush())
+            crc, tamanho = crc32_combinar(crc, zlib.crc32(pe), len(pe)), tamanho + len(pe)
+            saida.membro(f"xl/worksheets/sheet{i}.xml", b"".join(partes), crc, tamanho)
+    finally:
+        saida.fechar()
+
+
+def salvar_xlsx(wb, destino, processos=PROCESSOS_GRAVACAO, executor=None):
+    """gravar_xlsx quando a planilha é só de valores; senão o wb.save() do openpyxl"""
+    if pode_gravar(wb):
+        gravar_xlsx(wb, destino, processos, executor=executor)
+    else:
+        wb.save(destino)
@@ -4,7 +4,7 @@
 # Data da última atualização: 19/09/2025
 #
 # Funcionalidades:
-#   ✅ Importa múltiplos arquivos OFX/PDF
+#   ✅ Importa múltiplos arquivos OFX/PDF/CSV (leitores.py)
 #   ✅ Evita duplicação (FITID no OFX, Data+NrDoc+MEMO no PDF)
 #   ✅ Lançamento manual via formulário Tkinter
 #   ✅ Opção de desfazer execução
@@ -16,16 +16,14 @@
 #   pip install ofxtools openpyxl pdfplumber
 # ==========================================================
 
-from ofxtools.Parser import OFXTree
 import openpyxl
 import os
 import tkinter as tk
 from tkinter import filedialog, messagebox, simpledialog
 from datetime import datetime
 import logging
-import pdfplumber
-import re
 import uuid
+from leitores import FormatoDesconhecido, extensoes_suportadas, ler_arquivo
 
 # ==========================================================
 # Configuração do LOG externo
@@ -38,57 +36,6 @@ logging.basicConfig(
     encoding="utf-8"
 )
 
-def safe_get(obj, attr, default=None):
-    """Evita KeyError / AttributeError ao acessar atributos"""
-    try:
-        return getattr(obj, attr)
-    except (KeyError, AttributeError):
-        return default
-
-# ==========================================================
-# Funções auxiliares PDF
-# ==========================================================
-def parse_valor(valor_str: str) -> float:
-    if not valor_str:
-        return 0.0
-    valor_str = valor_str.strip()
-    tipo = valor_str[-1]  # último caractere (C/D)
-    numero = valor_str[:-1].strip().replace(".", "").replace(",", ".")
-    try:
-        valor = float(numero)
-    except ValueError:
-        valor = 0.0
-    if tipo.upper() == "D":
-        return -valor
-    return valor
-
-def parse_pdf(caminho_pdf):
-    dados = []
-    padrao = re.compile(r"(\d{2}/\d{2}/\d{4})\s+(\S+)?\s+(.*?)\s+([\d\.,]+ [CD])\s+([\d\.,]+ [CD])")
-
-    with pdfplumber.open(caminho_pdf) as pdf:
-        for pagina in pdf.pages:
-            tabela = pagina.extract_table()
-            if tabela:
-                for linha in tabela[1:]:
-                    if len(linha) >= 5:
-                        data, nr_doc, historico, valor_str, saldo_str = linha[:5]
-                        valor = parse_valor(valor_str)
-                        saldo = parse_valor(saldo_str)
-                        dados.append([data, nr_doc, historico, valor, saldo])
-            else:
-                texto = pagina.extract_text()
-                if not texto:
-                    continue
-                for linha in texto.split("\n"):
-                    m = padrao.match(linha)
-                    if m:
-                        data, nr_doc, historico, valor_str, saldo_str = m.groups()
-                        valor = parse_valor(valor_str)
-                        saldo = parse_valor(saldo_str)
-                        dados.append([data, nr_doc or "", historico.strip(), valor, saldo])
-    return dados
-
 # ==========================================================
 # Função: desfazer execução existente
 # ==========================================================
@@ -114,7 +61,15 @@ def desfazer_execucao(caminho_excel):
 # ==========================================================
 # Função: atualizar aba de bancos
 # ==========================================================
-def atualizar_bancos(wb, ws):
+def saldos_por_conta(ws):
+    saldos = {}
+    for row in ws.iter_rows(min_row=2, values_only=True):
+        if row and row[0]:  # Data preenchida
+            banco, conta, saldo = row[5], row[6], row[4]
+            saldos[(banco, conta)] = saldo  # pega sempre o último saldo
+    return saldos
+
+def atualizar_bancos(wb, ws, saldos=None):
     if "BANCOS" in wb.sheetnames:
         ws_bancos = wb["BANCOS"]
         ws_bancos.delete_rows(2, ws_bancos.max_row)  # limpa os dados antigos
@@ -122,12 +77,8 @@ def atualizar_bancos(wb, ws):
         ws_bancos = wb.create_sheet("BANCOS")
         ws_bancos.append(["Banco", "Conta", "Saldo Final (R$)"])
 
-    saldos = {}
-    for row in ws.iter_rows(min_row=2, values_only=True):
-        if row and row[0]:  # Data preenchida
-            banco, conta, saldo = row[5], row[6], row[4]
-            chave = (banco, conta)
-            saldos[chave] = saldo  # pega sempre o último saldo
+    if saldos is None:  # sem cache: varre o extrato inteiro
+        saldos = saldos_por_conta(ws)
 
     total = 0
     for (banco, conta), saldo in saldos.items():
@@ -141,8 +92,8 @@ def atualizar_bancos(wb, ws):
 # ==========================================================
 def importar_ofx_pdf(saida):
     caminhos = filedialog.askopenfilenames(
-        title="Selecione um ou mais arquivos OFX ou PDF",
-        filetypes=[("Arquivos OFX/PDF", "*.ofx *.pdf"), ("Todos os arquivos", "*.*")]
+        title="Selecione um ou mais arquivos OFX, PDF ou CSV",
+        filetypes=[("Extratos", " ".join("*" + e for e in extensoes_suportadas())), ("Todos os arquivos", "*.*")]
     )
     if not caminhos:
         messagebox.showerror("Erro", "Nenhum arquivo foi selecionado.")
@@ -173,6 +124,9 @@ def importar_ofx_pdf(saida):
             "Adicionados", "Ignorados", "Entradas (R$)", "Saídas (R$)", "Saldo Final (R$)", "Status"
         ])
 
+    # Chaves vistas nesta importação também contam (mesmo arquivo escolhido duas vezes)
+    fitids_existentes = set(r[-1] for r in ws.iter_rows(min_row=2, values_only=True) if r and r[-1])
+
     for caminho_arquivo in caminhos:
         print(f"📂 Processando arquivo: {os.path.basename(caminho_arquivo)}")
         execucao_atual = ultima_execucao + 1
@@ -181,70 +135,33 @@ def importar_ofx_pdf(saida):
         processados, ignorados, saldo = 0, 0, 0
         data_processo = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
 
-        fitids_existentes = set(r[-1] for r in ws.iter_rows(min_row=2, values_only=True) if r and r[-1])
-
-        if caminho_arquivo.lower().endswith(".ofx"):
-            # ---- Modo OFX ----
-            tree = OFXTree()
-            tree.parse(caminho_arquivo)
-            ofx = tree.convert()
-            stmt = None
-            transacoes = []
-            if safe_get(ofx, "bankmsgsrsv1"):
-                statements = safe_get(ofx.bankmsgsrsv1, "statements")
-                if statements and len(statements) > 0:
-                    stmt = statements[0]
-                    transacoes = safe_get(stmt, "banktranlist", [])
-            if not transacoes and safe_get(ofx, "creditcardmsgsrsv1"):
-                ccstatement = safe_get(ofx.creditcardmsgsrsv1, "ccstatement")
-                if ccstatement:
-                    stmt = ccstatement[0].ccstmtrs
-                    transacoes = safe_get(stmt, "banktranlist", [])
-            if not transacoes:
-                messagebox.showerror("Erro", "Não foi possível localizar lançamentos neste OFX.")
+        # O leitor (OFX, PDF, CSV...) vem do registro de leitores.py
+        try:
+            lote = ler_arquivo(caminho_arquivo)
+        except FormatoDesconhecido as e:
+            messagebox.showerror("Erro", str(e))
+            continue
+        if not lote["transacoes"]:
+            messagebox.showerror("Erro", f"Não foi possível localizar lançamentos em {os.path.basename(caminho_arquivo)}.")
+            continue
+        banco_id, account_id = lote["banco_id"], lote["account_id"]
+
+        for trn in lote["transacoes"]:
+            if lote["origem"] == "OFX":
+                # ---- OFX: FITID do banco ----
+                chave = trn.fitid
+            else:
+                # ---- PDF/CSV: sem FITID, chave Data+NrDoc+Descrição ----
+                chave = f"{trn.data_str}-{trn.nr_doc}-{trn.descricao}"
+                trn.fitid = f"MANUAL-{execucao_atual}-{uuid.uuid4().int>>96}"
+            if chave and chave in fitids_existentes:
+                ignorados += 1
                 continue
+            saldo += trn.valor
 
-            banco_id = safe_get(safe_get(stmt, "bankacctfrom"), "bankid", "N/A")
-            account_id = safe_get(safe_get(stmt, "bankacctfrom"), "acctid", "N/A")
-            account_type = safe_get(safe_get(stmt, "bankacctfrom"), "accttype", "N/A")
-
-            for trn in transacoes:
-                fitid = safe_get(trn, "fitid")
-                if fitid and fitid in fitids_existentes:
-                    ignorados += 1
-                    continue
-                valor = float(trn.trnamt)
-                saldo += valor
-                tipo = "Entrada" if valor > 0 else "Saída"
-                descricao = trn.name or "Sem descrição"
-                trntype = safe_get(trn, "trntype", "N/A")
-                memo = safe_get(trn, "memo", "")
-                nr_doc = ""
-                data = trn.dtposted.strftime("%d/%m/%Y")
-
-                ws.append([data, tipo, descricao, valor, saldo, banco_id, account_id, execucao_atual, trntype, nr_doc, memo, fitid])
-                processados += 1
-                if fitid:
-                    fitids_existentes.add(fitid)
-
-        else:
-            # ---- Modo PDF ----
-            dados = parse_pdf(caminho_arquivo)
-            banco_id, account_id = "CEF", "N/A"
-
-            for data_mov, nr_doc, historico, valor, saldo_mov in dados:
-                chave = f"{data_mov}-{nr_doc}-{historico}"
-                if chave in fitids_existentes:
-                    ignorados += 1
-                    continue
-                saldo += valor
-                tipo = "Entrada" if valor > 0 else "Saída"
-                trntype = "CREDIT" if valor > 0 else "DEBIT"
-                memo = historico
-                fitid = f"MANUAL-{execucao_atual}-{uuid.uuid4().int>>96}"
-
-                ws.append([data_mov, tipo, historico, valor, saldo, banco_id, account_id, execucao_atual, trntype, nr_doc, memo, fitid])
-                processados += 1
+            ws.append(trn.linha_planilha(saldo, banco_id, account_id, execucao_atual))
+            processados += 1
+            if chave:
                 fitids_existentes.add(chave)
 
         # Registrar log
@@ -279,27 +196,53 @@ def lancamento_manual(saida):
 
     wb = openpyxl.load_workbook(saida)
     ws = wb.active
-    execucoes = [int(row[7]) for row in ws.iter_rows(min_row=2, values_only=True) if row and isinstance(row[7], int)]
+    # Uma única varredura: última execução + cache de saldos por (banco, conta)
+    execucoes, saldos = [], {}
+    for row in ws.iter_rows(min_row=2, values_only=True):
+        if not row:
+            continue
+        if isinstance(row[7], int):
+            execucoes.append(row[7])
+        if row[0]:
+            saldos[(row[5], row[6])] = row[4]
     execucao_atual = max(execucoes) + 1 if execucoes else 1
+    fila = []
 
-    def salvar():
+    def adicionar():
         data = entry_data.get()
         tipo = var_tipo.get()
         descricao = entry_desc.get()
-        valor = float(entry_valor.get())
+        try:
+            valor = float(entry_valor.get().replace(",", "."))
+        except ValueError:
+            messagebox.showerror("Erro", "Valor inválido.")
+            return False
         nr_doc = entry_nr_doc.get()
         memo = entry_memo.get()
 
-        saldo = sum(r[3] for r in ws.iter_rows(min_row=2, values_only=True) if r and isinstance(r[3], (int, float)))
-        saldo += valor if tipo == "Entrada" else -valor
+        banco_id, account_id = "MANUAL", "N/A"
+        saldo = (saldos.get((banco_id, account_id)) or 0) + (valor if tipo == "Entrada" else -valor)
+        saldos[(banco_id, account_id)] = saldo
         trntype = "CREDIT" if tipo == "Entrada" else "DEBIT"
         fitid = f"MANUAL-{execucao_atual}-{uuid.uuid4().int>>96}"
-        banco_id, account_id = "MANUAL", "N/A"
 
-        ws.append([data, tipo, descricao, valor if tipo == "Entrada" else -valor, saldo, banco_id, account_id, execucao_atual, trntype, nr_doc, memo, fitid])
-        atualizar_bancos(wb, ws)
+        fila.append([data, tipo, descricao, valor if tipo == "Entrada" else -valor, saldo, banco_id, account_id, execucao_atual, trntype, nr_doc, memo, fitid])
+        lbl_fila.config(text=f"Na fila: {len(fila)}")
+        for entry in (entry_desc, entry_valor, entry_nr_doc, entry_memo):
+            entry.delete(0, tk.END)
+        return True
+
+    def salvar():
+        if entry_valor.get().strip() and not adicionar():
+            return
+        if not fila:
+            messagebox.showwarning("Aviso", "Nenhum lançamento para salvar.")
+            return
+        for linha in fila:
+            ws.append(linha)
+        atualizar_bancos(wb, ws, saldos)
         wb.save(saida)
-        messagebox.showinfo("Sucesso", "Lançamento manual adicionado!")
+        messagebox.showinfo("Sucesso", f"{len(fila)} lançamento(s) manual(is) adicionado(s)!")
         root.destroy()
 
     root = tk.Tk()
@@ -330,7 +273,10 @@ def lancamento_manual(saida):
     entry_memo = tk.Entry(root)
     entry_memo.grid(row=5, column=1)
 
-    tk.Button(root, text="Salvar", command=salvar).grid(row=6, column=0, columnspan=2)
+    tk.Button(root, text="Adicionar à fila", command=adicionar).grid(row=6, column=0)
+    tk.Button(root, text="Salvar", command=salvar).grid(row=6, column=1)
+    lbl_fila = tk.Label(root, text="Na fila: 0")
+    lbl_fila.grid(row=7, column=0, columnspan=2)
 
     root.mainloop()
 
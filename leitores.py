@@ -0,0 +1,477 @@
+# ==========================================================
+# Leitores de extrato: registro de formatos/bancos
+# Cada leitor declara um teste barato sobre os primeiros e os últimos
+# KB do arquivo (reconhece) e a leitura completa (ler). identificar()
+# escolhe o leitor sem abrir o arquivo inteiro nem tentar parsers um
+# a um; ler_arquivo() devolve o lote normalizado que o pipeline de
+# main.py grava na planilha.
+#
+# Banco/formato novo: escrever uma subclasse de Leitor e decorá-la com
+# @registrar — o laço de importação não muda.
+#
+# Arquivos .zip/.tar.gz entram como uma lista de membros
+# ("extratos.zip::agosto/cef.pdf"), lidos direto da memória.
+# ==========================================================
+
+import io
+import logging
+import os
+import re
+import tarfile
+import zipfile
+
+from ofxtools.Parser import OFXTree
+
+from cache_pdf import abrir_pdf
+from transacao import LoteTransacoes, Transacao, data_br
+
+TAMANHO_AMOSTRA = 4096  # bytes lidos do início e do fim do arquivo
+
+LEITORES = []
+
+
+class FormatoDesconhecido(ValueError):
+    """Nenhum leitor registrado reconhece o arquivo"""
+
+
+def registrar(classe):
+    """Decorador: registra o leitor. Leitores genéricos (fallback) são testados por último."""
+    LEITORES.append(classe())
+    LEITORES.sort(key=lambda leitor: leitor.generico)
+    return classe
+
+
+class Amostra:
+    """Início e fim do arquivo, já lidos, para os testes de reconhecimento"""
+
+    __slots__ = ("caminho", "extensao", "cabeca", "cauda")
+
+    def __init__(self, caminho, dados=None):
+        self.caminho = caminho
+        self.extensao = os.path.splitext(caminho)[1].lower()
+        if dados is not None:  # membro de arquivo compactado, já em memória
+            self.cabeca = dados[:TAMANHO_AMOSTRA].lstrip(b"\xef\xbb\xbf").lstrip()
+            self.cauda = dados[-TAMANHO_AMOSTRA:] if len(dados) > TAMANHO_AMOSTRA else b""
+            return
+        with open(caminho, "rb") as f:
+            self.cabeca = f.read(TAMANHO_AMOSTRA)
+            f.seek(0, os.SEEK_END)
+            tamanho = f.tell()
+            if tamanho > TAMANHO_AMOSTRA:
+                f.seek(max(TAMANHO_AMOSTRA, tamanho - TAMANHO_AMOSTRA))
+                self.cauda = f.read()
+            else:
+                self.cauda = b""
+        # BOM e espaços antes do conteúdo não contam
+        self.cabeca = self.cabeca.lstrip(b"\xef\xbb\xbf").lstrip()
+
+    def texto(self):
+        """Início do arquivo como texto (CSV/OFX); caracteres inválidos viram �"""
+        try:
+            return self.cabeca.decode("utf-8")
+        except UnicodeDecodeError:
+            return self.cabeca.decode("cp1252", errors="replace")
+
+
+class Leitor:
+    nome = ""
+    origem = ""        # "OFX", "PDF", "CSV": vai para o lote e para o prefixo do FITID gerado
+    extensoes = ()     # para os filtros de diálogo/monitoramento
+    generico = False   # True = só se nenhum leitor específico reconhecer
+
+    def reconhece(self, amostra):
+        raise NotImplementedError
+
+    def ler(self, caminho_arquivo, dados=None):
+        """
+        Devolve o lote: arquivo, origem, banco_id, account_id, account_type,
+        transacoes, saldo_banco. `dados` traz o conteúdo quando ele já está
+        em memória (membro de .zip/.tar.gz); senão o leitor abre o caminho.
+        """
+        raise NotImplementedError
+
+
+def abrir(caminho_arquivo, dados=None):
+    """Caminho ou arquivo em memória, conforme o conteúdo já tenha sido lido"""
+    return io.BytesIO(dados) if dados is not None else caminho_arquivo
+
+
+def identificar(caminho_arquivo, dados=None):
+    amostra = Amostra(caminho_arquivo, dados)
+    for leitor in LEITORES:
+        if leitor.reconhece(amostra):
+            return leitor
+    raise FormatoDesconhecido(f"Formato não reconhecido: {os.path.basename(caminho_arquivo)}")
+
+
+def ler_arquivo(caminho_arquivo, dados=None):
+    """
+    Lê um arquivo de extrato e devolve o lote normalizado (lista de Transacao),
+    sem tocar na planilha; o resultado é serializável para poder voltar de
+    um processo trabalhador. `caminho_arquivo` pode ser um membro de
+    arquivo compactado ("x.zip::membro.ofx").
+    """
+    if dados is None and SEPARADOR_MEMBRO in caminho_arquivo:
+        dados = ler_membro(caminho_arquivo)
+    leitor = identificar(caminho_arquivo, dados)
+    lote = leitor.ler(caminho_arquivo, dados)
+    lote["transacoes"] = LoteTransacoes(lote["transacoes"])  # volta do processo trabalhador em colunas
+    lote["leitor"] = leitor.nome
+    return lote
+
+
+def extensoes_suportadas():
+    extensoes = []
+    for leitor in LEITORES:
+        extensoes += [e for e in leitor.extensoes if e not in extensoes]
+    return tuple(extensoes)
+
+
+# ==========================================================
+# Helpers
+# ==========================================================
+def safe_get(obj, attr, default=None):
+    """Evita KeyError / AttributeError ao acessar atributos"""
+    try:
+        return getattr(obj, attr)
+    except (KeyError, AttributeError):
+        return default
+
+
+def parse_valor(valor_str: str) -> float:
+    if not valor_str:
+        return 0.0
+    valor_str = valor_str.strip()
+    tipo = valor_str[-1]  # último caractere (C/D)
+    numero = valor_str[:-1].strip().replace(".", "").replace(",", ".")
+    try:
+        valor = float(numero)
+    except ValueError:
+        valor = 0.0
+    if tipo.upper() == "D":
+        return -valor
+    return valor
+
+
+def valor_br(texto):
+    """"-1.234,56" -> -1234.56"""
+    return float(texto.strip().replace(".", "").replace(",", "."))
+
+
+# ==========================================================
+# OFX (SGML 1.x e XML 2.x) — ofxtools lê as duas versões
+# ==========================================================
+def ler_ofx(caminho_arquivo):
+    tree = OFXTree()
+    tree.parse(caminho_arquivo)
+    ofx = tree.convert()
+    stmt, transacoes = None, []
+    if safe_get(ofx, "bankmsgsrsv1"):
+        statements = safe_get(ofx.bankmsgsrsv1, "statements")
+        if statements and len(statements) > 0:
+            stmt = statements[0]
+            transacoes = safe_get(stmt, "banktranlist", [])
+    if not transacoes and safe_get(ofx, "creditcardmsgsrsv1"):
+        ccstatement = safe_get(ofx.creditcardmsgsrsv1, "ccstatement")
+        if ccstatement:
+            stmt = ccstatement[0].ccstmtrs
+            transacoes = safe_get(stmt, "banktranlist", [])
+    return stmt, transacoes or []
+
+
+class LeitorOFX(Leitor):
+    origem = "OFX"
+    extensoes = (".ofx",)
+
+    def ler(self, caminho_arquivo, dados=None):
+        stmt, trns = ler_ofx(abrir(caminho_arquivo, dados))
+        conta = safe_get(stmt, "bankacctfrom")
+        ledgerbal = safe_get(stmt, "ledgerbal")
+        saldo_banco = None
+        if ledgerbal is not None and ledgerbal.balamt is not None:
+            saldo_banco = (ledgerbal.dtasof.date(), float(ledgerbal.balamt))
+        return {
+            "arquivo": caminho_arquivo, "origem": self.origem,
+            "banco_id": safe_get(conta, "bankid", "N/A"),
+            "account_id": safe_get(conta, "acctid", "N/A"),
+            "account_type": safe_get(conta, "accttype", "N/A"),
+            "transacoes": [Transacao.de_ofx(trn) for trn in trns],
+            "saldo_banco": saldo_banco,
+        }
+
+
+@registrar
+class LeitorOFXSGML(LeitorOFX):
+    nome = "OFX 1.x (SGML)"
+
+    def reconhece(self, amostra):
+        return amostra.cabeca.startswith(b"OFXHEADER:")
+
+
+@registrar
+class LeitorOFXXML(LeitorOFX):
+    nome = "OFX 2.x (XML)"
+
+    def reconhece(self, amostra):
+        return amostra.cabeca.startswith(b"<?xml") and (b"<?OFX" in amostra.cabeca or b"<OFX>" in amostra.cabeca)
+
+
+# ==========================================================
+# PDF da CEF (extrato do app/internet banking, JasperReports)
+# ==========================================================
+# "Conta: 03088 / 1288 / 000752785312 - 4" no cabeçalho do extrato CEF
+PADRAO_CONTA_CEF = re.compile(r"Conta:\s*([\d][\d /-]*\d)")
+
+
+def ler_pdf(caminho_pdf):
+    """Extrai (conta, lançamentos) de um extrato PDF da CEF"""
+    dados = []
+    conta = "N/A"
+    padrao = re.compile(r"(\d{2}/\d{2}/\d{4})\s+(\S+)?\s+(.*?)\s+([\d\.,]+ [CD])\s+([\d\.,]+ [CD])")
+
+    # Texto e tabela de cada página vêm do cache (cache_pdf.py) quando o PDF já foi lido
+    with abrir_pdf(caminho_pdf) as pdf:
+        for pagina in pdf.pages:
+            texto = None
+            if conta == "N/A":
+                texto = pagina.extract_text() or ""
+                m = PADRAO_CONTA_CEF.search(texto)
+                if m:
+                    conta = re.sub(r"\s+", "", m.group(1))
+            tabela = pagina.extract_table()
+            if tabela:
+                for linha in tabela[1:]:
+                    if len(linha) >= 5:
+                        data, nr_doc, historico, valor_str, saldo_str = linha[:5]
+                        data = data_br(data)
+                        if data is None:  # cabeçalho repetido / linha de saldo anterior
+                            continue
+                        valor = parse_valor(valor_str)
+                        saldo = parse_valor(saldo_str)
+                        dados.append(Transacao(data, valor, historico, None, nr_doc or "", historico,
+                                               saldo_extrato=saldo))
+            else:
+                if texto is None:
+                    texto = pagina.extract_text()
+                if not texto:
+                    continue
+                for linha in texto.split("\n"):
+                    m = padrao.match(linha)
+                    if m:
+                        data, nr_doc, historico, valor_str, saldo_str = m.groups()
+                        data = data_br(data)
+                        if data is None:  # ex.: 31/02/2025
+                            logging.warning(f"PDF: linha com data inválida ignorada: {linha.strip()}")
+                            continue
+                        valor = parse_valor(valor_str)
+                        saldo = parse_valor(saldo_str)
+                        historico = historico.strip()
+                        dados.append(Transacao(data, valor, historico, None, nr_doc or "", historico,
+                                               saldo_extrato=saldo))
+    return conta, dados
+
+
+def parse_pdf(caminho_pdf):
+    """Extrai lançamentos (Transacao) de um extrato PDF da CEF"""
+    return ler_pdf(caminho_pdf)[1]
+
+
+@registrar
+class LeitorPDFCEF(Leitor):
+    nome = "PDF CEF"
+    origem = "PDF"
+    extensoes = (".pdf",)
+    # O produtor fica no dicionário /Info, que o JasperReports grava no fim do arquivo
+    MARCAS = (b"extratogeralmobile", b"CAIXA ECON")
+
+    def reconhece(self, amostra):
+        if not amostra.cabeca.startswith(b"%PDF"):
+            return False
+        return any(marca in amostra.cabeca or marca in amostra.cauda for marca in self.MARCAS)
+
+    def ler(self, caminho_arquivo, dados=None):
+        conta, transacoes = ler_pdf(abrir(caminho_arquivo, dados))
+        saldo_banco = None
+        if transacoes and transacoes[-1].data and transacoes[-1].saldo_extrato is not None:
+            saldo_banco = (transacoes[-1].data, transacoes[-1].saldo_extrato)
+        return {
+            "arquivo": caminho_arquivo, "origem": self.origem,
+            "banco_id": "CEF", "account_id": conta, "account_type": "N/A",
+            "transacoes": transacoes,
+            "saldo_banco": saldo_banco,
+        }
+
+
+@registrar
+class LeitorPDFGenerico(LeitorPDFCEF):
+    """PDF sem marca conhecida: lido no layout da CEF, como sempre foi feito"""
+    nome = "PDF (layout CEF)"
+    generico = True
+
+    def reconhece(self, amostra):
+        return amostra.cabeca.startswith(b"%PDF")
+
+    def ler(self, caminho_arquivo, dados=None):
+        logging.warning(f"{nome_exibicao(caminho_arquivo)}: PDF sem banco identificado, lido no layout da CEF")
+        return super().ler(caminho_arquivo, dados)
+
+
+# ==========================================================
+# CSV do Banco Inter (exportação do extrato da conta corrente)
+#   Extrato Conta Corrente
+#   Conta ;12345678
+#   Período ;01/08/2025 a 31/08/2025
+#   Saldo ;1.234,56
+#
+#   Data Lançamento;Histórico;Descrição;Valor;Saldo
+#   01/08/2025;Pix enviado ;Fulano;-50,00;1.184,56
+# ==========================================================
+@registrar
+class LeitorCSVInter(Leitor):
+    nome = "CSV Inter"
+    origem = "CSV"
+    extensoes = (".csv",)
+    CABECALHO = "Data Lançamento;Histórico;Descrição;Valor;Saldo"
+
+    def reconhece(self, amostra):
+        return self.CABECALHO in amostra.texto().replace(" ;", ";")
+
+    def ler(self, caminho_arquivo, dados=None):
+        conteudo = dados
+        if conteudo is None:
+            with open(caminho_arquivo, "rb") as f:
+                conteudo = f.read()
+        try:
+            texto = conteudo.decode("utf-8-sig")
+        except UnicodeDecodeError:
+            texto = conteudo.decode("cp1252", errors="replace")
+
+        conta, transacoes, no_extrato = "N/A", [], False
+        for linha in texto.splitlines():
+            campos = [c.strip() for c in linha.split(";")]
+            if not no_extrato:
+                if campos[0] == "Conta" and len(campos) > 1:
+                    conta = campos[1]
+                elif ";".join(campos).startswith(self.CABECALHO):
+                    no_extrato = True
+                continue
+            if len(campos) < 5:
+                continue
+            data = data_br(campos[0])
+            if data is None:
+                continue
+            historico, descricao = campos[1], campos[2]
+            transacoes.append(Transacao(data, valor_br(campos[3]), descricao or historico, None, "",
+                                        historico, saldo_extrato=valor_br(campos[4]) if campos[4] else None))
+
+        # O Inter exporta do mais recente para o mais antigo
+        saldo_banco = None
+        if transacoes:
+            recente = transacoes[0] if transacoes[0].data >= transacoes[-1].data else transacoes[-1]
+            if recente.saldo_extrato is not None:
+                saldo_banco = (recente.data, recente.saldo_extrato)
+        return {
+            "arquivo": caminho_arquivo, "origem": self.origem,
+            "banco_id": "077", "account_id": conta, "account_type": "N/A",
+            "transacoes": transacoes,
+            "saldo_banco": saldo_banco,
+        }
+
+
+# ==========================================================
+# Arquivos compactados (.zip, .tar.gz)
+# Cada membro vira uma "fonte" com nome "arquivo.zip::pasta/membro.ofx";
+# o conteúdo é lido para a memória e passado ao leitor, sem extrair
+# nada para o disco.
+# ==========================================================
+SEPARADOR_MEMBRO = "::"
+EXTENSOES_COMPACTADAS = (".zip", ".tar.gz", ".tgz")
+
+
+def eh_compactado(caminho):
+    return caminho.lower().endswith(EXTENSOES_COMPACTADAS)
+
+
+def separar_membro(fonte):
+    """"x.zip::a/b.ofx" -> ("x.zip", "a/b.ofx"); arquivo comum -> (fonte, None)"""
+    if SEPARADOR_MEMBRO in fonte:
+        arquivo, membro = fonte.split(SEPARADOR_MEMBRO, 1)
+        return arquivo, membro
+    return fonte, None
+
+
+def nome_exibicao(fonte):
+    """Nome para o LOG: cef.pdf ou extratos.zip::agosto/cef.pdf"""
+    arquivo, membro = separar_membro(fonte)
+    nome = os.path.basename(arquivo)
+    return f"{nome}{SEPARADOR_MEMBRO}{membro}" if membro else nome
+
+
+def _membro_util(nome):
+    base = os.path.basename(nome)
+    return (not nome.endswith("/") and not nome.startswith("__MACOSX/") and not base.startswith(".")
+            and base.lower().endswith(extensoes_suportadas()))
+
+
+def listar_membros(caminho):
+    """Membros com extensão de extrato, na ordem em que estão no arquivo compactado"""
+    if caminho.lower().endswith(".zip"):
+        with zipfile.ZipFile(caminho) as zf:
+            return [i.filename for i in zf.infolist() if not i.is_dir() and _membro_util(i.filename)]
+    with tarfile.open(caminho, "r:*") as tf:
+        return [m.name for m in tf.getmembers() if m.isfile() and _membro_util(m.name)]
+
+
+def expandir(arquivos):
+    """Troca cada .zip/.tar.gz da lista pelas fontes dos seus membros"""
+    fontes = []
+    for caminho in arquivos:
+        if eh_compactado(caminho):
+            fontes += [f"{caminho}{SEPARADOR_MEMBRO}{membro}" for membro in listar_membros(caminho)]
+        else:
+            fontes.append(caminho)
+    return fontes
+
+
+def ler_membro(fonte):
+    arquivo, membro = separar_membro(fonte)
+    if arquivo.lower().endswith(".zip"):
+        with zipfile.ZipFile(arquivo) as zf:
+            return zf.read(membro)
+    with tarfile.open(arquivo, "r:*") as tf:
+        return tf.extractfile(membro).read()
+
+
+def carregar_fontes(fontes):
+    """
+    Gera (fonte, dados) na ordem de `fontes`; dados é None para arquivo comum
+    (o leitor abre o caminho) e o conteúdo do membro para arquivo compactado.
+    Cada arquivo compactado é aberto uma vez só e, no .tar.gz, percorrido em
+    sequência (o gzip não tem acesso aleatório).
+    """
+    zips, tars = {}, {}  # caminho -> ZipFile / (TarFile em modo stream, iterador de membros)
+    try:
+        for fonte in fontes:
+            arquivo, membro = separar_membro(fonte)
+            if membro is None:
+                yield fonte, None
+            elif arquivo.lower().endswith(".zip"):
+                if arquivo not in zips:
+                    zips[arquivo] = zipfile.ZipFile(arquivo)
+                yield fonte, zips[arquivo].read(membro)
+            else:
+                if arquivo not in tars:
+                    tf = tarfile.open(arquivo, "r|*")
+                    tars[arquivo] = (tf, iter(tf))
+                tf, membros = tars[arquivo]
+                for info in membros:
+                    if info.name == membro:
+                        yield fonte, tf.extractfile(info).read()
+                        break
+                else:
+                    raise FileNotFoundError(f"{membro} não encontrado em {arquivo}")
+    finally:
+        for zf in zips.values():
+            zf.close()
+        for tf, _ in tars.values():
+            tf.close()
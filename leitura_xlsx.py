@@ -0,0 +1,252 @@
+# ==========================================================
+# Leitura de planilhas .xlsx com motor plugável
+# Abrir o extrato com openpyxl é o passo mais lento em planilhas
+# grandes: o XML é interpretado em Python, célula por célula. Aqui a
+# leitura fica atrás de uma interface mínima (a do openpyxl em modo
+# read_only: sheetnames, worksheets, wb[nome], iter_rows(values_only=True),
+# close), com dois motores:
+#   - "calamine" (pacote python-calamine, em Rust), usado se instalado
+#   - "openpyxl", sempre disponível (padrão quando não há outro)
+# Os dois devolvem as mesmas linhas: célula vazia -> None, número
+# inteiro -> int, data -> datetime, como o openpyxl.
+# Para forçar um motor: variável de ambiente EXTRATO_LEITOR_XLSX=openpyxl.
+#
+# carregar_editavel monta o Workbook do openpyxl (para alterar e salvar)
+# a partir das linhas lidas pelo motor rápido. Como na compactação, só
+# os valores são mantidos (sem formatação); planilha com fórmulas é
+# aberta pelo openpyxl, que as preserva.
+#
+# celulas_diretas/ultima_linha: acesso rápido às células de uma aba do
+# openpyxl (ws._cells, ws._current_row). São atributos privados: só são
+# usados nas versões do openpyxl conferidas (VERSOES_CELULAS_DIRETAS);
+# nas outras, quem chama cai na API pública (iter_rows, max_row).
+# ==========================================================
+
+import logging
+import os
+import re
+import zipfile
+from datetime import date, datetime
+from itertools import chain, repeat
+
+import openpyxl
+from openpyxl.cell.cell import Cell
+
+VARIAVEL_MOTOR = "EXTRATO_LEITOR_XLSX"
+MOTORES = {}  # nome -> classe, na ordem de preferência
+
+_FORMULA = re.compile(rb"<(?:\w+:)?f[ >/]")
+
+VERSOES_CELULAS_DIRETAS = ((2, 6), (3, 1))  # faixa (inclusive) em que ws._cells/ws._current_row foram conferidos
+
+
+# ==========================================================
+# Acesso direto às células do openpyxl
+# ==========================================================
+def _versao(texto):
+    return tuple(int(parte) for parte in re.findall(r"\d+", texto)[:2])
+
+
+CELULAS_DIRETAS = VERSOES_CELULAS_DIRETAS[0] <= _versao(openpyxl.__version__) <= VERSOES_CELULAS_DIRETAS[1]
+
+
+def celulas_diretas(ws):
+    """{(linha, coluna): Cell} da aba, ou None se a versão do openpyxl não foi conferida (use iter_rows)"""
+    return ws._cells if CELULAS_DIRETAS else None
+
+
+def ultima_linha(ws):
+    """Linha do último ws.append / última linha com célula; ws.max_row recalcula varrendo todas as células"""
+    return ws._current_row if CELULAS_DIRETAS else ws.max_row
+
+
+def registrar(classe):
+    """Decorador: registra o motor (os registrados primeiro têm preferência)"""
+    MOTORES[classe.nome] = classe
+    return classe
+
+
+class MotorXlsx:
+    nome = ""
+
+    @staticmethod
+    def disponivel():
+        raise NotImplementedError
+
+    @staticmethod
+    def abrir(caminho):
+        """Objeto com a interface de leitura do openpyxl read_only"""
+        raise NotImplementedError
+
+
+# ==========================================================
+# calamine
+# ==========================================================
+def _valor(v):
+    """Valor do calamine -> o que o openpyxl devolveria"""
+    classe = v.__class__
+    if classe is str:
+        return v or None
+    if classe is float:
+        return int(v) if v.is_integer() and abs(v) < 2**53 else v
+    if classe is date:
+        return datetime(v.year, v.month, v.day)
+    return v
+
+
+class AbaCalamine:
+    def __init__(self, folha):
+        self.folha = folha
+        self.title = folha.name
+
+    def iter_rows(self, min_row=1, max_col=None, values_only=True):
+        if not values_only:
+            raise ValueError("o motor calamine só lê valores (values_only=True)")
+        # Colunas vazias à esquerda da área usada não vêm nas linhas do calamine
+        linhas_vazias, colunas_vazias = self.folha.start
+        prefixo = (None,) * colunas_vazias
+        linhas = self.folha.iter_rows()
+        if linhas_vazias:
+            # As linhas vazias acima dela vêm em algumas versões do python-calamine e em outras não;
+            # sem elas, a primeira linha devolvida é a primeira usada, que sempre tem algum valor
+            primeira = next(linhas, None)
+            if primeira is not None:
+                linhas = chain([primeira], linhas)
+                if any(valor != "" for valor in primeira):
+                    linhas = chain(repeat([""] * self.folha.width, linhas_vazias), linhas)
+        for num_linha, row in enumerate(linhas, start=1):
+            if num_linha < min_row:
+                continue
+            linha = prefixo + tuple(map(_valor, row))
+            yield linha[:max_col] if max_col is not None else linha
+
+
+class PlanilhaCalamine:
+    def __init__(self, caminho):
+        from python_calamine import CalamineWorkbook
+
+        self.livro = CalamineWorkbook.from_path(caminho)
+        self.sheetnames = list(self.livro.sheet_names)
+
+    def __getitem__(self, nome):
+        if nome not in self.sheetnames:
+            raise KeyError(f"Worksheet {nome} does not exist.")
+        return AbaCalamine(self.livro.get_sheet_by_name(nome))
+
+    @property
+    def worksheets(self):
+        return [self[nome] for nome in self.sheetnames]
+
+    def close(self):
+        self.livro.close()
+
+
+@registrar
+class MotorCalamine(MotorXlsx):
+    nome = "calamine"
+
+    @staticmethod
+    def disponivel():
+        try:
+            import python_calamine  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    @staticmethod
+    def abrir(caminho):
+        return PlanilhaCalamine(caminho)
+
+
+# ==========================================================
+# openpyxl
+# ==========================================================
+@registrar
+class MotorOpenpyxl(MotorXlsx):
+    nome = "openpyxl"
+
+    @staticmethod
+    def disponivel():
+        return True
+
+    @staticmethod
+    def abrir(caminho):
+        return openpyxl.load_workbook(caminho, read_only=True)
+
+
+# ==========================================================
+# Escolha do motor e leitura
+# ==========================================================
+def motor_xlsx(nome=None):
+    """Motor pedido (ou o da variável de ambiente) ou o primeiro disponível"""
+    nome = nome or os.environ.get(VARIAVEL_MOTOR)
+    if nome:
+        motor = MOTORES.get(nome)
+        if motor is None:
+            raise ValueError(f"Motor de leitura xlsx desconhecido: {nome} (opções: {', '.join(MOTORES)})")
+        if not motor.disponivel():
+            raise ValueError(f"Motor de leitura xlsx {nome} não está instalado")
+        return motor
+    return next(motor for motor in MOTORES.values() if motor.disponivel())
+
+
+def abrir_leitura(caminho, motor=None):
+    """Planilha só para leitura, pelo motor mais rápido instalado"""
+    return motor_xlsx(motor).abrir(caminho)
+
+
+def tem_formulas(caminho):
+    """Alguma aba tem fórmula? (procura <f> no XML das abas, sem interpretá-lo)"""
+    with zipfile.ZipFile(caminho) as pacote:
+        for nome in pacote.namelist():
+            if not (nome.startswith("xl/worksheets/") and nome.endswith(".xml")):
+                continue
+            with pacote.open(nome) as f:
+                resto = b""
+                while True:
+                    bloco = f.read(1 << 20)
+                    if not bloco:
+                        break
+                    if _FORMULA.search(resto + bloco):
+                        return True
+                    resto = bloco[-8:]
+    return False
+
+
+def carregar_editavel(caminho, motor=None):
+    """
+    Workbook do openpyxl, pronto para alterar e salvar. Com o motor rápido,
+    as abas são montadas célula a célula a partir das linhas lidas (só
+    valores); com o openpyxl (ou havendo fórmulas), é o load_workbook normal.
+    """
+    motor = motor_xlsx(motor)
+    if motor is MotorOpenpyxl:
+        return openpyxl.load_workbook(caminho)
+    if tem_formulas(caminho):
+        logging.info(f"{os.path.basename(caminho)} tem fórmulas: aberta pelo openpyxl para preservá-las")
+        return openpyxl.load_workbook(caminho)
+
+    wb = openpyxl.Workbook()
+    wb.remove(wb.active)
+    planilha = motor.abrir(caminho)
+    try:
+        for nome in planilha.sheetnames:
+            ws = wb.create_sheet(nome)
+            celulas = celulas_diretas(ws)
+            ultima = 0
+            for num_linha, row in enumerate(planilha[nome].iter_rows(values_only=True), start=1):
+                for num_coluna, valor in enumerate(row, start=1):
+                    if valor is not None:
+                        if celulas is None:
+                            celula = ws.cell(row=num_linha, column=num_coluna, value=valor)
+                        else:
+                            celula = celulas[(num_linha, num_coluna)] = Cell(ws, row=num_linha, column=num_coluna,
+                                                                             value=valor)
+                        if celula.data_type == "f":  # texto começando com "=" (fórmulas não chegam aqui)
+                            celula.data_type = "s"
+                        ultima = num_linha
+            if celulas is not None:
+                ws._current_row = ultima  # como no load_workbook: próximo append vai depois da última linha com valor
+    finally:
+        planilha.close()
+    return wb
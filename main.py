@@ -1,28 +1,71 @@
 # ==========================================================
 # SCRIPT COMPLETÃO: Processar OFX/PDF e salvar em Excel
 # Inclui:
-#   - Importação múltipla de arquivos OFX/PDF
-#   - Prevenção de duplicação (FITID no OFX, Data+NrDoc+MEMO no PDF)
+#   - Importação múltipla de arquivos OFX/PDF/CSV, com o leitor de cada
+#     banco escolhido pelo conteúdo do arquivo (leitores.py), inclusive
+#     dentro de .zip/.tar.gz (membros lidos da memória)
+#   - Prevenção de duplicação por impressão digital do lançamento
+#     (conta, data, valor, nr. doc, descrição, ocorrência) — OFX, PDF e manual
+#   - Conciliação entre fontes: o mesmo lançamento vindo do OFX e do PDF
+#     da mesma conta entra uma vez só (conciliacao.py)
+#   - Feed de alterações: cada execução grava um delta numerado com as
+#     linhas que entraram/saíram (alteracoes.py)
+#   - Leitura da planilha pelo motor xlsx mais rápido instalado
+#     (python-calamine, senão openpyxl — leitura_xlsx.py) e gravação
+#     com as abas geradas em processos paralelos (gravacao_xlsx.py)
 #   - Lançamento manual via formulário (Entrada/Saída)
+#   - Coluna Categoria preenchida na importação por palavras-chave
+#     (categorias.py, regras em categorias.json)
 #   - Função desfazer execução
 #   - Aba LOG_PROCESSAMENTO com rastreio por FITID
-#   - Aba BANCOS com saldos consolidados
+#   - Aba BANCOS com saldos consolidados e abas de resumo
+#     (RESUMO_MENSAL por conta × mês, CONTRAPARTES) — resumos.py
+#   - Saldo acumulado por banco/conta em ordem de data, conferido
+#     com o saldo do extrato (LEDGERBAL no OFX, coluna Saldo no PDF)
+#   - Diário de importação (retomada após queda) e save atômico
+#   - Leitura dos arquivos em paralelo com a gravação (pipeline)
+#   - Compactação do extrato (remove duplicatas e recalcula saldos)
+#   - Arquivamento automático dos meses antigos em planilhas anuais
+#     (arquivamento.py), com índice para deduplicação e saldos
+#   - Importação e desfazer em segundo plano (progresso + cancelar)
+#   - Servidor residente (servidor_importacao.py) com as bibliotecas e a
+#     planilha já carregadas; cliente leve em cliente_importacao.py
+#   - Cache em disco do texto/tabelas extraídos dos PDFs (cache_pdf.py;
+#     texto puro em ~/.cache/extrato_pdf, apagar: python cache_pdf.py limpar)
 #   - Menu gráfico inicial
 # ==========================================================
 # Requisitos:
 #   pip install ofxtools openpyxl pdfplumber
+#   pip install pandas   (opcional: abas de resumo)
 # ==========================================================
 
-from ofxtools.Parser import OFXTree
 import openpyxl
 import os
 import tkinter as tk
-from tkinter import filedialog, messagebox, simpledialog
+from tkinter import filedialog, messagebox, simpledialog, ttk
 from datetime import datetime
 import logging
-import pdfplumber
-import re
-import time
+from transacao import data_br, base_impressao, impressao_digital
+from saldos import Razao, TOLERANCIA
+from leitores import ler_arquivo, extensoes_suportadas, expandir, carregar_fontes, nome_exibicao
+from leitores import EXTENSOES_COMPACTADAS
+from categorias import categorizador_para
+from conciliacao import Conciliador
+from alteracoes import emitir_com_seguranca, execucoes_emitidas, ultima_sequencia
+from leitura_xlsx import carregar_editavel, ultima_linha
+from gravacao_xlsx import salvar_xlsx
+from resumos import ABAS_RESUMO, colunas_linhas, colunas_planilha, gravar_resumos
+from arquivamento import MESES_QUENTES, aplicar_indice, arquivar, caminho_indice, corte_quente, ler_indice
+from arquivamento import precisa_arquivar, proximo_arquivamento
+from leitores import ler_pdf, parse_pdf, safe_get  # noqa: F401 (nomes antigos de main, usados por outros scripts)
+import json
+import tempfile
+import uuid
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 
 # ==========================================================
 # Configuração do LOG externo
@@ -36,114 +79,212 @@ logging.basicConfig(
 )
 
 # ==========================================================
-# Helpers
+# Pipeline de importação
 # ==========================================================
-def safe_get(obj, attr, default=None):
-    """Evita KeyError / AttributeError ao acessar atributos"""
-    try:
-        return getattr(obj, attr)
-    except (KeyError, AttributeError):
-        return default
+# Processos que leem (parse) os arquivos enquanto a planilha é gravada
+TRABALHADORES_LEITURA = max(1, min(4, (os.cpu_count() or 2) - 1))
+# Quantos arquivos podem estar lidos/em leitura à frente da gravação
+PROFUNDIDADE_FILA = 4
+# Depois de cada importação, meses anteriores aos MESES_QUENTES vão para as planilhas anuais
+# (só execuções processadas há mais de arquivamento.DIAS_DESFAZER dias)
+ARQUIVAR_AUTOMATICAMENTE = True
 
 # ==========================================================
-# Funções auxiliares PDF
+# Leitura de arquivos (etapa produtora do pipeline)
+# O formato/banco de cada arquivo é identificado em leitores.py
 # ==========================================================
-def parse_valor(valor_str: str) -> float:
-    if not valor_str:
-        return 0.0
-    valor_str = valor_str.strip()
-    tipo = valor_str[-1]  # último caractere (C/D)
-    numero = valor_str[:-1].strip().replace(".", "").replace(",", ".")
+def pipeline_leitura(arquivos, trabalhadores=TRABALHADORES_LEITURA, profundidade=PROFUNDIDADE_FILA, executor=None):
+    """
+    Gera os lotes de `ler_arquivo` na ordem dos arquivos, lendo os próximos
+    em paralelo enquanto o consumidor grava o atual.
+    No máximo `profundidade` arquivos ficam lidos/em leitura à frente do
+    consumidor (backpressure); com trabalhadores=0 a leitura é sequencial.
+    Membros de .zip/.tar.gz (ver leitores.expandir) são lidos para a memória
+    aqui e o conteúdo vai junto para o processo trabalhador.
+    Com `executor` (processos já no ar, como no servidor residente), usa-o
+    em vez de abrir e fechar um pool a cada chamada.
+    """
+    restantes = carregar_fontes(arquivos)
     try:
-        valor = float(numero)
-    except ValueError:
-        valor = 0.0
-    if tipo.upper() == "D":
-        return -valor
-    return valor
-
-def parse_pdf(caminho_pdf):
-    """Extrai lançamentos de um extrato PDF da CEF"""
-    dados = []
-    padrao = re.compile(r"(\d{2}/\d{2}/\d{4})\s+(\S+)?\s+(.*?)\s+([\d\.,]+ [CD])\s+([\d\.,]+ [CD])")
-
-    with pdfplumber.open(caminho_pdf) as pdf:
-        for pagina in pdf.pages:
-            tabela = pagina.extract_table()
-            if tabela:
-                for linha in tabela[1:]:
-                    if len(linha) >= 5:
-                        data, nr_doc, historico, valor_str, saldo_str = linha[:5]
-                        valor = parse_valor(valor_str)
-                        saldo = parse_valor(saldo_str)
-                        dados.append([data, nr_doc, historico, valor, saldo])
-            else:
-                texto = pagina.extract_text()
-                if not texto:
-                    continue
-                for linha in texto.split("\n"):
-                    m = padrao.match(linha)
-                    if m:
-                        data, nr_doc, historico, valor_str, saldo_str = m.groups()
-                        valor = parse_valor(valor_str)
-                        saldo = parse_valor(saldo_str)
-                        dados.append([data, nr_doc or "", historico.strip(), valor, saldo])
-    return dados
+        if trabalhadores <= 0 or len(arquivos) <= 1:
+            for caminho_arquivo, dados in restantes:
+                yield ler_arquivo(caminho_arquivo, dados)
+            return
+
+        profundidade = max(1, profundidade)
+        with (nullcontext(executor) if executor else ProcessPoolExecutor(max_workers=trabalhadores)) as executor:
+            fila = deque()
+            for caminho_arquivo, dados in restantes:
+                fila.append(executor.submit(ler_arquivo, caminho_arquivo, dados))
+                if len(fila) >= profundidade:
+                    break
+            try:
+                while fila:
+                    lote = fila.popleft().result()
+                    proximo = next(restantes, None)
+                    if proximo is not None:
+                        fila.append(executor.submit(ler_arquivo, *proximo))
+                    yield lote
+            finally:
+                for futuro in fila:
+                    futuro.cancel()
+    finally:
+        restantes.close()
 
 # ==========================================================
 # Função: desfazer execução existente
 # ==========================================================
-def desfazer_execucao(caminho_excel):
-    wb = openpyxl.load_workbook(caminho_excel)
+def remover_execucao(caminho_excel, exec_num, progresso=None, cancelar=None):
+    """
+    Remove as linhas da execução `exec_num` e recalcula os saldos; devolve
+    quantas linhas saíram. As linhas são apagadas em blocos contíguos, de
+    baixo para cima, para que a remoção de um bloco não desloque os demais.
+    """
+    avisar = progresso or (lambda percentual, mensagem: None)
+    avisar(0, "Carregando planilha...")
+    wb = carregar_editavel(caminho_excel)
     ws = wb.active
+
+    blocos = []  # [primeira linha, quantidade]
+    removidas = []
+    for num_linha, row in enumerate(ws.iter_rows(min_row=2, values_only=True), start=2):
+        if row and row[7] == exec_num:  # Execução está na coluna Execução
+            removidas.append(row)
+            if blocos and blocos[-1][0] + blocos[-1][1] == num_linha:
+                blocos[-1][1] += 1
+            else:
+                blocos.append([num_linha, 1])
+    linhas_removidas = sum(qtd for _, qtd in blocos)
+    if linhas_removidas == 0:
+        return 0
+
+    for i, (primeira, quantidade) in enumerate(reversed(blocos), start=1):
+        if cancelar is not None and cancelar.is_set():
+            raise ImportacaoCancelada()
+        ws.delete_rows(primeira, quantidade)
+        avisar(10 + 70 * i // len(blocos), f"Removendo linhas ({i}/{len(blocos)} blocos)...")
+
+    # As linhas seguintes subiram: remonta o razão e corrige os saldos acumulados
+    avisar(85, "Recalculando saldos...")
+    razao, _ = montar_razao(wb, ws)
+    razao.gravar(ws)
+    indice = ler_indice(caminho_excel)
+    atualizar_aba_bancos(wb, ws, razao, arquivado=indice.get("resumo") if indice else None)
+    if cancelar is not None and cancelar.is_set():
+        raise ImportacaoCancelada()
+    avisar(90, "Salvando planilha...")
+    salvar_atomico(wb, caminho_excel)
+    emitir_com_seguranca(caminho_excel, exec_num, removidas=removidas, rotulo=f"desfeita{exec_num:04d}")
+    logging.info(f"Execução {exec_num} desfeita. Linhas removidas: {linhas_removidas}")
+    return linhas_removidas
+
+def desfazer_execucao(caminho_excel):
     exec_num = simpledialog.askinteger("Desfazer Execução", "Digite o número da execução para remover:")
     if exec_num is None:
         return
-    linhas_removidas = 0
-    for row in list(ws.iter_rows(min_row=2)):
-        if row[7].value == exec_num:  # Execução está na coluna Execução
-            ws.delete_rows(row[0].row, 1)
-            linhas_removidas += 1
-    if linhas_removidas > 0:
-        wb.save(caminho_excel)
-        messagebox.showinfo("Sucesso", f"Execução {exec_num} desfeita ({linhas_removidas} linhas).")
-        logging.info(f"Execução {exec_num} desfeita. Linhas removidas: {linhas_removidas}")
+
+    def concluir(linhas_removidas):
+        if linhas_removidas > 0:
+            messagebox.showinfo("Sucesso", f"Execução {exec_num} desfeita ({linhas_removidas} linhas).")
+        else:
+            messagebox.showwarning("Aviso", f"Nenhuma linha encontrada para a execução {exec_num}.")
+
+    cliente = servidor_para(caminho_excel)
+    if cliente:
+        tarefa = lambda progresso, cancelar: cliente.desfazer(exec_num)
     else:
-        messagebox.showwarning("Aviso", f"Nenhuma linha encontrada para a execução {exec_num}.")
+        tarefa = lambda progresso, cancelar: remover_execucao(caminho_excel, exec_num, progresso, cancelar)
+    executar_em_segundo_plano("Desfazendo execução", tarefa, concluir)
 
 # ==========================================================
 # Função: atualizar aba BANCOS
 # ==========================================================
-def atualizar_aba_bancos(wb, ws):
-    bancos = {}
-    for row in ws.iter_rows(min_row=2, values_only=True):
-        if row and row[5] and row[4] is not None:
-            chave = (row[5], row[6])  # Banco ID + Processado em
-            bancos[chave] = row[4]
+def atualizar_aba_bancos(wb, ws, razao, linhas=None, arquivado=None):
+    """
+    Recria a aba BANCOS a partir do razão (saldo final por banco/conta) e
+    as abas de resumo. `linhas` são as linhas do extrato quando `ws` é
+    write-only (não pode ser relida); `arquivado` é o resumo dos meses
+    arquivados, guardado no índice do arquivo.
+    """
+    saldos = razao.saldos()
 
     if "BANCOS" in wb.sheetnames:
         wb.remove(wb["BANCOS"])
     ws_bancos = wb.create_sheet("BANCOS")
     ws_bancos.append(["Banco ID", "Conta/Ref", "Saldo Final"])
-    for (banco_id, conta), saldo in bancos.items():
+    for (banco_id, conta), saldo in saldos.items():
         ws_bancos.append([banco_id, conta, saldo])
-    ws_bancos.append(["", "TOTAL", sum(bancos.values())])
+    ws_bancos.append(["", "TOTAL", round(sum(saldos.values()), 2)])
+
+    gravar_saldos_iniciais(wb, razao.saldos_iniciais())
+    gravar_resumos(wb, colunas_planilha(ws) if linhas is None else colunas_linhas(linhas), arquivado)
+
+# ==========================================================
+# Saldos iniciais por conta (deduzidos na primeira importação)
+# ==========================================================
+def ler_saldos_iniciais(wb):
+    saldos = {}
+    if "SALDOS_INICIAIS" in wb.sheetnames:
+        for row in wb["SALDOS_INICIAIS"].iter_rows(min_row=2, values_only=True):
+            if row and row[0] is not None and row[2] is not None:
+                saldos[(row[0], row[1] or "N/A")] = row[2]
+    return saldos
+
+def gravar_saldos_iniciais(wb, saldos):
+    if "SALDOS_INICIAIS" in wb.sheetnames:
+        wb.remove(wb["SALDOS_INICIAIS"])
+    ws_iniciais = wb.create_sheet("SALDOS_INICIAIS")
+    ws_iniciais.append(["Banco ID", "Conta", "Saldo Inicial (R$)"])
+    for (banco_id, conta), saldo in saldos.items():
+        ws_iniciais.append([banco_id, conta, saldo])
 
 # ==========================================================
 # Criar/abrir planilha
 # ==========================================================
+def proxima_linha(ws):
+    """Linha que o próximo ws.append vai ocupar (sem o custo de ws.max_row)"""
+    return ultima_linha(ws) + 1
+
+def montar_razao(wb, ws):
+    """
+    Uma varredura do extrato: monta o razão por (Banco ID, Conta) — a mesma
+    conta vinda de outra fonte cai no mesmo livro — e devolve também a
+    última execução encontrada.
+    """
+    razao = Razao(ler_saldos_iniciais(wb), agrupar=Conciliador().grupo)
+    execucoes = []
+    datas = {}
+    for num_linha, row in enumerate(ws.iter_rows(min_row=2, values_only=True), start=2):
+        if not row or row[3] is None or not isinstance(row[3], (int, float)):
+            continue
+        if row[0] not in datas:
+            datas[row[0]] = data_br(row[0]) if isinstance(row[0], str) else None
+        conta = row[12] if len(row) > 12 else None  # Conta (planilhas antigas não têm)
+        razao.livro(row[5], conta).inserir(datas[row[0]], row[3], num_linha, row[4])
+        try:
+            if row[7] is not None:
+                execucoes.append(int(row[7]))
+        except (ValueError, TypeError):
+            continue
+    return razao, max(execucoes) if execucoes else 0
+
 def carregar_planilha(saida):
+    """
+    Abre (ou cria) a planilha e devolve (wb, ws, execucao_atual, razao).
+    `razao` é o motor de saldos por (Banco ID, Conta), montado na mesma
+    varredura que procura a última execução: quem grava linhas novas insere
+    nele e chama razao.gravar(ws), em vez de varrer o extrato de novo.
+    """
     if os.path.exists(saida):
-        wb = openpyxl.load_workbook(saida)
+        wb = carregar_editavel(saida)
         ws = wb.active
-        execucoes = []
-        for row in ws.iter_rows(min_row=2, values_only=True):
-            try:
-                if row and row[7] is not None:
-                    execucoes.append(int(row[7]))
-            except (ValueError, TypeError):
-                continue
-        ultima_execucao = max(execucoes) if execucoes else 0
+        if ws.cell(row=1, column=13).value is None:
+            ws.cell(row=1, column=13, value="Conta")  # planilha do formato antigo
+        if ws.cell(row=1, column=14).value is None:
+            ws.cell(row=1, column=14, value="Impressão Digital")
+        if ws.cell(row=1, column=15).value is None:
+            ws.cell(row=1, column=15, value="Categoria")
+        razao, ultima_execucao = montar_razao(wb, ws)
         execucao_atual = ultima_execucao + 1
     else:
         wb = openpyxl.Workbook()
@@ -151,145 +292,672 @@ def carregar_planilha(saida):
         ws.title = "Extrato OFX"
         cabecalho = [
             "Data", "Tipo (Entrada/Saída)", "Descrição", "Valor (R$)", "Saldo acumulado (R$)",
-            "Banco ID", "Processado em", "Execução", "TRNTYPE", "Nr. Documento", "MEMO", "FITID"
+            "Banco ID", "Processado em", "Execução", "TRNTYPE", "Nr. Documento", "MEMO", "FITID", "Conta",
+            "Impressão Digital", "Categoria"
         ]
         ws.append(cabecalho)
+        razao = Razao(agrupar=Conciliador().grupo)
         execucao_atual = 1
-    return wb, ws, execucao_atual
+    return wb, ws, execucao_atual, razao
 
 # ==========================================================
-# Função: importar múltiplos arquivos
+# Índice de impressões digitais (chave única de deduplicação)
 # ==========================================================
-def atualizar():
-    arquivos = filedialog.askopenfilenames(
-        title="Selecione arquivos OFX ou PDF",
-        filetypes=[("Arquivos OFX/PDF", "*.ofx *.pdf")]
-    )
-    if not arquivos:
-        return
+def indexar_impressoes(ws, conciliador=None):
+    """
+    Conjunto com a impressão digital de todas as linhas do extrato.
+    Linhas antigas, gravadas antes da coluna existir, têm a impressão
+    calculada aqui e preenchida na planilha, para que a próxima abertura
+    só precise lê-la. Na mesma varredura, as linhas entram no índice do
+    `conciliador` (bloco conta/data/valor), se houver.
+    """
+    impressoes = set()
+    ocorrencias = {}
+    for num_linha, row in enumerate(ws.iter_rows(min_row=2, values_only=True), start=2):
+        if not row or row[0] is None or not isinstance(row[3], (int, float)):
+            continue
+        impressao = row[13] if len(row) > 13 else None
+        if not impressao:
+            impressao = impressao_linha(row, ocorrencias)
+            ws.cell(row=num_linha, column=14, value=impressao)
+        impressoes.add(impressao)
+        if conciliador is not None:
+            conciliador.indexar_linha(row, row[11] if len(row) > 11 else None)
+    return impressoes
 
-    saida = os.path.join(os.path.dirname(arquivos[0]), "extrato_ofx.xlsx")
-    wb, ws, execucao_atual = carregar_planilha(saida)
+def impressao_linha(row, ocorrencias):
+    """
+    Impressão digital de uma linha antiga do extrato. A ocorrência é contada
+    dentro da execução (cada execução faz o papel do extrato de origem), assim
+    o mesmo arquivo importado duas vezes gera as mesmas impressões.
+    """
+    conta = row[12] if len(row) > 12 else None
+    data = data_br(row[0]) if isinstance(row[0], str) else None
+    base = base_impressao(row[5], conta, data, row[3], row[9], row[2])
+    chave = (row[7], base)
+    ocorrencia = ocorrencias.get(chave, 0)
+    ocorrencias[chave] = ocorrencia + 1
+    return impressao_digital(base, ocorrencia)
 
-    # Aba de log
+# ==========================================================
+# Aba de log
+# ==========================================================
+def obter_aba_log(wb):
     if "LOG_PROCESSAMENTO" in wb.sheetnames:
-        ws_log = wb["LOG_PROCESSAMENTO"]
+        return wb["LOG_PROCESSAMENTO"]
+    ws_log = wb.create_sheet("LOG_PROCESSAMENTO")
+    ws_log.append([
+        "Data Processamento", "Arquivo", "Banco", "Conta", "Execução",
+        "Adicionados", "Ignorados", "Entradas (R$)", "Saídas (R$)", "Saldo Final (R$)", "FITID", "Status"
+    ])
+    return ws_log
+
+# Abas que atualizar_aba_bancos refaz (não são copiadas por regravar_planilha)
+ABAS_RECRIADAS = ("Extrato OFX", "BANCOS", "SALDOS_INICIAIS") + ABAS_RESUMO
+
+def regravar_planilha(origem, cabecalho, linhas, registro_log):
+    """
+    Planilha nova (write-only) com o "Extrato OFX" = cabeçalho + `linhas` e
+    as outras abas de `origem` copiadas, menos as ABAS_RECRIADAS;
+    `registro_log` vai para o fim do LOG_PROCESSAMENTO. Usada pela
+    compactação e pelo arquivamento. Devolve (wb, aba do extrato).
+    """
+    destino = openpyxl.Workbook(write_only=True)
+    ws_destino = destino.create_sheet("Extrato OFX")
+    ws_destino.append(cabecalho)
+    for row in linhas:
+        ws_destino.append(row)
+    for nome in origem.sheetnames[1:]:
+        if nome in ABAS_RECRIADAS:
+            continue
+        ws_copia = destino.create_sheet(nome)
+        for row in origem[nome].iter_rows(values_only=True):
+            ws_copia.append(row)
+    if "LOG_PROCESSAMENTO" in destino.sheetnames:
+        ws_log = destino["LOG_PROCESSAMENTO"]
     else:
-        ws_log = wb.create_sheet("LOG_PROCESSAMENTO")
-        ws_log.append([
-            "Data Processamento", "Arquivo", "Banco", "Conta", "Execução",
-            "Adicionados", "Ignorados", "Entradas (R$)", "Saídas (R$)", "Saldo Final (R$)", "FITID", "Status"
-        ])
-
-    fitids_existentes = set()
-    for row in ws.iter_rows(min_row=2, values_only=True):
-        if row:
-            if row[-1]:  # FITID
-                fitids_existentes.add(str(row[-1]))
-            elif row[-2]:  # MEMO
-                chave = f"{row[0]}-{row[-3]}-{row[-2]}"
-                fitids_existentes.add(chave)
-
-    total_processados, total_ignorados = 0, 0
-    saldo = 0
-
-    for caminho_arquivo in arquivos:
-        processados, ignorados = 0, 0
-        data_processo = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
-
-        if caminho_arquivo.lower().endswith(".ofx"):
-            # ---- OFX ----
-            tree = OFXTree()
-            tree.parse(caminho_arquivo)
-            ofx = tree.convert()
-            stmt, transacoes = None, []
-            if safe_get(ofx, "bankmsgsrsv1"):
-                statements = safe_get(ofx.bankmsgsrsv1, "statements")
-                if statements and len(statements) > 0:
-                    stmt = statements[0]
-                    transacoes = safe_get(stmt, "banktranlist", [])
-            if not transacoes and safe_get(ofx, "creditcardmsgsrsv1"):
-                ccstatement = safe_get(ofx.creditcardmsgsrsv1, "ccstatement")
-                if ccstatement:
-                    stmt = ccstatement[0].ccstmtrs
-                    transacoes = safe_get(stmt, "banktranlist", [])
-
-            banco_id = safe_get(safe_get(stmt, "bankacctfrom"), "bankid", "N/A")
-            account_id = safe_get(safe_get(stmt, "bankacctfrom"), "acctid", "N/A")
-            account_type = safe_get(safe_get(stmt, "bankacctfrom"), "accttype", "N/A")
-
-            for trn in transacoes:
-                fitid = safe_get(trn, "fitid")
-                if fitid and fitid in fitids_existentes:
-                    ignorados += 1
+        ws_log = destino.create_sheet("LOG_PROCESSAMENTO")
+    ws_log.append(registro_log)
+    return destino, ws_destino
+
+# ==========================================================
+# Gravação segura: diário (write-ahead) + save atômico
+# ==========================================================
+def caminho_diario(saida):
+    return saida + ".diario"
+
+def salvar_atomico(wb, saida, executor=None):
+    """
+    Salva em arquivo temporário na mesma pasta e troca de uma vez (os.replace).
+    Planilha só de valores é gravada com as abas geradas em paralelo
+    (gravacao_xlsx.py, em `executor` se houver); com formatação, pelo
+    wb.save() do openpyxl.
+    """
+    pasta = os.path.dirname(os.path.abspath(saida))
+    fd, temporario = tempfile.mkstemp(prefix=".extrato_", suffix=".xlsx", dir=pasta)
+    os.close(fd)
+    try:
+        salvar_xlsx(wb, temporario, executor=executor)
+        with open(temporario, "rb+") as f:
+            os.fsync(f.fileno())
+        os.replace(temporario, saida)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+
+def diario_registrar(caminho, registro):
+    """Acrescenta um registro JSON ao diário e força a escrita em disco"""
+    with open(caminho, "a", encoding="utf-8") as f:
+        f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+def diario_ler(caminho):
+    """Lê os registros do diário; uma última linha truncada (queda no meio da escrita) é descartada"""
+    registros = []
+    if not os.path.exists(caminho):
+        return registros
+    with open(caminho, encoding="utf-8") as f:
+        for linha in f:
+            try:
+                registros.append(json.loads(linha))
+            except json.JSONDecodeError:
+                break
+    return registros
+
+def execucoes_do_diario(registros):
+    """{execução: linhas} de um diário; registros sem "execucao" são da execução do cabeçalho"""
+    execucoes = {registros[0]["execucao"]: []}
+    for registro in registros[1:]:
+        execucoes.setdefault(registro.get("execucao", registros[0]["execucao"]), []).extend(registro["linhas"])
+    return execucoes
+
+# ==========================================================
+# Execução em segundo plano (interface continua respondendo)
+# ==========================================================
+class ImportacaoCancelada(Exception):
+    """Operação cancelada pelo usuário antes do save: a planilha fica como estava"""
+
+def verificar_cancelamento(cancelar):
+    if cancelar is not None and cancelar.is_set():
+        raise ImportacaoCancelada()
+
+def executar_em_segundo_plano(titulo, tarefa, ao_concluir):
+    """
+    Roda `tarefa(progresso, cancelar)` numa thread de trabalho, com janela de
+    progresso e botão Cancelar. A thread só conversa com o Tk por uma fila,
+    lida pelo laço do Tk a cada 100 ms; `ao_concluir(resultado)` roda na
+    thread da interface.
+    """
+    eventos = queue.Queue()
+    cancelar = threading.Event()
+
+    janela = tk.Toplevel()
+    janela.title(titulo)
+    janela.resizable(False, False)
+    rotulo = tk.Label(janela, text="Preparando...", width=60, anchor="w")
+    rotulo.pack(padx=10, pady=(10, 5))
+    barra = ttk.Progressbar(janela, length=400, mode="determinate", maximum=100)
+    barra.pack(padx=10, pady=5)
+
+    def pedir_cancelamento():
+        cancelar.set()
+        botao.config(state="disabled", text="Cancelando...")
+
+    botao = tk.Button(janela, text="Cancelar", command=pedir_cancelamento)
+    botao.pack(pady=(5, 10))
+    janela.protocol("WM_DELETE_WINDOW", pedir_cancelamento)
+    janela.grab_set()  # evita disparar outra operação sobre a mesma planilha
+
+    def trabalhar():
+        try:
+            resultado = tarefa(lambda percentual, mensagem: eventos.put(("progresso", (percentual, mensagem))),
+                               cancelar)
+            eventos.put(("fim", resultado))
+        except ImportacaoCancelada:
+            eventos.put(("cancelado", None))
+        except Exception as e:
+            logging.exception(f"Falha em '{titulo}'")
+            eventos.put(("erro", e))
+
+    def acompanhar():
+        try:
+            while True:
+                tipo, dado = eventos.get_nowait()
+                if tipo == "progresso":
+                    barra["value"], rotulo["text"] = dado
                     continue
-                valor = float(trn.trnamt)
-                saldo += valor
-                tipo = "Entrada" if valor > 0 else "Saída"
-                descricao = trn.name or "Sem descrição"
-                trntype = safe_get(trn, "trntype", "N/A")
-                memo = safe_get(trn, "memo", "")
-                nr_doc = ""
-                data = trn.dtposted.strftime("%d/%m/%Y")
-
-                ws.append([data, tipo, descricao, valor, saldo, banco_id, data_processo,
-                           execucao_atual, trntype, nr_doc, memo, fitid])
-                processados += 1
-                if fitid:
-                    fitids_existentes.add(fitid)
+                janela.grab_release()
+                janela.destroy()
+                if tipo == "fim":
+                    ao_concluir(dado)
+                elif tipo == "cancelado":
+                    messagebox.showinfo(titulo, "Operação cancelada. A planilha não foi alterada.")
+                else:
+                    messagebox.showerror(titulo, f"Erro: {dado}")
+                return
+        except queue.Empty:
+            janela.after(100, acompanhar)
+
+    threading.Thread(target=trabalhar, daemon=True).start()
+    acompanhar()
+
+# ==========================================================
+# Função: importar múltiplos arquivos (núcleo sem interface)
+# ==========================================================
+class SessaoImportacao:
+    """
+    Planilha aberta em memória com o que a importação precisa: razão por
+    conta, índice de impressões digitais e número da próxima execução.
+    importar_arquivos usa uma sessão descartável; processos residentes
+    (monitorar_pasta.py) mantêm a mesma sessão entre importações e só
+    recarregam a planilha se ela mudar em disco (e podem deixar em
+    `executor` um pool de leitura que sobrevive entre importações).
+    """
+
+    def __init__(self, saida):
+        self.saida = saida
+        self.wb = None
+        self.mtime = None
+        self.executor = None
+        self.arquivar_depois = None  # "proximo" do índice do arquivo, relido quando o índice muda (indice_mtime)
+        self.indice_mtime = None
+        self.diario_antes = None  # tamanho do diário antes da importação em curso (0 = não havia)
+
+    def _mtime_em_disco(self):
+        return os.path.getmtime(self.saida) if os.path.exists(self.saida) else None
+
+    def carregar(self):
+        """Abre a planilha se ainda não estiver em memória ou se outro processo a alterou"""
+        if self.wb is not None and self.mtime == self._mtime_em_disco():
+            return
+        self.wb, self.ws, self.execucao_atual, self.razao = carregar_planilha(self.saida)
+        self.ws_log = obter_aba_log(self.wb)
+        self.conciliador = Conciliador()
+        self.impressoes = indexar_impressoes(self.ws, self.conciliador)
+        # Meses arquivados: deduplicação e saldo de fim de dia vêm do índice, sem abrir as planilhas anuais
+        indice = ler_indice(self.saida)
+        self.resumo_arquivado = indice.get("resumo") if indice else None
+        if indice:
+            self.impressoes.update(indice["impressoes"])
+            aplicar_indice(self.razao, indice)
+            self.execucao_atual = max(self.execucao_atual, indice["ultima_execucao"] + 1)
+        self.mtime = self._mtime_em_disco()
+
+    def descartar(self):
+        """Esquece o estado em memória (ex.: após erro no meio de uma importação)"""
+        self.wb = None
+
+    def salvar(self):
+        salvar_atomico(self.wb, self.saida, self.executor)
+        self.mtime = self._mtime_em_disco()
 
+    def aplicar(self, registro, execucao):
+        """Grava um lote já deduplicado (vindo do pipeline ou do diário); devolve 1 se divergiu do banco"""
+        ws = self.ws
+        livro = self.razao.livro(registro["banco_id"], registro["account_id"])
+        for linha in registro["linhas"]:
+            num_linha = proxima_linha(ws)
+            ws.append(linha)
+            livro.inserir(data_br(linha[0]), linha[3], num_linha, linha[4])
+            self.conciliador.registrar_linha(linha, linha[11])
+            self.inseridas.setdefault(execucao, []).append(num_linha)
+
+        status, divergiu = "OK", 0
+        if registro["saldo_banco"]:
+            data_ref, saldo_ref = registro["saldo_banco"]
+            diferenca = livro.reconciliar(data_br(data_ref), saldo_ref)
+            if abs(diferenca) > TOLERANCIA:
+                divergiu = 1
+                status = f"DIVERGENTE ({diferenca:+.2f})"
+                logging.warning(f"{registro['arquivo']}: saldo do banco {saldo_ref:.2f} em {data_ref} "
+                                f"difere do razão em {diferenca:+.2f}")
+        if registro.get("conciliados"):
+            status += f" ({registro['conciliados']} conciliados com outra fonte)"
+
+        self.ws_log.append([registro["data_processo"], nome_exibicao(registro["arquivo"]),
+                            registro["banco_id"], registro["account_id"], execucao,
+                            registro["processados"], registro["ignorados"],
+                            "", "", livro.saldo_final, "", status])
+        return divergiu
+
+    def importar(self, arquivos, trabalhadores=TRABALHADORES_LEITURA, profundidade=PROFUNDIDADE_FILA,
+                 progresso=None, cancelar=None):
+        """Ver importar_arquivos. Se algo falhar no meio, o estado em memória é descartado."""
+        return self.importar_grupos([arquivos], trabalhadores, profundidade, progresso, cancelar)[0]
+
+    def importar_grupos(self, grupos, trabalhadores=TRABALHADORES_LEITURA, profundidade=PROFUNDIDADE_FILA,
+                        progresso=None, cancelar=None):
+        """
+        Como importar, mas cada lista de arquivos de `grupos` vira uma execução
+        própria (desfeita sozinha), todas gravadas num único save. Devolve um
+        resumo por grupo.
+        """
+        try:
+            resumos = self._importar(grupos, trabalhadores, profundidade, progresso, cancelar)
+        except BaseException:
+            self.descartar()
+            raise
+        if self.arquivamento_pendente():
+            try:
+                # As execuções recentes (e a que acabou de entrar) ficam na planilha quente: Desfazer continua valendo
+                arquivamento = arquivar(self.saida, MESES_QUENTES, preservar=resumos[0]["execucao"])
+                resumos[0]["arquivamento"] = arquivamento
+                if arquivamento["movidas"]:
+                    self.descartar()
+            except Exception:
+                # A importação já está salva; o arquivamento fica para a próxima vez
+                logging.exception("Falha no arquivamento automático")
+                self.descartar()
+        return resumos
+
+    def arquivamento_pendente(self):
+        """Há meses antigos na planilha quente e alguma execução deles já pode sair?"""
+        if not ARQUIVAR_AUTOMATICAMENTE or not precisa_arquivar(self.razao, corte_quente(meses=MESES_QUENTES)):
+            return False
+        # Execuções retidas pelo último arquivamento (desta ou de outra sessão) só saem a partir do "proximo"
+        indice = caminho_indice(self.saida)
+        mtime = os.path.getmtime(indice) if os.path.exists(indice) else None
+        if mtime != self.indice_mtime:
+            self.arquivar_depois = proximo_arquivamento(ler_indice(self.saida))
+            self.indice_mtime = mtime
+        return self.arquivar_depois is None or datetime.now() >= self.arquivar_depois
+
+    def reverter_diario(self):
+        """
+        Desfaz o que a última importação, cancelada ou com erro antes do save,
+        acrescentou ao diário (o que ele já tinha antes continua lá).
+        """
+        if self.diario_antes is None:
+            return
+        diario = caminho_diario(self.saida)
+        if not self.diario_antes:
+            if os.path.exists(diario):
+                os.remove(diario)
         else:
-            # ---- PDF ----
-            dados = parse_pdf(caminho_arquivo)
-            banco_id, account_id, account_type = "CEF", "N/A", "N/A"
-            for data_mov, nr_doc, historico, valor, saldo_mov in dados:
-                chave = f"{data_mov}-{nr_doc}-{historico}"
-                if chave in fitids_existentes:
-                    ignorados += 1
-                    continue
-                saldo += valor
-                tipo = "Entrada" if valor > 0 else "Saída"
-                trntype = "CREDIT" if valor > 0 else "DEBIT"
-                memo = historico
-                fitid = f"PDF-{execucao_atual}-{int(time.time())}"
+            with open(diario, "r+b") as f:
+                f.truncate(self.diario_antes)
+        self.diario_antes = None
+
+    def _importar(self, grupos, trabalhadores, profundidade, progresso, cancelar):
+        avisar = progresso or (lambda percentual, mensagem: None)
+        avisar(0, "Carregando planilha...")
+        self.diario_antes = None
+        self.carregar()
+        ws, razao, impressoes = self.ws, self.razao, self.impressoes
+        execucao_atual = self.execucao_atual
+        saida = self.saida
+        categorizador = categorizador_para(saida)
+
+        # Totais de cada grupo (uma execução por grupo)
+        totais = [{"processados": 0, "ignorados": 0, "conciliados": 0, "divergencias": 0, "por_arquivo": {}}
+                  for _ in grupos]
+        conciliador = self.conciliador
+        self.inseridas = {}  # execução -> linhas gravadas (feed de alterações)
+
+        # ---- Retomada a partir do diário ----
+        diario = caminho_diario(saida)
+        registros = diario_ler(diario)
+        ja_processados = set()
+        retomados = 0
+        if registros and registros[0].get("execucao", 0) < execucao_atual:
+            # O save das execuções registradas chegou a terminar: diário obsoleto.
+            # Se o processo caiu antes do delta, ele sai agora das linhas do diário.
+            # O número da execução pode ter sido reaproveitado (desfazer): quem diz é a "importacao".
+            importacao = registros[0].get("importacao")
+            emitidas = (execucoes_emitidas(saida, importacao, registros[0].get("sequencia", 0))
+                        if importacao else set())
+            for execucao, linhas in execucoes_do_diario(registros).items():
+                if execucao not in emitidas:
+                    emitir_com_seguranca(saida, execucao, linhas, importacao=importacao)
+            os.remove(diario)
+            registros = []
+        if registros:
+            # Registros sem "execucao" (diário de uma execução só) são da execução do cabeçalho
+            for registro in registros[1:]:
+                execucao = registro.get("execucao", registros[0]["execucao"])
+                totais[0]["divergencias"] += self.aplicar(registro, execucao)
+                impressoes.update(registro["chaves"])
+                totais[0]["processados"] += registro["processados"]
+                totais[0]["ignorados"] += registro["ignorados"]
+                totais[0]["conciliados"] += registro.get("conciliados", 0)
+                ja_processados.add(registro["arquivo"])
+                totais[0]["por_arquivo"][registro["arquivo"]] = (registro["processados"], registro["ignorados"])
+                retomados += 1
+            # O primeiro grupo continua a última execução do diário; os seguintes vêm depois dela
+            execucao_atual = max(execucoes_do_diario(registros))
+            importacao = registros[0].get("importacao")
+            logging.info(f"Execução {execucao_atual} retomada do diário ({retomados} arquivos)")
+            self.diario_antes = os.path.getsize(diario)
+        else:
+            # "importacao" identifica esta importação nos deltas; "sequencia" é onde o feed estava
+            importacao = uuid.uuid4().hex
+            diario_registrar(diario, {"execucao": execucao_atual, "importacao": importacao,
+                                      "sequencia": ultima_sequencia(saida)})
+            self.diario_antes = 0
+
+        try:
+            # .zip/.tar.gz viram a lista dos seus membros ("x.zip::membro.ofx")
+            pendentes = []  # (grupo, caminho), na ordem dos grupos
+            for numero, arquivos in enumerate(grupos):
+                pendentes += [(numero, c) for c in expandir([os.path.abspath(c) for c in arquivos])
+                              if c not in ja_processados]
+            lotes = pipeline_leitura([c for _, c in pendentes], trabalhadores, profundidade, self.executor)
+            for indice, ((numero, _), lote) in enumerate(zip(pendentes, lotes)):
+                verificar_cancelamento(cancelar)
+                execucao = execucao_atual + numero
+                caminho_arquivo = lote["arquivo"]
+                banco_id, account_id = lote["banco_id"], lote["account_id"]
+                processados, ignorados, conciliados = 0, 0, 0
+                linhas, chaves = [], []
+                ocorrencias = {}
+                data_processo = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
+                nome = nome_exibicao(caminho_arquivo)
+                inicio_arquivo = 10 + 80 * indice / len(pendentes)
+                passo_arquivo = 80 / len(pendentes)
+                avisar(inicio_arquivo, f"Arquivo {indice + 1}/{len(pendentes)}: {nome}")
+
+                total_transacoes = len(lote["transacoes"])
+                for i, trn in enumerate(lote["transacoes"], start=1):
+                    if i % 500 == 0:
+                        verificar_cancelamento(cancelar)
+                        avisar(inicio_arquivo + passo_arquivo * i / total_transacoes,
+                               f"Arquivo {indice + 1}/{len(pendentes)}: {nome} ({i}/{total_transacoes} linhas)")
+                    base = trn.base_impressao(banco_id, account_id)
+                    ocorrencia = ocorrencias.get(base, 0)
+                    ocorrencias[base] = ocorrencia + 1
+                    impressao = impressao_digital(base, ocorrencia)
+                    if impressao in impressoes:
+                        ignorados += 1
+                        continue
+                    if not trn.fitid:  # PDF/CSV não trazem FITID
+                        trn.fitid = f"{lote['origem']}-{impressao}"
+                    # Mesmo lançamento já importado de outra fonte (ex.: PDF x OFX da mesma conta)
+                    par = conciliador.procurar(banco_id, account_id, trn.data, trn.valor, lote["origem"],
+                                               trn.descricao, trn.memo, trn.nr_doc)
+                    if par is not None:
+                        logging.info(f"{nome}: {trn.fitid} conciliado com {par} ({trn.data_str} {trn.valor:.2f})")
+                        ignorados += 1
+                        conciliados += 1
+                        continue
+
+                    # O saldo acumulado definitivo é calculado pelo razão (razao.gravar)
+                    linhas.append(trn.linha_planilha(None, banco_id, data_processo, execucao)
+                                  + [account_id, impressao])
+                    processados += 1
+                    impressoes.add(impressao)
+                    chaves.append(impressao)
+
+                # Categoria do lote inteiro de uma vez (Descrição + MEMO)
+                categorias = categorizador.classificar([l[2] for l in linhas], [l[10] for l in linhas])
+                for linha, categoria in zip(linhas, categorias):
+                    linha.append(categoria)
 
-                ws.append([data_mov, tipo, historico, valor, saldo, banco_id, data_processo,
-                           execucao_atual, trntype, nr_doc, memo, fitid])
-                processados += 1
-                fitids_existentes.add(chave)
+                saldo_banco = lote.get("saldo_banco")
+                registro = {
+                    "arquivo": os.path.abspath(caminho_arquivo), "execucao": execucao,
+                    "banco_id": banco_id, "account_id": account_id,
+                    "data_processo": data_processo, "linhas": linhas, "chaves": chaves,
+                    "processados": processados, "ignorados": ignorados, "conciliados": conciliados,
+                    "saldo_banco": [saldo_banco[0].strftime("%d/%m/%Y"), saldo_banco[1]] if saldo_banco else None,
+                }
+                # Write-ahead: o lote vai para o diário antes de entrar na planilha
+                diario_registrar(diario, registro)
+                total = totais[numero]
+                total["divergencias"] += self.aplicar(registro, execucao)
+                total["processados"] += processados
+                total["ignorados"] += ignorados
+                total["conciliados"] += conciliados
+                total["por_arquivo"][registro["arquivo"]] = (processados, ignorados)
 
-        # Registrar log por arquivo
-        ws_log.append([data_processo, os.path.basename(caminho_arquivo),
-                       banco_id, account_id, execucao_atual,
-                       processados, ignorados,
-                       "", "", saldo, "", "OK"])
+            avisar(90, "Recalculando saldos...")
+            razao.gravar(ws)
+            atualizar_aba_bancos(self.wb, ws, razao, arquivado=self.resumo_arquivado)
+            inseridas = {execucao: [[celula.value for celula in ws[num_linha]] for num_linha in linhas]
+                         for execucao, linhas in self.inseridas.items()}
+            verificar_cancelamento(cancelar)  # último ponto de cancelamento: depois disso o save é atômico
+        except ImportacaoCancelada:
+            self.reverter_diario()
+            logging.info(f"Importação da execução {execucao_atual} cancelada pelo usuário")
+            raise
 
-        total_processados += processados
-        total_ignorados += ignorados
+        avisar(95, "Salvando planilha...")
+        self.salvar()
+        self.diario_antes = None  # salvo: o diário só serve para o delta (ver alteracoes.py)
+        self.execucao_atual = execucao_atual + len(grupos)
+        # Antes de apagar o diário (ver alteracoes.py)
+        for numero in range(len(grupos)):
+            inseridas.setdefault(execucao_atual + numero, [])
+        for execucao in sorted(inseridas):
+            emitir_com_seguranca(saida, execucao, inseridas[execucao], importacao=importacao)
+        os.remove(diario)
+        avisar(100, "Concluído")
 
-    atualizar_aba_bancos(wb, ws)
-    wb.save(saida)
+        saldo = round(sum(razao.saldos().values()), 2)
+        return [{
+            "arquivos": len(total["por_arquivo"]), "retomados": retomados if numero == 0 else 0,
+            "execucao": execucao_atual + numero,
+            "adicionados": total["processados"], "ignorados": total["ignorados"],
+            "conciliados": total["conciliados"], "saldo": saldo, "divergencias": total["divergencias"],
+            "por_arquivo": total["por_arquivo"],
+        } for numero, total in enumerate(totais)]
 
+    def lancar(self, lancamentos):
+        """
+        Grava lançamentos manuais numa única execução e num único save. Cada
+        lançamento é um dict com data, tipo ("Entrada"/"Saída"), descricao,
+        valor, banco_id, conta, nr_doc e memo. Devolve {"execucao", "lancados"}.
+        """
+        return self.lancar_grupos([lancamentos])[0]
+
+    def lancar_grupos(self, grupos):
+        """Como lancar, com uma execução por lista de lançamentos e um único save"""
+        # Valida tudo antes de tocar na planilha
+        for lancamento in (l for lancamentos in grupos for l in lancamentos):
+            lancamento["valor"] = abs(float(str(lancamento["valor"]).replace(",", ".")))
+            if lancamento.get("tipo", "Entrada") not in ("Entrada", "Saída"):
+                raise ValueError(f"Tipo inválido: {lancamento['tipo']}")
+        try:
+            self.carregar()
+            ws, razao, primeira = self.ws, self.razao, self.execucao_atual
+            categorizador = categorizador_para(self.saida)
+            data_processo = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
+            linhas = {}
+            for numero, lancamentos in enumerate(grupos):
+                execucao = primeira + numero
+                linhas[execucao] = []
+                for lancamento in lancamentos:
+                    data_mov = lancamento["data"]
+                    tipo = lancamento.get("tipo", "Entrada")
+                    descricao = lancamento.get("descricao", "")
+                    valor = lancamento["valor"]
+                    banco_id = lancamento.get("banco_id", "")
+                    conta = lancamento.get("conta") or "N/A"
+                    nr_doc = lancamento.get("nr_doc", "")
+                    memo = lancamento.get("memo", "")
+                    valor_assinado = valor if tipo == "Entrada" else -valor
+
+                    # Lançamento manual nunca é duplicata: repetir o mesmo conteúdo gera a próxima ocorrência
+                    base = base_impressao(banco_id, conta, data_br(data_mov), valor_assinado, nr_doc, descricao)
+                    ocorrencia = 0
+                    while impressao_digital(base, ocorrencia) in self.impressoes:
+                        ocorrencia += 1
+                    impressao = impressao_digital(base, ocorrencia)
+                    self.impressoes.add(impressao)
+                    fitid = f"MANUAL-{impressao}"
+
+                    livro = razao.livro(banco_id, conta)
+                    num_linha = proxima_linha(ws)
+                    ws.append([data_mov, tipo, descricao, valor_assinado, None, banco_id, data_processo, execucao,
+                               "CREDIT" if tipo == "Entrada" else "DEBIT", nr_doc, memo, fitid, conta, impressao,
+                               categorizador.categoria(descricao, memo)])
+                    livro.inserir(data_br(data_mov), valor_assinado, num_linha)
+                    linhas[execucao].append(num_linha)
+                    self.ws_log.append([
+                        data_processo, "MANUAL", banco_id, conta, execucao, 1, 0,
+                        valor if tipo == "Entrada" else 0, valor if tipo == "Saída" else 0,
+                        livro.saldo_final, fitid, "OK"
+                    ])
+
+            razao.gravar(ws)
+            atualizar_aba_bancos(self.wb, ws, razao, arquivado=self.resumo_arquivado)
+            inseridas = {execucao: [[celula.value for celula in ws[num_linha]] for num_linha in numeros]
+                         for execucao, numeros in linhas.items()}
+            self.salvar()
+        except BaseException:
+            self.descartar()
+            raise
+        self.execucao_atual = primeira + len(grupos)
+        for execucao, linhas_execucao in inseridas.items():
+            emitir_com_seguranca(self.saida, execucao, linhas_execucao)
+        return [{"execucao": primeira + numero, "lancados": len(lancamentos)}
+                for numero, lancamentos in enumerate(grupos)]
+
+    def desfazer(self, exec_num, progresso=None, cancelar=None):
+        """remover_execucao sobre a planilha em disco; a sessão recarrega na próxima operação"""
+        self.descartar()
+        return remover_execucao(self.saida, exec_num, progresso, cancelar)
+
+
+def importar_arquivos(arquivos, saida, trabalhadores=TRABALHADORES_LEITURA, profundidade=PROFUNDIDADE_FILA,
+                      progresso=None, cancelar=None):
+    """
+    Importa os arquivos para a planilha `saida`.
+    A leitura (OFX/PDF) roda em paralelo em `pipeline_leitura`; este laço é o
+    único escritor e consome os lotes na ordem dos arquivos.
+    Cada arquivo processado é gravado no diário antes de entrar na planilha;
+    se uma execução anterior caiu antes do save, o diário é reaplicado
+    automaticamente e os arquivos já registrados nele não são lidos de novo.
+    Os saldos acumulados são mantidos pelo razão por conta, em ordem de data,
+    e conferidos com o saldo informado pelo banco (LEDGERBAL / saldo do PDF).
+
+    `progresso(percentual, mensagem)` recebe o andamento por arquivo e por
+    linha; se `cancelar` (threading.Event) for acionado antes do save, a
+    importação para com ImportacaoCancelada e a planilha fica intocada.
+    """
+    return SessaoImportacao(saida).importar(arquivos, trabalhadores, profundidade, progresso, cancelar)
+
+# ==========================================================
+# Servidor de importação (servidor_importacao.py), se estiver no ar
+# ==========================================================
+def servidor_para(saida):
+    """Cliente do servidor quando ele está no ar e é o dono de `saida`; senão None"""
+    from cliente_importacao import ClienteImportacao
+
+    cliente = ClienteImportacao()
+    return cliente if cliente.atende(saida) else None
+
+
+# ==========================================================
+# Função: importar múltiplos arquivos (menu)
+# ==========================================================
+def atualizar():
+    arquivos = filedialog.askopenfilenames(
+        title="Selecione arquivos de extrato (OFX, PDF, CSV ou .zip/.tar.gz com eles)",
+        filetypes=[("Extratos", " ".join("*" + e for e in extensoes_suportadas() + EXTENSOES_COMPACTADAS)),
+                   ("Todos os arquivos", "*.*")]
+    )
+    if not arquivos:
+        return
+
+    saida = os.path.join(os.path.dirname(arquivos[0]), "extrato_ofx.xlsx")
+    cliente = servidor_para(saida)
+    if cliente:
+        # O servidor é o único que grava a planilha; aqui só se espera a resposta
+        tarefa = lambda progresso, cancelar: cliente.importar(arquivos)
+    else:
+        tarefa = lambda progresso, cancelar: importar_arquivos(arquivos, saida, progresso=progresso,
+                                                               cancelar=cancelar)
+    executar_em_segundo_plano("Importando extratos", tarefa, mostrar_resumo_importacao)
+
+def mostrar_resumo_importacao(resumo):
+    retomada = ""
+    if resumo["retomados"]:
+        retomada = f"Retomados do diário: {resumo['retomados']} arquivo(s)\n"
+    arquivados = ""
+    if resumo.get("arquivamento", {}).get("movidas"):
+        arquivados = f"\nLinhas arquivadas (meses antigos): {resumo['arquivamento']['movidas']}"
     messagebox.showinfo("Processo concluído",
-                        f"Arquivos processados: {len(arquivos)}\n"
-                        f"Adicionados: {total_processados}\n"
-                        f"Ignorados: {total_ignorados}\n"
-                        f"Saldo final: {saldo:.2f}")
+                        f"{retomada}"
+                        f"Arquivos processados: {resumo['arquivos']}\n"
+                        f"Adicionados: {resumo['adicionados']}\n"
+                        f"Ignorados: {resumo['ignorados']}"
+                        f" (conciliados com outra fonte: {resumo.get('conciliados', 0)})\n"
+                        f"Saldo final: {resumo['saldo']:.2f}\n"
+                        f"Divergências com o saldo do banco: {resumo['divergencias']}"
+                        f"{arquivados}")
 
 # ==========================================================
 # Função: lançamento manual
 # ==========================================================
 def lancar_manual(saida):
-    wb, ws, execucao_atual = carregar_planilha(saida)
-
-    if "LOG_PROCESSAMENTO" in wb.sheetnames:
-        ws_log = wb["LOG_PROCESSAMENTO"]
-    else:
-        ws_log = wb.create_sheet("LOG_PROCESSAMENTO")
-        ws_log.append([
-            "Data Processamento", "Arquivo", "Banco", "Conta", "Execução",
-            "Adicionados", "Ignorados", "Entradas (R$)", "Saídas (R$)", "Saldo Final (R$)", "FITID", "Status"
-        ])
+    """
+    Formulário de lançamento manual. "Adicionar à fila" acumula vários
+    lançamentos; "Salvar" grava a fila inteira de uma vez (um único save),
+    pela SessaoImportacao ou pelo servidor de importação, se estiver no ar.
+    """
+    fila = []  # dicts no formato de SessaoImportacao.lancar
 
     top = tk.Toplevel()
     top.title("Lançamento Manual")
@@ -315,6 +983,11 @@ def lancar_manual(saida):
     entry_banco = tk.Entry(top)
     entry_banco.pack()
 
+    tk.Label(top, text="Conta:").pack()
+    entry_conta = tk.Entry(top)
+    entry_conta.pack()
+    entry_conta.insert(0, "N/A")
+
     tk.Label(top, text="Nr. Documento:").pack()
     entry_nr_doc = tk.Entry(top)
     entry_nr_doc.pack()
@@ -323,46 +996,82 @@ def lancar_manual(saida):
     entry_memo = tk.Entry(top)
     entry_memo.pack()
 
-    def salvar():
-        nonlocal execucao_atual
+    tk.Label(top, text="Fila (ainda não gravados):").pack()
+    lista_fila = tk.Listbox(top, width=60, height=5)
+    lista_fila.pack()
+
+    def adicionar():
         data_mov = entry_data.get()
         tipo = var_tipo.get()
         descricao = entry_desc.get()
-        valor = float(entry_valor.get())
-        banco_id = entry_banco.get()
-        nr_doc = entry_nr_doc.get()
-        memo = entry_memo.get()
-        data_processo = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
-        fitid = f"MANUAL-{execucao_atual}-{int(time.time())}"
-
-        saldo = 0
-        for row in ws.iter_rows(min_row=2, values_only=True):
-            if row and row[4]:
-                saldo = row[4]
-        saldo += valor if tipo == "Entrada" else -valor
-        trntype = "CREDIT" if tipo == "Entrada" else "DEBIT"
-
-        ws.append([data_mov, tipo, descricao,
-                   valor if tipo == "Entrada" else -valor,
-                   saldo, banco_id, data_processo, execucao_atual,
-                   trntype, nr_doc, memo, fitid])
-
-        ws_log.append([
-            data_processo, "MANUAL", banco_id, "N/A",
-            execucao_atual, 1, 0,
-            valor if tipo == "Entrada" else 0,
-            valor if tipo == "Saída" else 0,
-            saldo, fitid, "OK"
-        ])
-
-        atualizar_aba_bancos(wb, ws)
-        wb.save(saida)
-        messagebox.showinfo("Sucesso", "Lançamento manual adicionado com sucesso!")
-        top.destroy()
+        try:
+            valor = float(entry_valor.get().replace(",", "."))
+        except ValueError:
+            messagebox.showerror("Erro", "Valor inválido.", parent=top)
+            return False
+        fila.append({
+            "data": data_mov, "tipo": tipo, "descricao": descricao, "valor": valor,
+            "banco_id": entry_banco.get(), "conta": entry_conta.get() or "N/A",
+            "nr_doc": entry_nr_doc.get(), "memo": entry_memo.get(),
+        })
+        lista_fila.insert(tk.END, f"{data_mov}  {tipo:<7} {valor:>10.2f}  {entry_banco.get()}  {descricao}")
+        for entry in (entry_desc, entry_valor, entry_nr_doc, entry_memo):
+            entry.delete(0, tk.END)
+        return True
+
+    def salvar():
+        # Campos preenchidos e não enfileirados entram junto
+        if entry_valor.get().strip() and not adicionar():
+            return
+        if not fila:
+            messagebox.showwarning("Aviso", "Nenhum lançamento para salvar.", parent=top)
+            return
+
+        def gravar(progresso, cancelar):
+            # Carregar e salvar a planilha leva segundos: fica fora da thread do Tk
+            progresso(10, "Gravando lançamentos...")
+            cliente = servidor_para(saida)
+            if cliente:
+                return cliente.lancar(fila)
+            return SessaoImportacao(saida).lancar(fila)
 
+        def concluir(resumo):
+            messagebox.showinfo("Sucesso", f"{len(fila)} lançamento(s) manual(is) adicionado(s) com sucesso!")
+            top.destroy()
+
+        # Em caso de erro a janela continua aberta, com a fila, para tentar de novo
+        executar_em_segundo_plano("Lançamento manual", gravar, concluir)
+
+    tk.Button(top, text="Adicionar à fila", command=adicionar).pack()
     tk.Button(top, text="Salvar", command=salvar).pack()
     top.mainloop()
 
+# ==========================================================
+# Função: compactar extrato (remover duplicatas)
+# ==========================================================
+def compactar_planilha(saida):
+    from compactar_extrato import compactar
+
+    if not messagebox.askyesno("Compactar Extrato",
+                               "Remover lançamentos duplicados e recalcular saldos?\n"
+                               "As linhas removidas serão listadas em um CSV."):
+        return
+
+    def tarefa(progresso, cancelar):
+        verificar_cancelamento(cancelar)
+        progresso(10, "Compactando extrato...")
+        return compactar(saida)
+
+    def concluir(resumo):
+        relatorio = f"\nRelatório: {resumo['relatorio']}" if resumo["relatorio"] else ""
+        messagebox.showinfo("Compactação concluída",
+                            f"Linhas lidas: {resumo['lidas']}\n"
+                            f"Duplicadas removidas: {resumo['removidas']}"
+                            f" (entre fontes: {resumo['conciliadas']})\n"
+                            f"Tempo: {resumo['segundos']} s{relatorio}")
+
+    executar_em_segundo_plano("Compactar Extrato", tarefa, concluir)
+
 # ==========================================================
 # Menu gráfico
 # ==========================================================
@@ -370,9 +1079,18 @@ def menu_grafico(saida):
     root = tk.Tk()
     root.title("Menu - Processamento Extratos")
 
+    # Importação interrompida na última vez: conclui a partir do diário
+    # (com o servidor no ar, quem retoma é ele)
+    if os.path.exists(caminho_diario(saida)) and not servidor_para(saida):
+        executar_em_segundo_plano(
+            "Retomando importação",
+            lambda progresso, cancelar: importar_arquivos([], saida, progresso=progresso, cancelar=cancelar),
+            mostrar_resumo_importacao)
+
     tk.Button(root, text="📥 Atualizar (importar OFX/PDF)", command=atualizar, width=40).pack(pady=5)
     tk.Button(root, text="✍️ Lançamento Manual", command=lambda: lancar_manual(saida), width=40).pack(pady=5)
     tk.Button(root, text="⏪ Desfazer Execução", command=lambda: desfazer_execucao(saida), width=40).pack(pady=5)
+    tk.Button(root, text="🧹 Compactar Extrato", command=lambda: compactar_planilha(saida), width=40).pack(pady=5)
     tk.Button(root, text="❌ Sair", command=root.destroy, width=40).pack(pady=5)
 
     root.mainloop()
@@ -380,5 +1098,6 @@ def menu_grafico(saida):
 # ==========================================================
 # Execução principal
 # ==========================================================
-saida = os.path.join(os.getcwd(), "extrato_ofx.xlsx")
-menu_grafico(saida)
+if __name__ == "__main__":
+    saida = os.path.join(os.getcwd(), "extrato_ofx.xlsx")
+    menu_grafico(saida)
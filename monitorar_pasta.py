@@ -0,0 +1,207 @@
+# ==========================================================
+# SCRIPT: Monitorar pastas e importar extratos automaticamente
+# Fica rodando e importa para o extrato_ofx.xlsx todo extrato novo
+# (OFX/PDF/CSV, ver leitores.py, soltos ou em .zip/.tar.gz) que aparecer nas pastas vigiadas,
+# sem precisar abrir o menu.
+#   - inotify (pacote opcional inotify_simple) quando disponível;
+#     senão, varredura periódica com os.scandir
+#   - arquivo só é lido depois de ficar com tamanho e data de
+#     modificação estáveis (download/cópia terminada)
+#   - os arquivos que chegam juntos entram numa única execução; se o
+#     lote falhar, cada arquivo é tentado sozinho e só o que entrou na
+#     planilha é marcado como importado
+#   - a planilha, o razão e o índice de impressões digitais ficam
+#     em memória entre uma importação e outra (SessaoImportacao), e os
+#     processos de leitura ficam no ar enquanto o monitor roda
+#
+# Uso:
+#   python monitorar_pasta.py PASTA [PASTA ...] [--saida extrato_ofx.xlsx]
+#                             [--intervalo 2] [--estabilidade 2] [--trabalhadores N]
+# Requisitos opcionais:
+#   pip install inotify_simple
+# ==========================================================
+
+import argparse
+import json
+import logging
+import os
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from leitores import EXTENSOES_COMPACTADAS, extensoes_suportadas, separar_membro
+from main import TRABALHADORES_LEITURA, SessaoImportacao, caminho_diario
+
+try:
+    from inotify_simple import INotify, flags
+except ImportError:
+    INotify = None
+
+EXTENSOES = extensoes_suportadas() + EXTENSOES_COMPACTADAS
+
+
+# ==========================================================
+# Controle dos arquivos já importados (sobrevive a reinícios)
+# ==========================================================
+def caminho_controle(saida):
+    return saida + ".monitor.json"
+
+
+def ler_controle(saida):
+    """{caminho: [tamanho, mtime]} dos arquivos já importados"""
+    try:
+        with open(caminho_controle(saida), encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def gravar_controle(saida, importados):
+    destino = caminho_controle(saida)
+    temporario = destino + ".tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(importados, f)
+    os.replace(temporario, destino)
+
+
+# ==========================================================
+# Detecção de arquivos novos
+# ==========================================================
+def varrer(pastas):
+    """{caminho: (tamanho, mtime)} de todos os extratos (OFX/PDF/CSV) das pastas"""
+    encontrados = {}
+    for pasta in pastas:
+        try:
+            entradas = list(os.scandir(pasta))
+        except FileNotFoundError:
+            continue
+        for entrada in entradas:
+            if entrada.is_file() and entrada.name.lower().endswith(EXTENSOES):
+                info = entrada.stat()
+                encontrados[os.path.abspath(entrada.path)] = (info.st_size, info.st_mtime)
+    return encontrados
+
+
+class Vigia:
+    """Espera por mudanças nas pastas: inotify se houver, senão só o intervalo de varredura"""
+
+    def __init__(self, pastas):
+        self.inotify = None
+        if INotify is not None:
+            self.inotify = INotify()
+            for pasta in pastas:
+                self.inotify.add_watch(pasta, flags.CLOSE_WRITE | flags.MOVED_TO | flags.CREATE)
+            logging.info("Monitorando com inotify")
+        else:
+            logging.info("inotify_simple não instalado: monitorando por varredura")
+
+    def esperar(self, segundos):
+        if self.inotify is None:
+            time.sleep(segundos)
+        else:
+            self.inotify.read(timeout=int(segundos * 1000))
+
+
+# ==========================================================
+# Laço principal
+# ==========================================================
+def ignorar_ctrl_c():
+    """Nos processos de leitura: o Ctrl+C é do monitor, que encerra o pool"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def monitorar(pastas, saida, intervalo=2.0, estabilidade=2.0, trabalhadores=TRABALHADORES_LEITURA):
+    sessao = SessaoImportacao(saida)
+    if trabalhadores > 0:
+        # Um pool de leitura para o monitor inteiro, em vez de um por importação
+        sessao.executor = ProcessPoolExecutor(max_workers=trabalhadores, initializer=ignorar_ctrl_c)
+    try:
+        _monitorar(sessao, pastas, saida, intervalo, estabilidade, trabalhadores)
+    finally:
+        if sessao.executor is not None:
+            sessao.executor.shutdown(cancel_futures=True)
+
+
+def _monitorar(sessao, pastas, saida, intervalo, estabilidade, trabalhadores):
+    importados = ler_controle(saida)
+    falhas = {}  # caminho -> assinatura de arquivo que não pôde ser lido (tenta de novo se mudar)
+    vistos = {}  # caminho -> (tamanho, mtime, desde quando está assim)
+    vigia = Vigia(pastas)
+
+    if os.path.exists(caminho_diario(saida)):
+        # Importação interrompida: conclui antes de aceitar arquivos novos
+        resumo = sessao.importar([], trabalhadores)
+        logging.info(f"Execução {resumo['execucao']} retomada do diário")
+
+    sessao.carregar()  # deixa a planilha e o índice prontos antes do primeiro arquivo
+    print(f"👀 Monitorando {', '.join(pastas)} → {saida} (Ctrl+C para sair)")
+
+    while True:
+        agora = time.monotonic()
+        atuais = varrer(pastas)
+        prontos = []
+        for caminho, assinatura in atuais.items():
+            if importados.get(caminho) == list(assinatura) or falhas.get(caminho) == assinatura:
+                continue
+            anterior = vistos.get(caminho)
+            if anterior is None or anterior[:2] != assinatura:
+                vistos[caminho] = (*assinatura, agora)  # mudou: recomeça a contar
+            elif agora - anterior[2] >= estabilidade:
+                prontos.append(caminho)
+        for caminho in list(vistos):
+            if caminho not in atuais:
+                del vistos[caminho]
+
+        if prontos:
+            prontos.sort()
+            inicio = time.perf_counter()
+            try:
+                execucoes = [(prontos, sessao.importar(prontos, trabalhadores))]
+            except Exception as e:
+                logging.error(f"Falha ao importar {prontos}: {e}; tentando um arquivo por vez")
+                execucoes = []
+                for caminho in prontos:
+                    try:
+                        execucoes.append(([caminho], sessao.importar([caminho], trabalhadores)))
+                    except OSError as e:
+                        # Planilha aberta/travada, disco...: volta na próxima varredura
+                        logging.error(f"Falha ao importar {caminho}: {e}")
+                        print(f"❌ {os.path.basename(caminho)}: {e} (nova tentativa na próxima varredura)")
+                    except Exception as e:
+                        # Problema do próprio arquivo: tenta de novo quando ele mudar
+                        logging.error(f"Falha ao importar {caminho}: {e}")
+                        print(f"❌ {os.path.basename(caminho)}: {e}")
+                        falhas[caminho] = atuais[caminho]
+            for caminhos, resumo in execucoes:
+                # Inclui o que a execução retomou do diário (lote que falhou no meio)
+                entraram = set(caminhos) | {separar_membro(fonte)[0] for fonte in resumo["por_arquivo"]}
+                for caminho in entraram & atuais.keys():
+                    importados[caminho] = list(atuais[caminho])
+                print(f"✅ Execução {resumo['execucao']}: {len(entraram)} arquivo(s), "
+                      f"{resumo['adicionados']} lançamentos novos, {resumo['ignorados']} duplicados "
+                      f"em {time.perf_counter() - inicio:.2f} s")
+            for caminho in prontos:
+                vistos.pop(caminho, None)
+            gravar_controle(saida, importados)
+            continue
+
+        # Com arquivo aguardando estabilizar, volta logo; senão espera evento/intervalo
+        vigia.esperar(min(intervalo, estabilidade) if vistos else intervalo)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Importa automaticamente extratos novos das pastas vigiadas")
+    parser.add_argument("pastas", nargs="+", help="pastas a monitorar")
+    parser.add_argument("--saida", default=os.path.join(os.getcwd(), "extrato_ofx.xlsx"),
+                        help="planilha de destino (padrão: extrato_ofx.xlsx)")
+    parser.add_argument("--intervalo", type=float, default=2.0, help="segundos entre varreduras")
+    parser.add_argument("--estabilidade", type=float, default=2.0,
+                        help="segundos sem mudança antes de considerar o arquivo completo")
+    parser.add_argument("--trabalhadores", type=int, default=TRABALHADORES_LEITURA,
+                        help=f"processos de leitura (0 = no próprio processo; padrão: {TRABALHADORES_LEITURA})")
+    args = parser.parse_args()
+    try:
+        monitorar([os.path.abspath(p) for p in args.pastas], args.saida, args.intervalo, args.estabilidade,
+                  args.trabalhadores)
+    except KeyboardInterrupt:
+        print("Monitoramento encerrado.")
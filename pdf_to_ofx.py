@@ -3,28 +3,28 @@
 # Requisitos: pip install pdfplumber
 # ==========================================================
 
-import pdfplumber
 from datetime import datetime
+from cache_pdf import abrir_pdf
+from transacao import Transacao, data_br
 
 # Arquivos
 entrada_pdf = r"C:\Users\jac\Documents\cursos python\conversos xml para xls\bases\cef_Extrato.pdf.pdf"
 saida_ofx = r"C:\Users\jac\Documents\cursos python\conversos xml para xls\bases\cef_Extrato_convertido.ofx"
 
 # Função para criar uma transação OFX
-def gerar_transacao(tipo, idx, valor, data, descricao):
-    sinal = "" if tipo == "CREDIT" else "-"
+def gerar_transacao(trn, idx):
     return f"""  <STMTTRN>
-    <TRNTYPE>{tipo}</TRNTYPE>
-    <DTPOSTED>{data.strftime('%Y%m%d')}</DTPOSTED>
-    <TRNAMT>{sinal}{valor:.2f}</TRNAMT>
-    <FITID>{tipo}{idx:04d}</FITID>
-    <NAME>{descricao}</NAME>
+    <TRNTYPE>{trn.trntype}</TRNTYPE>
+    <DTPOSTED>{trn.data.strftime('%Y%m%d')}</DTPOSTED>
+    <TRNAMT>{trn.valor:.2f}</TRNAMT>
+    <FITID>{trn.trntype}{idx:04d}</FITID>
+    <NAME>{trn.descricao}</NAME>
   </STMTTRN>"""
 
 # Lista de transações
 transacoes = []
 
-with pdfplumber.open(entrada_pdf) as pdf:
+with abrir_pdf(entrada_pdf) as pdf:
     for pagina in pdf.pages:
         tabela = pagina.extract_table()
         if not tabela:
@@ -34,15 +34,16 @@ with pdfplumber.open(entrada_pdf) as pdf:
             data_txt, descricao, valor_txt = linha
 
             try:
-                data = datetime.strptime(data_txt, "%d/%m/%Y")
+                data = data_br(data_txt)
+                if data is None:
+                    continue
                 valor = float(valor_txt.replace(".", "").replace(",", "."))
-                tipo = "CREDIT" if valor > 0 else "DEBIT"
-                idx = len(transacoes) + 1
-                transacoes.append(gerar_transacao(tipo, idx, abs(valor), data, descricao.strip()))
+                transacoes.append(Transacao(data, valor, descricao.strip()))
             except:
                 continue
 
 # Montar OFX
+stmttrns = "\n".join(gerar_transacao(trn, idx) for idx, trn in enumerate(transacoes, start=1))
 ofx_content = f"""OFXHEADER:100
 DATA:OFXSGML
 VERSION:102
@@ -74,7 +75,7 @@ NEWFILEUID:NONE
           <ACCTTYPE>CHECKING</ACCTTYPE>
         </BANKACCTFROM>
         <BANKTRANLIST>
-{"\n".join(transacoes)}
+{stmttrns}
         </BANKTRANLIST>
       </STMTRS>
     </STMTTRNRS>
@@ -0,0 +1,216 @@
+# ==========================================================
+# Resumos gerenciais do extrato (abas RESUMO_MENSAL e CONTRAPARTES)
+# Recriados a cada gravação, junto com a aba BANCOS:
+#   - RESUMO_MENSAL: entradas, saídas e líquido por conta × mês
+#   - CONTRAPARTES: descrições com maior movimento (entradas + saídas)
+# As colunas usadas (data, descrição, valor, banco, conta) são lidas
+# numa única passada e viram arrays; os totais saem de group-bys do
+# pandas/NumPy, sem laço em Python por lançamento. Datas, descrições e
+# contas são convertidas só nos valores distintos (factorize).
+# Meses arquivados (arquivamento.py) entram pelos totais guardados no
+# índice do arquivo, sem abrir as planilhas anuais.
+# Sem pandas instalado as abas simplesmente não são geradas.
+# ==========================================================
+
+import logging
+from operator import itemgetter
+
+from leitura_xlsx import celulas_diretas, ultima_linha
+
+try:
+    import numpy as np
+    import pandas as pd
+except ImportError:  # opcional: o resto da importação funciona sem ele
+    np = pd = None
+
+ABAS_RESUMO = ("RESUMO_MENSAL", "CONTRAPARTES")
+TOP_CONTRAPARTES = 50
+
+COLUNAS_MENSAL = ["banco", "conta", "mes", "quantidade", "entradas", "saidas"]
+COLUNAS_CONTRAPARTES = ["descricao", "quantidade", "entradas", "saidas"]
+
+
+def _texto(valor):
+    return "" if valor is None else str(valor)
+
+
+def _conta(valor):
+    return "N/A" if valor in (None, "") else str(valor)
+
+
+def _descricao(valor):
+    return " ".join(str(valor).split()).upper() if valor is not None else ""
+
+
+def _codificar(valores, normalizar):
+    """Códigos inteiros + rótulos, normalizando só os valores distintos"""
+    codigos, unicos = pd.factorize(np.asarray(valores, dtype=object), use_na_sentinel=False)
+    rotulos = np.asarray([normalizar(u) for u in unicos], dtype=object)
+    # Normalizar pode juntar valores distintos ("PIX  X" e "pix x")
+    recodigos, rotulos = pd.factorize(rotulos)
+    return recodigos[codigos], np.asarray(rotulos, dtype=object)
+
+
+def _meses(datas):
+    """"dd/mm/aaaa" -> aaaamm (0 = sem data válida)"""
+    codigos, unicas = pd.factorize(np.asarray(datas, dtype=object), use_na_sentinel=False)
+    convertidas = pd.to_datetime(pd.Series([u if isinstance(u, str) else None for u in unicas], dtype=object),
+                                 format="%d/%m/%Y", errors="coerce")
+    meses = (convertidas.dt.year * 100 + convertidas.dt.month).fillna(0).to_numpy(dtype=np.int64)
+    return meses[codigos]
+
+
+# ==========================================================
+# Colunas usadas: Data, Descrição, Valor, Banco ID, Conta
+# ==========================================================
+INDICES = (0, 2, 3, 5, 12)
+
+
+def colunas_linhas(linhas):
+    """Linhas (tuplas/listas, sem o cabeçalho) -> listas das colunas usadas"""
+    linhas = linhas if isinstance(linhas, list) else list(linhas)
+    if not linhas:
+        return [[] for _ in INDICES]
+    if len(linhas[0]) <= INDICES[-1]:  # planilha antiga, sem a coluna Conta
+        return [list(map(itemgetter(i), linhas)) for i in INDICES[:-1]] + [[None] * len(linhas)]
+    return [list(map(itemgetter(i), linhas)) for i in INDICES]
+
+
+def colunas_planilha(ws):
+    """
+    Colunas usadas direto das células da aba em memória: ~5x mais rápido
+    que ws.iter_rows, que monta a linha inteira (14 colunas) célula a célula.
+    """
+    celulas = celulas_diretas(ws)
+    if celulas is None:
+        linhas = list(ws.iter_rows(min_row=2, max_col=max(INDICES) + 1, values_only=True))
+        return [[linha[indice] for linha in linhas] for indice in INDICES]
+    linhas = range(2, ultima_linha(ws) + 1)
+    colunas = []
+    for indice in INDICES:
+        coluna = indice + 1
+        colunas.append([c.value if c is not None else None
+                        for c in map(celulas.get, ((linha, coluna) for linha in linhas))])
+    return colunas
+
+
+# ==========================================================
+# Agregação (vetorizada)
+# ==========================================================
+def agregar(colunas):
+    """
+    Colunas do extrato (colunas_linhas / colunas_planilha) -> totais
+    parciais (mensal, contrapartes) como DataFrames, já com rótulos em
+    texto para poderem ser somados a outros parciais (ex.: do arquivo).
+    """
+    datas, descricoes, valores, bancos, contas = colunas
+    if not len(valores):
+        return (pd.DataFrame(columns=COLUNAS_MENSAL), pd.DataFrame(columns=COLUNAS_CONTRAPARTES))
+
+    valor = pd.to_numeric(pd.Series(valores, dtype=object), errors="coerce").to_numpy(dtype=np.float64)
+    numericos = ~np.isnan(valor)  # linhas sem lançamento (total, anotação) ficam de fora
+
+    mes = _meses(datas)[numericos]
+    banco, rotulos_banco = _codificar(bancos, _texto)
+    conta, rotulos_conta = _codificar(contas, _conta)
+    descricao, rotulos_descricao = _codificar(descricoes, _descricao)
+    valor = valor[numericos]
+
+    quadro = pd.DataFrame({
+        "banco": banco[numericos], "conta": conta[numericos], "mes": mes, "descricao": descricao[numericos],
+        "quantidade": np.ones(len(valor), dtype=np.int64),
+        "entradas": np.where(valor > 0, valor, 0.0), "saidas": np.where(valor < 0, valor, 0.0),
+    })
+    somas = ["quantidade", "entradas", "saidas"]
+
+    mensal = quadro.groupby(["banco", "conta", "mes"], sort=False)[somas].sum().reset_index()
+    mensal["banco"] = rotulos_banco[mensal["banco"].to_numpy()]
+    mensal["conta"] = rotulos_conta[mensal["conta"].to_numpy()]
+
+    contrapartes = quadro.groupby("descricao", sort=False)[somas].sum().reset_index()
+    contrapartes["descricao"] = rotulos_descricao[contrapartes["descricao"].to_numpy()]
+    return mensal[COLUNAS_MENSAL], contrapartes[COLUNAS_CONTRAPARTES]
+
+
+def combinar(*parciais):
+    """Soma parciais (mensal, contrapartes) — ex.: planilha quente + meses arquivados"""
+    mensais = [m for m, _ in parciais if len(m)]
+    contrapartes = [c for _, c in parciais if len(c)]
+    mensal = (pd.concat(mensais).groupby(["banco", "conta", "mes"], sort=False).sum().reset_index()
+              if mensais else pd.DataFrame(columns=COLUNAS_MENSAL))
+    contraparte = (pd.concat(contrapartes).groupby("descricao", sort=False).sum().reset_index()
+                   if contrapartes else pd.DataFrame(columns=COLUNAS_CONTRAPARTES))
+    return mensal, contraparte
+
+
+def para_indice(parcial):
+    """Parcial -> listas JSON (guardadas no índice do arquivo)"""
+    mensal, contrapartes = parcial
+    return {
+        "mensal": [[b, c, int(m), int(q), round(float(e), 2), round(float(s), 2)]
+                   for b, c, m, q, e, s in mensal.itertuples(index=False)],
+        "contrapartes": [[d, int(q), round(float(e), 2), round(float(s), 2)]
+                         for d, q, e, s in contrapartes.itertuples(index=False)],
+    }
+
+
+def do_indice(resumo):
+    return (pd.DataFrame(resumo["mensal"], columns=COLUNAS_MENSAL),
+            pd.DataFrame(resumo["contrapartes"], columns=COLUNAS_CONTRAPARTES))
+
+
+def acumular(resumo, linhas):
+    """Soma `linhas` ao resumo guardado no índice do arquivo (dict ou None); devolve o novo resumo"""
+    if pd is None:
+        return resumo
+    parcial = agregar(colunas_linhas(linhas))
+    if resumo:
+        parcial = combinar(do_indice(resumo), parcial)
+    return para_indice(parcial)
+
+
+# ==========================================================
+# Abas
+# ==========================================================
+def _rotulo_mes(mes):
+    return f"{mes % 100:02d}/{mes // 100}" if mes else "sem data"
+
+
+def gravar_resumos(wb, colunas, arquivado=None):
+    """
+    Recria RESUMO_MENSAL e CONTRAPARTES a partir das colunas do extrato
+    (+ resumo dos meses arquivados, se houver). Funciona também com
+    planilhas write-only, que só aceitam append.
+    """
+    if pd is None:
+        logging.warning("pandas não instalado: abas de resumo não geradas")
+        return
+    parcial = agregar(colunas)
+    if arquivado:
+        parcial = combinar(parcial, do_indice(arquivado))
+    mensal, contrapartes = parcial
+
+    for nome in ABAS_RESUMO:
+        if nome in wb.sheetnames:
+            wb.remove(wb[nome])
+
+    ws_mensal = wb.create_sheet("RESUMO_MENSAL")
+    ws_mensal.append(["Banco ID", "Conta", "Mês", "Lançamentos", "Entradas (R$)", "Saídas (R$)", "Líquido (R$)"])
+    mensal = mensal.sort_values(["banco", "conta", "mes"])
+    for banco, conta, mes, quantidade, entradas, saidas in mensal.itertuples(index=False):
+        ws_mensal.append([banco, conta, _rotulo_mes(int(mes)), int(quantidade), round(float(entradas), 2),
+                          round(float(saidas), 2), round(float(entradas + saidas), 2)])
+    if len(mensal):
+        entradas, saidas = float(mensal["entradas"].sum()), float(mensal["saidas"].sum())
+        ws_mensal.append(["", "TOTAL", "", int(mensal["quantidade"].sum()), round(entradas, 2),
+                          round(saidas, 2), round(entradas + saidas, 2)])
+
+    ws_contrapartes = wb.create_sheet("CONTRAPARTES")
+    ws_contrapartes.append(["Descrição", "Lançamentos", "Entradas (R$)", "Saídas (R$)", "Movimento (R$)"])
+    if not len(contrapartes):
+        return
+    contrapartes = contrapartes.assign(movimento=contrapartes["entradas"].astype(float) - contrapartes["saidas"])
+    for descricao, quantidade, entradas, saidas, movimento in (
+            contrapartes.nlargest(TOP_CONTRAPARTES, "movimento").itertuples(index=False)):
+        ws_contrapartes.append([descricao, int(quantidade), round(float(entradas), 2),
+                                round(float(saidas), 2), round(float(movimento), 2)])
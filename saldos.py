@@ -0,0 +1,182 @@
+# ==========================================================
+# Motor de saldos por conta
+# Cada (Banco ID, Conta) tem um razão ordenado por data de lançamento
+# (dtposted); lançamentos fora de ordem entram na posição certa e só o
+# trecho posterior a eles tem o saldo acumulado recalculado.
+# O resultado é gravado na coluna "Saldo acumulado (R$)" apenas nas
+# linhas cujo saldo mudou.
+# A mesma conta vinda de fontes diferentes (OFX "0104" x PDF "CEF", ver
+# conciliacao.py) tem um livro só: o da primeira que aparecer, com um
+# saldo inicial e uma linha na aba BANCOS.
+# Meses já arquivados (arquivamento.py) não estão na planilha: o saldo
+# de abertura da conta já os inclui e o saldo de fim de dia deles vem
+# do índice do arquivo (historico).
+# ==========================================================
+
+from bisect import bisect_right
+from datetime import date
+
+FIM = date.max.toordinal() + 1  # lançamentos sem data válida ficam no fim
+TOLERANCIA = 0.005
+
+COL_SALDO = 5  # coluna "Saldo acumulado (R$)" (1-based, para ws.cell)
+
+
+class LivroConta:
+    """Razão de uma conta: lançamentos ordenados por (data, linha da planilha)"""
+
+    def __init__(self, saldo_inicial=None):
+        self.saldo_inicial = saldo_inicial  # None = ainda não conhecido (tratado como 0)
+        self.chaves = []    # (ordinal da data, nº da linha) — sempre ordenada
+        self.valores = []
+        self.saldos = []
+        self.linhas = []
+        self.gravados = []  # saldo que está hoje na planilha para cada linha
+        self.recalcular_desde = None
+        self.verificar_desde = None
+        self.historico = None  # (ordinais, saldos de fim de dia, saldo antes do 1º dia) dos meses arquivados
+
+    def __len__(self):
+        return len(self.chaves)
+
+    def _marcar(self, pos):
+        if self.recalcular_desde is None or pos < self.recalcular_desde:
+            self.recalcular_desde = pos
+        if self.verificar_desde is None or pos < self.verificar_desde:
+            self.verificar_desde = pos
+
+    def inserir(self, data, valor, linha, gravado=None):
+        """Insere um lançamento; custo O(log n) + deslocamento, saldo recalculado sob demanda"""
+        chave = (data.toordinal() if data else FIM, linha)
+        if not self.chaves or chave > self.chaves[-1]:
+            pos = len(self.chaves)  # caso comum: lançamento mais recente que todos
+            self.chaves.append(chave)
+        else:
+            pos = bisect_right(self.chaves, chave)
+            self.chaves.insert(pos, chave)
+        self.valores.insert(pos, valor)
+        self.saldos.insert(pos, None)
+        self.linhas.insert(pos, linha)
+        self.gravados.insert(pos, gravado)
+        self._marcar(pos)
+        return pos
+
+    def definir_saldo_inicial(self, saldo):
+        self.saldo_inicial = saldo
+        self._marcar(0)
+
+    def recalcular(self):
+        """Recalcula o saldo acumulado só a partir do primeiro lançamento alterado"""
+        pos = self.recalcular_desde
+        if pos is None:
+            return
+        saldo = self.saldos[pos - 1] if pos > 0 else (self.saldo_inicial or 0)
+        valores, saldos = self.valores, self.saldos
+        for i in range(pos, len(valores)):
+            saldo = round(saldo + valores[i], 2)
+            saldos[i] = saldo
+        self.recalcular_desde = None
+
+    @property
+    def saldo_final(self):
+        self.recalcular()
+        return self.saldos[-1] if self.saldos else (self.saldo_inicial or 0)
+
+    def definir_historico(self, ordinais, saldos, saldo_antes):
+        self.historico = (ordinais, saldos, saldo_antes)
+
+    def saldo_em(self, data):
+        """Saldo ao fim do dia `data` (consulta o histórico arquivado se a data for anterior à planilha)"""
+        self.recalcular()
+        ordinal = data.toordinal()
+        i = bisect_right(self.chaves, (ordinal, float("inf")))
+        if i:
+            return self.saldos[i - 1]
+        if self.historico:
+            ordinais, saldos, saldo_antes = self.historico
+            j = bisect_right(ordinais, ordinal)
+            if j < len(ordinais):
+                return saldos[j - 1] if j else saldo_antes
+        return self.saldo_inicial or 0
+
+    def alteracoes(self):
+        """(linha, saldo) das linhas cujo saldo na planilha está desatualizado"""
+        self.recalcular()
+        pos = self.verificar_desde
+        if pos is None:
+            return []
+        mudancas = []
+        for i in range(pos, len(self.saldos)):
+            if self.gravados[i] != self.saldos[i]:
+                mudancas.append((self.linhas[i], self.saldos[i]))
+                self.gravados[i] = self.saldos[i]
+        self.verificar_desde = None
+        return mudancas
+
+    def reconciliar(self, data, saldo_banco):
+        """
+        Compara o saldo informado pelo banco (LEDGERBAL do OFX ou saldo da
+        última linha do PDF) com o saldo do razão naquela data.
+        Na primeira importação da conta o saldo inicial ainda é desconhecido:
+        ele é deduzido daqui e a diferença é zero.
+        Devolve a diferença (banco - razão).
+        """
+        if self.saldo_inicial is None:
+            self.definir_saldo_inicial(round(saldo_banco - self.saldo_em(data), 2))
+            return 0.0
+        return round(saldo_banco - self.saldo_em(data), 2)
+
+
+class Razao:
+    """
+    Conjunto de livros por (Banco ID, Conta). Com `agrupar(banco, conta)`
+    (ex.: Conciliador().grupo), contas do mesmo grupo dividem o livro da
+    primeira delas.
+    """
+
+    def __init__(self, saldos_iniciais=None, agrupar=None):
+        self.agrupar = agrupar
+        self.livros = {}
+        self.chaves = {}     # (banco, conta) -> chave do livro
+        self.por_grupo = {}  # grupo -> chave do livro
+        for chave, saldo in (saldos_iniciais or {}).items():
+            chave = self.chave(*chave)
+            if chave not in self.livros:  # saldo repetido de outra fonte da mesma conta: vale o primeiro
+                self.livros[chave] = LivroConta(saldo)
+
+    def chave(self, banco_id, conta):
+        """Chave do livro de (banco, conta): ela mesma ou a da primeira conta do mesmo grupo"""
+        chave = (banco_id, conta or "N/A")
+        canonica = self.chaves.get(chave)
+        if canonica is None:
+            canonica = chave if self.agrupar is None else self.por_grupo.setdefault(self.agrupar(*chave), chave)
+            self.chaves[chave] = canonica
+        return canonica
+
+    def livro(self, banco_id, conta):
+        chave = self.chave(banco_id, conta)
+        livro = self.livros.get(chave)
+        if livro is None:
+            livro = self.livros[chave] = LivroConta()
+        return livro
+
+    def saldo(self, banco_id, conta):
+        return self.livro(banco_id, conta).saldo_final
+
+    def saldos(self):
+        """{(banco, conta): saldo final} para a aba BANCOS (conta só com meses arquivados entra pelo saldo inicial)"""
+        return {chave: livro.saldo_final for chave, livro in self.livros.items()
+                if len(livro) or livro.saldo_inicial is not None}
+
+    def saldos_iniciais(self):
+        return {chave: livro.saldo_inicial for chave, livro in self.livros.items()
+                if livro.saldo_inicial is not None}
+
+    def gravar(self, ws):
+        """Escreve na planilha só os saldos acumulados que mudaram; devolve quantos"""
+        total = 0
+        for livro in self.livros.values():
+            for linha, saldo in livro.alteracoes():
+                ws.cell(row=linha, column=COL_SALDO, value=saldo)
+                total += 1
+        return total
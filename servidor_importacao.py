@@ -0,0 +1,265 @@
+# ==========================================================
+# SCRIPT: Servidor de importação (um único escritor da planilha)
+# Quando várias pessoas usam o mesmo extrato_ofx.xlsx, cada main.py
+# carregava, alterava e salvava a planilha inteira: o último save
+# apagava as execuções dos outros. Com o servidor no ar, só ele abre
+# a planilha; o menu do main.py envia a importação, o lançamento
+# manual e o desfazer para cá e recebe o resultado.
+#   - HTTP em localhost (JSON), uma fila de trabalhos, uma thread escritora
+#   - trabalhos do mesmo tipo que chegam juntos viram um único save,
+#     mas cada pedido tem a sua execução (o Desfazer de um cliente não
+#     apaga o que outro importou)
+#   - se a planilha não abrir na partida, o erro vai para o log e todo
+#     pedido recebe 503 em vez de ficar esperando
+#   - planilha, razão e índice de impressões ficam em memória
+#   - processo residente: bibliotecas (openpyxl, pdfplumber, ofxtools)
+#     importadas e processos de leitura já no ar; a importação do dia
+#     não paga a partida do Python nem a abertura da planilha
+#   - cliente leve (só biblioteca padrão) em cliente_importacao.py, que
+#     também sobe este servidor em segundo plano (--iniciar)
+#
+# Uso:
+#   python servidor_importacao.py [--saida extrato_ofx.xlsx] [--porta 8765]
+#   python cliente_importacao.py parar    (encerra o servidor)
+# ==========================================================
+
+import argparse
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from cliente_importacao import HOST, PORTA_PADRAO, ClienteImportacao  # noqa: F401 (reexportado)
+from leitores import separar_membro
+from main import TRABALHADORES_LEITURA, SessaoImportacao, caminho_diario
+
+JANELA_AGRUPAMENTO = 0.2  # segundos esperando outros trabalhos antes de gravar
+
+
+class Trabalho:
+    """Pedido de um cliente: tipo ("importar", "manual", "desfazer", "parar") + dados"""
+
+    def __init__(self, tipo, dados):
+        self.tipo = tipo
+        self.dados = dados
+        self.resposta = None
+        self.pronto = threading.Event()
+
+    def responder(self, resposta):
+        self.resposta = resposta
+        self.pronto.set()
+
+
+# ==========================================================
+# Servidor
+# ==========================================================
+def aquecer(_):
+    """Roda em cada processo de leitura na partida: deixa os leitores importados"""
+    import leitores  # noqa: F401
+
+    return os.getpid()
+
+
+class ServidorImportacao:
+    TIPOS = ("importar", "manual", "desfazer", "parar")
+
+    def __init__(self, saida, janela=JANELA_AGRUPAMENTO, trabalhadores=TRABALHADORES_LEITURA):
+        self.saida = os.path.abspath(saida)
+        self.sessao = SessaoImportacao(self.saida)
+        self.janela = janela
+        self.trabalhadores = trabalhadores
+        self.fila = queue.Queue()
+        self.pronto = False
+        self.falha = None  # erro na partida do escritor: nenhum trabalho será executado
+        self.iniciado = time.time()
+        self.atendidos = 0
+
+    def enfileirar(self, tipo, dados):
+        """Chamado pelas threads do HTTP: espera o escritor e devolve a resposta"""
+        if tipo not in self.TIPOS:
+            return {"ok": False, "erro": f"Tipo de trabalho desconhecido: {tipo}"}
+        trabalho = Trabalho(tipo, dados)
+        self.fila.put(trabalho)
+        trabalho.pronto.wait()
+        return trabalho.resposta
+
+    def escritor(self):
+        """Única thread que toca na planilha"""
+        inicio = time.perf_counter()
+        try:
+            if self.trabalhadores > 0:
+                # Pool de leitura que vive tanto quanto o servidor, com os processos já de pé
+                self.sessao.executor = ProcessPoolExecutor(max_workers=self.trabalhadores)
+                list(self.sessao.executor.map(aquecer, range(self.trabalhadores)))
+            if os.path.exists(caminho_diario(self.saida)):
+                resumo = self.sessao.importar([])
+                logging.info(f"Servidor: execução {resumo['execucao']} retomada do diário")
+            self.sessao.carregar()
+        except Exception as e:
+            logging.exception(f"Servidor: falha ao abrir {self.saida}")
+            self.falha = f"falha ao abrir a planilha: {e}"
+            return self.recusar()
+        self.pronto = True
+        logging.info(f"Servidor: pronto em {time.perf_counter() - inicio:.1f} s ({self.saida})")
+        while True:
+            trabalhos = [self.fila.get()]
+            # Junta o que chegar logo em seguida no mesmo save
+            try:
+                while True:
+                    trabalhos.append(self.fila.get(timeout=self.janela))
+            except queue.Empty:
+                pass
+
+            # Grupos consecutivos do mesmo tipo, na ordem de chegada
+            grupos = []
+            for trabalho in trabalhos:
+                if grupos and grupos[-1][0] == trabalho.tipo and trabalho.tipo != "desfazer":
+                    grupos[-1][1].append(trabalho)
+                else:
+                    grupos.append((trabalho.tipo, [trabalho]))
+            for posicao, (tipo, grupo) in enumerate(grupos):
+                if tipo == "parar":
+                    self.parar(grupo, [t for _, seguintes in grupos[posicao + 1:] for t in seguintes])
+                    return
+                self.executar_grupo(tipo, grupo)
+                self.atendidos += len(grupo)
+
+    def recusar(self):
+        """Sem planilha: responde com erro a tudo o que chegar (o pedido de parar é atendido)"""
+        if self.sessao.executor is not None:
+            self.sessao.executor.shutdown()
+        while True:
+            trabalho = self.fila.get()
+            if trabalho.tipo == "parar":
+                trabalho.responder({"ok": True, "resultado": None})
+            else:
+                trabalho.responder({"ok": False, "erro": self.falha})
+
+    def parar(self, grupo, restantes):
+        """Encerra depois do que chegou antes do pedido; o que vier depois recebe erro"""
+        try:
+            while True:
+                restantes.append(self.fila.get_nowait())
+        except queue.Empty:
+            pass
+        for trabalho in restantes:
+            trabalho.responder({"ok": False, "erro": "servidor encerrado"})
+        if self.sessao.executor is not None:
+            self.sessao.executor.shutdown()
+        logging.info("Servidor: encerrado a pedido do cliente")
+        for trabalho in grupo:
+            trabalho.responder({"ok": True, "resultado": None})
+
+    def executar_grupo(self, tipo, grupo):
+        try:
+            if tipo == "importar":
+                respostas = self.importar(grupo)
+            elif tipo == "manual":
+                respostas = self.lancar(grupo)
+            else:
+                respostas = [self.sessao.desfazer(int(grupo[0].dados["execucao"]))]
+        except Exception as e:
+            if tipo == "importar":
+                # Nada foi salvo: o diário volta ao que era, senão a próxima importação retomaria
+                # os arquivos deste lote como se fossem dela (e responderia com a execução errada)
+                self.sessao.reverter_diario()
+            if len(grupo) > 1:
+                # Um trabalho com problema não derruba os outros do lote
+                for trabalho in grupo:
+                    self.executar_grupo(tipo, [trabalho])
+                return
+            logging.exception(f"Servidor: falha em '{tipo}'")
+            grupo[0].responder({"ok": False, "erro": str(e)})
+            return
+        for trabalho, resultado in zip(grupo, respostas):
+            trabalho.responder({"ok": True, "resultado": resultado})
+
+    def importar(self, grupo):
+        resumos = self.sessao.importar_grupos([trabalho.dados["arquivos"] for trabalho in grupo])
+        logging.info(f"Servidor: {len(grupo)} pedido(s) num save, "
+                     f"execução(ões) {', '.join(str(r['execucao']) for r in resumos)}")
+
+        respostas = []
+        for trabalho, resumo in zip(grupo, resumos):
+            # Um .zip/.tar.gz aparece em por_arquivo como os seus membros ("x.zip::membro")
+            contagens = [contagem for fonte, contagem in resumo["por_arquivo"].items()
+                         if separar_membro(fonte)[0] in trabalho.dados["arquivos"]]
+            respostas.append({
+                "arquivos": len(contagens), "retomados": resumo["retomados"],
+                "execucao": resumo["execucao"],
+                "adicionados": sum(p for p, _ in contagens), "ignorados": sum(i for _, i in contagens),
+                "saldo": resumo["saldo"], "divergencias": resumo["divergencias"],
+                "pedidos_agrupados": len(grupo),
+            })
+        return respostas
+
+    def lancar(self, grupo):
+        return self.sessao.lancar_grupos([trabalho.dados["lancamentos"] for trabalho in grupo])
+
+    def estado(self):
+        return {"saida": self.saida, "pendentes": self.fila.qsize(), "pronto": self.pronto, "erro": self.falha,
+                "pid": os.getpid(), "ativo_ha": round(time.time() - self.iniciado), "atendidos": self.atendidos}
+
+
+def criar_tratador(servidor):
+    class Tratador(BaseHTTPRequestHandler):
+        def responder_json(self, dados, status=200):
+            corpo = json.dumps(dados, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def do_GET(self):
+            if self.path != "/estado":
+                return self.responder_json({"ok": False, "erro": "não encontrado"}, 404)
+            self.responder_json(servidor.estado())
+
+        def do_POST(self):
+            if self.path != "/trabalho":
+                return self.responder_json({"ok": False, "erro": "não encontrado"}, 404)
+            try:
+                pedido = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            except (ValueError, json.JSONDecodeError):
+                return self.responder_json({"ok": False, "erro": "JSON inválido"}, 400)
+            resposta = servidor.enfileirar(pedido.get("tipo"), pedido)
+            # Planilha que não abriu: erro do servidor, não do pedido
+            self.responder_json(resposta, 503 if servidor.falha and not resposta["ok"] else 200)
+            if pedido.get("tipo") == "parar" and resposta["ok"]:
+                # Depois da resposta enviada; shutdown() espera o serve_forever, então vem de outra thread
+                threading.Thread(target=self.server.shutdown).start()
+
+        def log_message(self, formato, *args):
+            logging.debug("Servidor HTTP: " + formato % args)
+
+    return Tratador
+
+
+def servir(saida, porta=PORTA_PADRAO, janela=JANELA_AGRUPAMENTO):
+    servidor = ServidorImportacao(saida, janela)
+    threading.Thread(target=servidor.escritor, daemon=True).start()
+    http = ThreadingHTTPServer((HOST, porta), criar_tratador(servidor))
+    print(f"🖥️ Servidor de importação em http://{HOST}:{porta} → {servidor.saida} (Ctrl+C para sair)")
+    try:
+        http.serve_forever()
+    finally:
+        http.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor único de gravação do extrato_ofx.xlsx")
+    parser.add_argument("--saida", default=os.path.join(os.getcwd(), "extrato_ofx.xlsx"),
+                        help="planilha de destino (padrão: extrato_ofx.xlsx)")
+    parser.add_argument("--porta", type=int, default=PORTA_PADRAO)
+    parser.add_argument("--janela", type=float, default=JANELA_AGRUPAMENTO,
+                        help="segundos esperando outros pedidos para gravar junto")
+    args = parser.parse_args()
+    try:
+        servir(args.saida, args.porta, args.janela)
+    except KeyboardInterrupt:
+        print("Servidor encerrado.")
@@ -0,0 +1,156 @@
+# ==========================================================
+# Transacao: registro normalizado de lançamento
+# Usado pelos leitores OFX/PDF de main.py, inter_ofxToxlsx.py,
+# cefPdfToXlsx.py e pdf_to_ofx.py no lugar das listas soltas.
+#
+# Com __slots__ cada instância não carrega um __dict__ próprio: os 8
+# campos ocupam ~104 bytes, o mesmo que a lista de 5 do parse_pdf, contra
+# ~160 da linha de 12 colunas e ~280 de um dict
+# (ver benchmarks/bench_transacao.py).
+#
+# LoteTransacoes é a lista que volta dos processos de leitura do
+# pipeline: no pickle ela vai em colunas (datas e valores em arrays
+# binários, textos emendados), e não objeto a objeto
+# (ver benchmarks/bench_handoff.py).
+# ==========================================================
+
+import hashlib
+import math
+import unicodedata
+from array import array
+from datetime import date
+
+
+def data_br(texto):
+    """Converte "dd/mm/aaaa" em date sem passar por strptime; None se inválida"""
+    try:
+        return date(int(texto[6:10]), int(texto[3:5]), int(texto[0:2]))
+    except (TypeError, ValueError):
+        return None
+
+
+def normalizar_descricao(texto):
+    """Maiúsculas, sem acentos e com espaços colapsados ("Envio  Pix" == "ENVIO PIX")"""
+    texto = unicodedata.normalize("NFKD", str(texto or ""))
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return " ".join(texto.upper().split())
+
+
+def base_impressao(banco_id, conta, data, valor, nr_doc, descricao):
+    """Parte da impressão digital que identifica o conteúdo do lançamento"""
+    data_iso = data.isoformat() if data else ""
+    return (f"{banco_id}/{conta or 'N/A'}|{data_iso}|{round(valor * 100)}|"
+            f"{(nr_doc or '').strip()}|{normalizar_descricao(descricao)}")
+
+
+def impressao_digital(base, ocorrencia=0):
+    """
+    Hash determinístico de (conta, data, valor, nr. documento, descrição
+    normalizada, ocorrência). `ocorrencia` separa lançamentos idênticos no
+    mesmo extrato (ex.: duas compras iguais no mesmo dia): 0, 1, 2...
+    """
+    return hashlib.blake2b(f"{base}|{ocorrencia}".encode("utf-8"), digest_size=10).hexdigest()
+
+
+class Transacao:
+    """Lançamento normalizado (OFX, PDF ou manual); valor com sinal (+ entrada, - saída)"""
+
+    __slots__ = ("data", "valor", "descricao", "trntype", "nr_doc", "memo", "fitid", "saldo_extrato")
+
+    def __init__(self, data, valor, descricao, trntype=None, nr_doc="", memo="", fitid=None, saldo_extrato=None):
+        self.data = data
+        self.valor = valor
+        self.descricao = descricao
+        self.trntype = trntype or ("CREDIT" if valor > 0 else "DEBIT")
+        self.nr_doc = nr_doc
+        self.memo = memo
+        self.fitid = fitid
+        self.saldo_extrato = saldo_extrato  # saldo informado pelo banco na linha (PDF), se houver
+
+    @classmethod
+    def de_ofx(cls, trn):
+        """Cria a partir de um STMTTRN do ofxtools (elementos ausentes já vêm como None)"""
+        return cls(trn.dtposted.date(), float(trn.trnamt), trn.name or "Sem descrição",
+                   trn.trntype or "N/A", "", trn.memo or "", trn.fitid)
+
+    @property
+    def tipo(self):
+        return "Entrada" if self.valor > 0 else "Saída"
+
+    @property
+    def data_str(self):
+        return self.data.strftime("%d/%m/%Y")
+
+    def base_impressao(self, banco_id, conta):
+        return base_impressao(banco_id, conta, self.data, self.valor, self.nr_doc, self.descricao)
+
+    def linha_planilha(self, saldo, banco_id, referencia, execucao):
+        """Linha de 12 colunas da aba "Extrato OFX" (referencia = Processado em / Conta)"""
+        return [self.data_str, self.tipo, self.descricao, self.valor, saldo, banco_id, referencia,
+                execucao, self.trntype, self.nr_doc, self.memo, self.fitid]
+
+    def __repr__(self):
+        return (f"Transacao({self.data_str}, {self.valor:.2f}, {self.descricao!r}, "
+                f"{self.trntype}, nr_doc={self.nr_doc!r}, fitid={self.fitid!r})")
+
+
+# ==========================================================
+# Lote em colunas (passagem entre processos)
+# ==========================================================
+CAMPOS_TEXTO = ("descricao", "trntype", "nr_doc", "memo", "fitid")
+SEPARADOR = "\x00"  # não aparece em texto de extrato; se aparecer, a coluna vai como lista
+
+
+def empacotar(transacoes):
+    """
+    Colunas de um lote: data (ordinal, 0 = sem data), valor e saldo do
+    extrato (NaN = sem saldo) em arrays binários; cada campo de texto
+    emendado em uma string só, com os índices dos None à parte.
+    """
+    colunas = {
+        "data": array("i", [t.data.toordinal() if t.data else 0 for t in transacoes]).tobytes(),
+        "valor": array("d", [t.valor for t in transacoes]).tobytes(),
+        "saldo_extrato": array("d", [math.nan if t.saldo_extrato is None else t.saldo_extrato
+                                     for t in transacoes]).tobytes(),
+    }
+    for campo in CAMPOS_TEXTO:
+        valores = [getattr(t, campo) for t in transacoes]
+        nulos = [i for i, v in enumerate(valores) if v is None]
+        for i in nulos:
+            valores[i] = ""
+        if all(v.__class__ is str and SEPARADOR not in v for v in valores):
+            colunas[campo] = (SEPARADOR.join(valores), array("i", nulos).tobytes())
+        else:
+            colunas[campo] = ([getattr(t, campo) for t in transacoes], None)
+    return len(transacoes), colunas
+
+
+def _coluna_texto(texto, nulos, n):
+    if nulos is None:
+        return texto
+    valores = texto.split(SEPARADOR) if n else []
+    indices = array("i")
+    indices.frombytes(nulos)
+    for i in indices:
+        valores[i] = None
+    return valores
+
+
+def desempacotar(n, colunas):
+    """Lista de Transacao a partir de empacotar()"""
+    datas, valores, saldos = array("i"), array("d"), array("d")
+    datas.frombytes(colunas["data"])
+    valores.frombytes(colunas["valor"])
+    saldos.frombytes(colunas["saldo_extrato"])
+    de_ordinal = date.fromordinal
+    textos = [_coluna_texto(*colunas[campo], n) for campo in CAMPOS_TEXTO]
+    return [Transacao(de_ordinal(d) if d else None, v, descricao, trntype, nr_doc, memo, fitid,
+                      None if s != s else s)  # s != s: NaN
+            for d, v, s, descricao, trntype, nr_doc, memo, fitid in zip(datas, valores, saldos, *textos)]
+
+
+class LoteTransacoes(list):
+    """Lista de Transacao que, no pickle, viaja em colunas (empacotar/desempacotar)"""
+
+    def __reduce__(self):
+        return desempacotar, empacotar(self)
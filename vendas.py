@@ -0,0 +1,157 @@
+# ==========================================================
+# Leitura e agregações do relatório de vendas (usado pelo codigo.py)
+# Os CSVs de bases/ são lidos com um esquema declarado (ESQUEMA):
+# colunas de texto repetido já chegam como category, IDs e parcelas em
+# inteiros compactos (parcela e data nos inteiros com NA do pandas, que
+# aceitam célula vazia) e "Data de Venda" (número de série do Excel)
+# vira data nativa — vazia vira NaT. relatorio_memoria compara cada coluna com o que ela
+# ocuparia lida com os dtypes padrão (texto como objeto Python).
+#
+# Totais de "Preço do Produto" por produto, tipo de pagamento, status,
+# país e data, sem laço em Python por venda:
+#   1. as colunas repetidas (texto e data) viram category — cada
+#      venda passa a ser um código inteiro por dimensão
+#   2. contagem e soma de cada dimensão saem de np.bincount sobre os
+#      códigos: uma varredura linear, sem ordenar nem montar hash
+# (Um groupby único sobre todas as dimensões juntas foi testado: com
+# muitas datas x produtos o número de combinações chega perto do de
+# vendas e ele fica ~7x mais lento que as contagens separadas.)
+# ==========================================================
+
+import sys
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+COLUNA_VALOR = "Preço do Produto"
+ORIGEM_EXCEL = "1899-12-30"  # dia 0 dos números de série de data do Excel
+
+# Esquema dos CSVs de vendas (colunas ausentes no arquivo são ignoradas)
+ESQUEMA = {
+    "Nome do Produto": "category",
+    "Sistema": "category",
+    "Documento": "int64",        # 10+ dígitos: não cabe em int32
+    "Transação": "uint32",
+    "Meio de Pagamento": "category",
+    "Moeda": "category",
+    "Preço do Produto": "float64",
+    "Número da Parcela": "Int8",   # maiúsculo: inteiro com NA (parcela em branco)
+    "Data de Venda": "Int32",      # número de série, pode vir em branco; vira data (ou NaT) em ler_vendas
+    "Status": "category",
+    "País": "category",
+    "Tipo de Pagamento": "category",
+}
+
+# Nome da aba -> coluna agrupada
+DIMENSOES = {
+    "Por Produto": "Nome do Produto",
+    "Por Tipo de Pagamento": "Tipo de Pagamento",
+    "Por Status": "Status",
+    "Por País": "País",
+    "Por Data": "Data de Venda",
+}
+
+
+# ==========================================================
+# Leitura com esquema
+# ==========================================================
+def ler_vendas(caminho, esquema=ESQUEMA):
+    """Lê um CSV de vendas já com os dtypes do esquema e a data de venda como datetime"""
+    colunas = pd.read_csv(caminho, nrows=0).columns
+    tabela = pd.read_csv(caminho, dtype={c: t for c, t in esquema.items() if c in colunas})
+    if "Data de Venda" in tabela.columns:
+        tabela["Data de Venda"] = pd.to_datetime(tabela["Data de Venda"], unit="D", origin=ORIGEM_EXCEL)
+    return tabela
+
+
+def consolidar(tabelas):
+    """
+    Concatena as tabelas mantendo as colunas category: cada arquivo tem o
+    seu conjunto de categorias e, sem unificá-los antes, o concat devolveria
+    a coluna como texto.
+    """
+    tabelas = [t.copy() for t in tabelas]
+    for coluna in tabelas[0].columns:
+        series = [t[coluna] for t in tabelas if coluna in t.columns]
+        if all(isinstance(s.dtype, pd.CategoricalDtype) for s in series):
+            categorias = union_categoricals(series, ignore_order=True).categories
+            for t in tabelas:
+                if coluna in t.columns:
+                    t[coluna] = t[coluna].cat.set_categories(categorias)
+    return pd.concat(tabelas, ignore_index=True)
+
+
+def relatorio_memoria(tabela):
+    """
+    Memória por coluna (MB): a atual e a estimada com os dtypes padrão do
+    read_csv — texto como objeto Python (ponteiro + str por linha), números
+    e datas em 64 bits. A estimativa sai das contagens por categoria, sem
+    materializar a versão em texto.
+    """
+    linhas = []
+    for coluna in tabela.columns:
+        serie = tabela[coluna]
+        atual = serie.memory_usage(deep=True, index=False)
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            tamanhos = np.fromiter((sys.getsizeof(c) for c in serie.cat.categories), dtype=np.int64,
+                                   count=len(serie.cat.categories))
+            codigos = serie.cat.codes.to_numpy()
+            contagens = np.bincount(codigos[codigos >= 0], minlength=len(tamanhos))
+            padrao = 8 * len(serie) + int(contagens @ tamanhos)
+        elif pd.api.types.is_numeric_dtype(serie) or pd.api.types.is_datetime64_any_dtype(serie):
+            padrao = 8 * len(serie)
+        else:  # já está como o read_csv padrão deixaria
+            padrao = atual
+        linhas.append((coluna, str(serie.dtype), padrao / 2**20, atual / 2**20))
+    relatorio = pd.DataFrame(linhas, columns=["Coluna", "Tipo", "Padrão (MB)", "Atual (MB)"])
+    return relatorio.round(3)
+
+
+# ==========================================================
+# Agregações
+# ==========================================================
+def categorizar(tabela, colunas):
+    """Converte as colunas indicadas em category (no lugar)"""
+    for coluna in colunas:
+        if coluna in tabela.columns and not isinstance(tabela[coluna].dtype, pd.CategoricalDtype):
+            tabela[coluna] = tabela[coluna].astype("category")
+    return tabela
+
+
+def agregar(tabela, dimensoes=DIMENSOES, valor=COLUNA_VALOR):
+    """
+    {nome da aba: DataFrame} com Vendas, Total, Ticket Médio e % do Total
+    por dimensão. Dimensões cuja coluna não existe na tabela são ignoradas.
+    """
+    dimensoes = {aba: coluna for aba, coluna in dimensoes.items() if coluna in tabela.columns}
+    if not dimensoes or tabela.empty:
+        return {}
+    categorizar(tabela, dimensoes.values())
+    valores = pd.to_numeric(tabela[valor], errors="coerce").fillna(0).to_numpy(dtype=np.float64)
+    total_geral = valores.sum()
+
+    resultado = {}
+    for aba, coluna in dimensoes.items():
+        categorias = tabela[coluna].cat.categories
+        codigos = tabela[coluna].cat.codes.to_numpy()
+        rotulos = list(categorias)
+        if (codigos < 0).any():  # valor vazio: vira a última posição
+            codigos = np.where(codigos < 0, len(categorias), codigos)
+            rotulos.append("(vazio)")
+        vendas = np.bincount(codigos, minlength=len(rotulos))
+        totais = np.bincount(codigos, weights=valores, minlength=len(rotulos))
+
+        presentes = vendas > 0
+        parcial = pd.DataFrame({
+            coluna: np.asarray(rotulos, dtype=object)[presentes],
+            "Vendas": vendas[presentes],
+            "Total": totais[presentes].round(2),
+            "Ticket Médio": (totais[presentes] / vendas[presentes]).round(2),
+            "% do Total": (totais[presentes] / total_geral * 100).round(2) if total_geral else 0.0,
+        })
+        # Datas em ordem cronológica (as categorias já vêm ordenadas); o resto do maior total para o menor
+        if not pd.api.types.is_datetime64_any_dtype(categorias):
+            parcial = parcial.sort_values("Total", ascending=False, kind="stable").reset_index(drop=True)
+        resultado[aba] = parcial
+    return resultado